@@ -1,7 +1,10 @@
+import atexit
 import os
 import secrets
 import time
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
@@ -12,12 +15,29 @@ load_dotenv()
 
 # Import models and forms
 from models.database import db, User, Patient, Prediction
+from models.migrations import run_migrations
+from models.engine import configure_engine, load_profile_config
+from models.write_queue import WriteQueue
+from models.routing import read_only, record_write
+from models.medical_content import (cached_content_id, content_key, insert_content, pinnable, prediction_medical_info,
+                                    remember_content)
+from models.stats import user_prediction_totals, analytics_summary
+from models.features import image_hash, features_row, store_features, load_features
+from models.queries import (recent_predictions_for_user, prediction_summary_by_patient,
+                            prediction_stats_for_patient, patients_page, predictions_page)
 from forms import LoginForm, SignupForm, PatientForm, ImageUploadForm
 
 # Import ML and translation utilities
 from utils.enhanced_ml_model import EnhancedMLPredictor
 from utils.translator import TranslationService
+from utils.catalogs import ui_strings
 from utils.medical_info import MedicalInfoService
+from utils.medical_info_cache import MedicalInfoCache
+from utils.warmup import Warmup
+from utils.dicom_reader import DicomImage, DicomError, is_dicom
+from utils.prediction_log import prediction_log_from_config
+from utils.duplicates import DuplicateIndex, perceptual_hash
+from utils.similar_cases import SimilarCases
 
 app = Flask(__name__)
 
@@ -26,7 +46,37 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', secrets.token_hex(16))
 app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///mediscan.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB max upload size
+app.config['BATCH_MAX_FILES'] = int(os.getenv('BATCH_MAX_FILES', 50))
+# Zip members are expanded on the server, so their uncompressed size is capped separately
+app.config['BATCH_MAX_FILE_BYTES'] = int(os.getenv('BATCH_MAX_FILE_BYTES', 64 * 1024 * 1024))
+app.config['BATCH_MAX_TOTAL_BYTES'] = int(os.getenv('BATCH_MAX_TOTAL_BYTES', 256 * 1024 * 1024))
+app.config['BATCH_PREDICT_WORKERS'] = int(os.getenv('BATCH_PREDICT_WORKERS', min(4, os.cpu_count() or 1)))
+app.config['PAGE_SIZE'] = int(os.getenv('PAGE_SIZE', 20))
+app.config['MAX_PAGE_SIZE'] = 100
+# Prediction log sink; set PREDICTION_LOG_DIR to an empty string to disable it
+app.config['PREDICTION_LOG_DIR'] = os.getenv('PREDICTION_LOG_DIR', 'logs/predictions')
+app.config['PREDICTION_LOG_CAPACITY'] = int(os.getenv('PREDICTION_LOG_CAPACITY', 10000))
+app.config['PREDICTION_LOG_POLICY'] = os.getenv('PREDICTION_LOG_POLICY', 'drop')
+app.config['PREDICTION_LOG_MAX_BYTES'] = int(os.getenv('PREDICTION_LOG_MAX_BYTES', 50 * 1024 * 1024))
+# Hamming distance (of 64 dHash bits) for "looks like study #N", and for reusing that study's result
+app.config['DUPLICATE_DISTANCE'] = int(os.getenv('DUPLICATE_DISTANCE', 6))
+app.config['DUPLICATE_REUSE_DISTANCE'] = int(os.getenv('DUPLICATE_REUSE_DISTANCE', 2))
+# Similar-case search switches from exact to inverted-list (IVF) search above this many cases
+app.config['SIMILAR_CASES_MODE'] = os.getenv('SIMILAR_CASES_MODE', 'auto')
+app.config['SIMILAR_CASES_IVF_THRESHOLD'] = int(os.getenv('SIMILAR_CASES_IVF_THRESHOLD', 50000))
+app.config['SIMILAR_CASES_NPROBE'] = int(os.getenv('SIMILAR_CASES_NPROBE', 8))
+app.config['TRANSLATION_CACHE_DB'] = os.getenv('TRANSLATION_CACHE_DB', 'translation_cache.db')
+app.config['TRANSLATION_CACHE_MAX_ENTRIES'] = int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', 100000))
+app.config['TRANSLATION_CATALOG_DIR'] = os.getenv('TRANSLATION_CATALOG_DIR', 'catalogs')
+app.config['TRANSLATE_BULK_MAX_TEXTS'] = int(os.getenv('TRANSLATE_BULK_MAX_TEXTS', 500))
+# Background warm-up of medical info for every condition and language; /readyz waits for it
+app.config['WARMUP_ENABLED'] = os.getenv('WARMUP_ENABLED', 'true').lower() == 'true'
+app.config['WARMUP_RATE'] = float(os.getenv('WARMUP_RATE', 2))
+app.config['WARMUP_LANGUAGES'] = os.getenv('WARMUP_LANGUAGES', '')
+load_profile_config(app.config)
+
+BATCH_ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'dcm', 'dicom'}
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -37,20 +87,69 @@ login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 
-# Initialize database (only create tables, don't recreate)
+# Initialize database (only create tables, don't recreate) and apply pending migrations
 db.init_app(app)
 with app.app_context():
+    for engine in db.engines.values():
+        configure_engine(engine, app.config)
     db.create_all()
+    run_migrations(db.engine)
+    use_write_queue = db.engine.dialect.name == 'sqlite' and app.config['SQLITE_WRITE_QUEUE']
+
+# SQLite has a single writer, so request threads hand their inserts to one writer thread
+write_queue = WriteQueue(app, db) if use_write_queue else None
+if write_queue:
+    atexit.register(write_queue.stop)
 
 # Initialize services
 ml_predictor = EnhancedMLPredictor()
-translator = TranslationService()
+ml_predictor.prediction_log = prediction_log_from_config(app.config)
+translator = TranslationService(app.config['TRANSLATION_CACHE_DB'], app.config['TRANSLATION_CACHE_MAX_ENTRIES'],
+                                catalog_dir=app.config['TRANSLATION_CATALOG_DIR'])
+# English text of every data-translate element; the i18n bundles carry only these
+UI_STRINGS = sorted(set(ui_strings(os.path.join(app.root_path, 'templates')).values()))
 medical_info = MedicalInfoService()
+# Condition names are the variable slots of templated medical text
+translator.memory.add_terms([label for labels in ml_predictor.class_labels.values() for label in labels]
+                            + list(medical_info.medical_tips_db))
+# Localized result-page text, so no request waits on a search or translation call
+medical_info_cache = MedicalInfoCache(medical_info, translator)
+warmup = None
+if app.config['WARMUP_ENABLED']:
+    warmup = Warmup(medical_info_cache,
+                    [label for labels in ml_predictor.class_labels.values() for label in labels],
+                    [language.strip() for language in app.config['WARMUP_LANGUAGES'].split(',') if language.strip()]
+                    or list(translator.get_supported_languages()),
+                    rate=app.config['WARMUP_RATE'])
+    # Started by the first request (or __main__), so CLI commands importing the app never warm up
+    atexit.register(warmup.stop)
+duplicate_index = DuplicateIndex()
+similar_cases = SimilarCases(ml_predictor.FEATURE_PIPELINE_VERSION,
+                             mode=app.config['SIMILAR_CASES_MODE'],
+                             ivf_threshold=app.config['SIMILAR_CASES_IVF_THRESHOLD'],
+                             nprobe=app.config['SIMILAR_CASES_NPROBE'])
 
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
+@app.context_processor
+def inject_i18n_version():
+    """Lets pages request the i18n bundle under a URL that changes when the catalogs do"""
+    return {'i18n_version': translator.catalogs.bundle_version(UI_STRINGS)}
+
+@app.before_request
+def resume_warmup():
+    # Only serving processes get requests (readiness probes included); threads do not
+    # survive a fork, so each worker also picks the warm-up up where it stopped
+    if warmup is not None:
+        warmup.start()
+
+def page_language():
+    """Language picked in the navbar, mirrored into a cookie by main.js"""
+    language = request.cookies.get('mediscan_language', 'en')
+    return language if language in translator.get_supported_languages() else 'en'
+
 @app.route('/')
 def index():
     """Landing page"""
@@ -120,19 +219,24 @@ def logout():
 
 @app.route('/dashboard')
 @login_required
+@read_only
 def dashboard():
     """User dashboard"""
-    patients = Patient.query.filter_by(user_id=current_user.id).all()
-    recent_predictions = []
-
-    for patient in patients:
-        patient_predictions = Prediction.query.filter_by(patient_id=patient.id).order_by(Prediction.created_at.desc()).limit(3).all()
-        recent_predictions.extend(patient_predictions)
+    cursor = request.args.get('cursor')
+    try:
+        patients, next_cursor = patients_page(current_user.id, cursor, app.config['PAGE_SIZE'])
+    except ValueError:
+        return redirect(url_for('dashboard'))
 
-    recent_predictions.sort(key=lambda x: x.created_at, reverse=True)
-    recent_predictions = recent_predictions[:5]  # Show only 5 most recent
+    # Constant number of queries regardless of how many patients the user has
+    total_patients = Patient.query.filter_by(user_id=current_user.id).count()
+    recent_predictions = recent_predictions_for_user(current_user.id, limit=5, per_patient=3)
+    prediction_summary = prediction_summary_by_patient(current_user.id, [p.id for p in patients])
+    prediction_totals = user_prediction_totals(current_user.id)
 
-    return render_template('dashboard.html', patients=patients, recent_predictions=recent_predictions)
+    return render_template('dashboard.html', patients=patients, recent_predictions=recent_predictions,
+                           prediction_summary=prediction_summary, total_patients=total_patients,
+                           prediction_totals=prediction_totals, cursor=cursor, next_cursor=next_cursor)
 
 @app.route('/patient_form', methods=['GET', 'POST'])
 @login_required
@@ -162,6 +266,92 @@ def patient_form():
 
     return render_template('patient_form.html', form=form)
 
+def prepare_image(file_path, filename, body_part):
+    """Return the displayable image name and body part for a saved upload.
+
+    DICOM files get an 8-bit PNG preview (browsers cannot display DICOM) and
+    their BodyPartExamined header takes precedence over the selected body part.
+    Raises DicomError if a DICOM file cannot be read.
+    """
+    if not is_dicom(file_path):
+        return filename, body_part
+
+    dicom = DicomImage(file_path)
+    image_path = f"{os.path.splitext(filename)[0]}.png"
+    dicom.save_preview(os.path.join(app.config['UPLOAD_FOLDER'], image_path))
+    return image_path, dicom.body_part or body_part
+
+def hash_image(image_path):
+    """Perceptual hash of an uploaded image, or None if it cannot be read"""
+    try:
+        return perceptual_hash(os.path.join(app.config['UPLOAD_FOLDER'], image_path))
+    except Exception as e:
+        print(f"Error hashing image: {e}")
+        return None
+
+def find_duplicate(value, user_id):
+    """Closest earlier study of this user within DUPLICATE_DISTANCE, or None"""
+    if value is None:
+        return None
+    with db.engine.connect() as connection:
+        return duplicate_index.nearest(connection, value, app.config['DUPLICATE_DISTANCE'], user_id)
+
+def run_prediction(file_path, body_part, patient, reuse=None):
+    """Run the ML model and look up medical information for one image.
+
+    Returns (prediction, confidence, medical info, image features) where the
+    features entry is None if the model fell back to a random prediction.
+    When ``reuse`` is an earlier Prediction of the same film its result and
+    stored features are used instead of running the model again.
+    """
+    if reuse is not None:
+        features = None
+        if reuse.image_hash:
+            with db.engine.connect() as connection:
+                features = load_features(connection, reuse.image_hash, ml_predictor.FEATURE_PIPELINE_VERSION)
+        medical_info_data = stored_medical_info(reuse)
+        image_features = None
+        if features is not None:
+            image_features = features_row(image_hash(file_path), ml_predictor.FEATURE_PIPELINE_VERSION, features)
+        return reuse.prediction_result, reuse.confidence_score, medical_info_data, image_features
+
+    prediction_result, confidence, features = ml_predictor.predict_with_features(
+        file_path, body_part,
+        patient_age=patient.age,
+        patient_gender=patient.gender
+    )
+    medical_info_data = medical_info_cache.get(prediction_result)
+    image_features = None
+    if features is not None:
+        image_features = features_row(image_hash(file_path), ml_predictor.FEATURE_PIPELINE_VERSION, features)
+    return prediction_result, confidence, medical_info_data, image_features
+
+def stored_medical_info(prediction):
+    """Medical information stored with a prediction, or the current one if none (or only a fallback) was"""
+    medical_info_data = prediction_medical_info(prediction)
+    if medical_info_data is None or not pinnable(medical_info_data):
+        medical_info_data = medical_info_cache.get(prediction.prediction_result)
+    return medical_info_data
+
+def build_prediction(patient_id, image_path, body_part, prediction_result, confidence, medical_info_data,
+                     image_features=None, perceptual_hash_value=None):
+    """Create (but do not commit) a Prediction row.
+
+    Returns (prediction, medical info, image features) for save_predictions,
+    which writes the medical content and feature rows in the same transaction
+    as the prediction.
+    """
+    prediction = Prediction(
+        patient_id=patient_id,
+        image_path=image_path,
+        body_part=body_part,
+        prediction_result=prediction_result,
+        confidence_score=confidence,
+        image_hash=image_features['image_hash'] if image_features else None,
+        perceptual_hash=perceptual_hash_value
+    )
+    return prediction, medical_info_data, image_features
+
 @app.route('/upload_predict', methods=['GET', 'POST'])
 @login_required
 def upload_predict():
@@ -189,39 +379,232 @@ def upload_predict():
         patient = Patient.query.get(form.patient_id.data)
         body_part = form.body_part.data
 
-        # Get enhanced prediction with patient context
-        prediction_result, confidence = ml_predictor.predict(
-            file_path, body_part,
-            patient_age=patient.age,
-            patient_gender=patient.gender
-        )
-
-        # Get medical information
-        medical_info_data = medical_info.get_medical_info(prediction_result)
+        try:
+            image_path, detected_body_part = prepare_image(file_path, filename, body_part)
+        except DicomError as e:
+            os.remove(file_path)
+            flash(f'Could not read DICOM file: {e}', 'error')
+            return render_template('upload_predict.html', form=form)
+
+        if detected_body_part != body_part:
+            flash(f'Body part set to {detected_body_part.title()} from the DICOM header.', 'info')
+            body_part = detected_body_part
+
+        # A re-upload of the same patient's film keeps the earlier result so the two studies agree
+        phash = hash_image(image_path)
+        duplicate = find_duplicate(phash, current_user.id)
+        reuse = None
+        if (duplicate and duplicate.patient_id == patient.id and duplicate.body_part == body_part
+                and duplicate.distance <= app.config['DUPLICATE_REUSE_DISTANCE']):
+            reuse = db.session.get(Prediction, duplicate.prediction_id)
+
+        # Get enhanced prediction with patient context and medical information
+        prediction_result, confidence, medical_info_data, image_features = run_prediction(
+            file_path, body_part, patient, reuse=reuse)
 
         # Save prediction to database
-        prediction = Prediction(
-            patient_id=form.patient_id.data,
-            image_path=filename,
-            body_part=body_part,
-            prediction_result=prediction_result,
-            confidence_score=confidence,
-            additional_info=json.dumps(medical_info_data),
-            medical_tips=json.dumps(medical_info_data.get('medical_tips', []))
-        )
+        pending = build_prediction(form.patient_id.data, image_path, body_part,
+                                   prediction_result, confidence, medical_info_data, image_features, phash)
 
-        db.session.add(prediction)
-        db.session.commit()
+        prediction_id, = save_predictions([pending])
+        if image_features is not None:
+            similar_cases.add(prediction_id, image_features, current_user.id, body_part)
 
         return render_template('prediction_result.html',
-                             prediction=prediction,
-                             medical_info=medical_info_data,
-                             patient=Patient.query.get(form.patient_id.data))
+                             prediction=db.session.get(Prediction, prediction_id),
+                             medical_info=medical_info_cache.localize(medical_info_data, page_language()),
+                             patient=Patient.query.get(form.patient_id.data),
+                             duplicate=duplicate,
+                             reused_duplicate=reuse is not None)
 
     return render_template('upload_predict.html', form=form)
 
+def save_predictions(pending):
+    """Insert new predictions, their medical content and features in one commit and return their ids.
+
+    ``pending`` holds build_prediction results.  With the SQLite write queue
+    enabled the insert runs on the writer thread, batched with other requests'
+    writes; the objects must not be used from the calling thread afterwards,
+    so only ids are returned.  Content ids are cached only once committed.
+    """
+    if not pending:
+        return []
+
+    def insert(session):
+        connection = session.connection()
+        content = []
+        store_features(connection, [image_features for _, _, image_features in pending if image_features])
+        for prediction, medical_info_data, _ in pending:
+            if not pinnable(medical_info_data):
+                continue
+            key, payload_json = content_key(medical_info_data, medical_info.CONTENT_VERSION)
+            content_id = cached_content_id(key) or insert_content(connection, key, payload_json)
+            prediction.medical_content_id = content_id
+            content.append((key, content_id, payload_json))
+        predictions = [prediction for prediction, _, _ in pending]
+        session.add_all(predictions)
+        session.flush()
+        return [p.id for p in predictions], content
+
+    if write_queue is None:
+        prediction_ids, content = insert(db.session)
+        db.session.commit()
+    else:
+        prediction_ids, content = write_queue.submit(insert).result()
+        record_write()
+    for key, content_id, payload_json in content:
+        remember_content(key, content_id, payload_json)
+    return prediction_ids
+
+def iter_batch_uploads(files):
+    """Yield (original name, file object, declared size) for every image in the uploaded parts.
+
+    Zip archives are expanded member by member so their contents are streamed
+    to disk rather than extracted in memory.  The declared size is the zip
+    member's uncompressed size, or None for a plain upload.
+    """
+    for file in files:
+        if not file or not file.filename:
+            continue
+        if file.filename.lower().endswith('.zip'):
+            with zipfile.ZipFile(file.stream) as archive:
+                for member in archive.infolist():
+                    if member.is_dir() or not allowed_batch_file(member.filename):
+                        continue
+                    with archive.open(member) as member_file:
+                        yield os.path.basename(member.filename), member_file, member.file_size
+        elif allowed_batch_file(file.filename):
+            yield file.filename, file.stream, None
+
+def copy_upload(stream, file_path, limit):
+    """Copy ``stream`` to ``file_path``, returning its size, or None (and no file) once it passes ``limit`` bytes"""
+    size = 0
+    with open(file_path, 'wb') as out:
+        while True:
+            chunk = stream.read(min(1024 * 1024, limit - size + 1))
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                break
+            out.write(chunk)
+    if size > limit:
+        os.remove(file_path)
+        return None
+    return size
+
+def allowed_batch_file(filename):
+    """Check the extension against the formats ImageUploadForm accepts"""
+    return os.path.splitext(filename)[1].lower().lstrip('.') in BATCH_ALLOWED_EXTENSIONS
+
+@app.route('/upload_batch', methods=['POST'])
+@login_required
+def upload_batch():
+    """Upload several X-rays (or a zip of them) for one patient.
+
+    Each file is streamed to the upload folder, predictions run in parallel and
+    one NDJSON line is streamed back per file as soon as it finishes.  All
+    Prediction rows are inserted with a single commit at the end, after which
+    a final summary line with the new prediction ids is sent.  Files beyond
+    BATCH_MAX_FILES or the byte limits are not stored and get an error line.
+    """
+    patient = Patient.query.filter_by(id=request.form.get('patient_id', type=int),
+                                      user_id=current_user.id).first()
+    if patient is None:
+        return jsonify({'error': 'Patient not found'}), 404
+
+    body_part = request.form.get('body_part', 'chest')
+    if body_part not in ml_predictor.get_supported_body_parts():
+        return jsonify({'error': 'Body part not supported'}), 400
+
+    # Stream every part to storage before any prediction starts
+    timestamp = str(int(time.time()))
+    saved = []
+    skipped = []
+    total_bytes = 0
+    try:
+        for index, (original_name, stream, declared_size) in enumerate(
+                iter_batch_uploads(request.files.getlist('images'))):
+            if index >= app.config['BATCH_MAX_FILES']:
+                skipped.append((original_name, f"More than {app.config['BATCH_MAX_FILES']} files in one batch"))
+                continue
+            remaining = app.config['BATCH_MAX_TOTAL_BYTES'] - total_bytes
+            limit = min(app.config['BATCH_MAX_FILE_BYTES'], remaining)
+            reason = ('Batch size limit reached' if remaining < app.config['BATCH_MAX_FILE_BYTES']
+                      else f"File larger than {app.config['BATCH_MAX_FILE_BYTES']} bytes")
+            if declared_size is not None and declared_size > limit:
+                skipped.append((original_name, reason))
+                continue
+            filename = f"{timestamp}_{index}_{secure_filename(original_name)}"
+            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+            size = copy_upload(stream, file_path, limit)
+            if size is None:
+                skipped.append((original_name, reason))
+                continue
+            total_bytes += size
+            saved.append((original_name, filename, file_path))
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'Invalid zip archive'}), 400
+
+    if not saved:
+        return jsonify({'error': 'No supported images provided',
+                        'skipped': [{'file': name, 'error': error} for name, error in skipped]}), 400
+
+    def process(original_name, filename, file_path):
+        image_path, file_body_part = prepare_image(file_path, filename, body_part)
+        return (image_path, file_body_part, hash_image(image_path)) + run_prediction(file_path, file_body_part, patient)
+
+    @stream_with_context
+    def generate():
+        for original_name, error in skipped:
+            yield json.dumps({'file': original_name, 'status': 'error', 'error': error}) + '\n'
+
+        predictions = []
+        with ThreadPoolExecutor(max_workers=app.config['BATCH_PREDICT_WORKERS']) as executor:
+            futures = {executor.submit(process, *item): item for item in saved}
+            for future in as_completed(futures):
+                original_name, filename, file_path = futures[future]
+                try:
+                    (image_path, file_body_part, phash, prediction_result, confidence,
+                     medical_info_data, image_features) = future.result()
+                except Exception as e:
+                    # Like upload_predict, keep nothing of a file that could not be read
+                    preview_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{os.path.splitext(filename)[0]}.png")
+                    for path in {file_path, preview_path}:
+                        if os.path.exists(path):
+                            os.remove(path)
+                    yield json.dumps({'file': original_name, 'status': 'error', 'error': str(e)}) + '\n'
+                    continue
+
+                predictions.append(build_prediction(patient.id, image_path, file_body_part, prediction_result,
+                                                    confidence, medical_info_data, image_features, phash))
+                duplicate = find_duplicate(phash, current_user.id)
+                yield json.dumps({
+                    'file': original_name,
+                    'status': 'ok',
+                    'body_part': file_body_part,
+                    'prediction': prediction_result,
+                    'confidence': confidence,
+                    'duplicate_of': duplicate.prediction_id if duplicate else None
+                }) + '\n'
+
+        prediction_ids = save_predictions(predictions)
+        yield json.dumps({
+            'status': 'done',
+            'saved': len(prediction_ids),
+            'failed': len(saved) - len(prediction_ids),
+            'skipped': len(skipped),
+            'prediction_ids': prediction_ids
+        }) + '\n'
+
+    # The session cookie goes out with the headers, before the rows commit, so the
+    # user is pinned to the primary now rather than by the commit inside the stream
+    record_write()
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/patient/<int:patient_id>')
 @login_required
+@read_only
 def patient_detail(patient_id):
     """View patient details and prediction history"""
     patient = Patient.query.get_or_404(patient_id)
@@ -231,9 +614,79 @@ def patient_detail(patient_id):
         flash('Access denied.', 'error')
         return redirect(url_for('dashboard'))
 
-    predictions = Prediction.query.filter_by(patient_id=patient_id).order_by(Prediction.created_at.desc()).all()
+    cursor = request.args.get('cursor')
+    try:
+        predictions, next_cursor = predictions_page(patient_id, cursor, app.config['PAGE_SIZE'])
+    except ValueError:
+        return redirect(url_for('patient_detail', patient_id=patient_id))
+
+    stats = prediction_stats_for_patient(patient_id)
+
+    return render_template('patient_detail.html', patient=patient, predictions=predictions, stats=stats,
+                           cursor=cursor, next_cursor=next_cursor)
+
+def page_size_arg():
+    """Requested page size for the JSON APIs, clamped to MAX_PAGE_SIZE"""
+    limit = request.args.get('limit', app.config['PAGE_SIZE'], type=int)
+    return max(1, min(limit, app.config['MAX_PAGE_SIZE']))
+
+@app.route('/api/patients')
+@login_required
+@read_only
+def api_patients():
+    """Keyset-paginated list of the current user's patients"""
+    try:
+        patients, next_cursor = patients_page(current_user.id, request.args.get('cursor'), page_size_arg())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'patients': [p.to_dict() for p in patients], 'next_cursor': next_cursor})
+
+@app.route('/api/patients/<int:patient_id>/predictions')
+@login_required
+@read_only
+def api_patient_predictions(patient_id):
+    """Keyset-paginated prediction history of one patient"""
+    patient = Patient.query.filter_by(id=patient_id, user_id=current_user.id).first()
+    if patient is None:
+        return jsonify({'error': 'Patient not found'}), 404
+
+    try:
+        predictions, next_cursor = predictions_page(patient_id, request.args.get('cursor'), page_size_arg())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'predictions': [p.to_dict() for p in predictions], 'next_cursor': next_cursor})
+
+@app.route('/api/analytics/summary')
+@login_required
+@read_only
+def api_analytics_summary():
+    """Prediction counts per condition, body part and day for the current user"""
+    days = max(1, min(request.args.get('days', 30, type=int), 366))
+    return jsonify(analytics_summary(current_user.id, days=days))
 
-    return render_template('patient_detail.html', patient=patient, predictions=predictions)
+@app.route('/api/similar/<int:prediction_id>')
+@login_required
+@read_only
+def api_similar_cases(prediction_id):
+    """The current user's earlier cases whose image features are closest to this prediction's"""
+    prediction = Prediction.query.join(Patient).filter(
+        Prediction.id == prediction_id, Patient.user_id == current_user.id
+    ).first()
+    if prediction is None:
+        return jsonify({'error': 'Prediction not found'}), 404
+
+    k = max(1, min(request.args.get('k', 5, type=int), app.config['MAX_PAGE_SIZE']))
+    with db.engine.connect() as connection:
+        matches = similar_cases.similar(connection, prediction.id, current_user.id, prediction.body_part, k=k)
+    found = {p.id: p for p in Prediction.query.filter(Prediction.id.in_([m[0] for m in matches]))}
+
+    return jsonify({
+        'prediction_id': prediction.id,
+        'similar': [dict(found[match_id].to_dict(), distance=round(distance, 6))
+                    for match_id, distance in matches if match_id in found]
+    })
 
 @app.route('/translate', methods=['POST'])
 @login_required
@@ -252,6 +705,67 @@ def translate_text():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/translate/bulk', methods=['POST'])
+@login_required
+def translate_bulk():
+    """API endpoint translating a list of strings in one request"""
+    data = request.get_json(silent=True) or {}
+    texts = data.get('texts')
+    target_language = data.get('target_language', 'en')
+
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        return jsonify({'error': 'texts must be a list of strings'}), 400
+    if len(texts) > app.config['TRANSLATE_BULK_MAX_TEXTS']:
+        return jsonify({'error': f"At most {app.config['TRANSLATE_BULK_MAX_TEXTS']} texts per request"}), 400
+    if target_language not in translator.get_supported_languages():
+        return jsonify({'error': f"Unsupported language: {target_language}"}), 400
+
+    return jsonify({'translations': translator.translate_batch(texts, target_language)})
+
+@app.route('/i18n/<language>.json')
+def i18n_bundle(language):
+    """Catalog translations of the page text for one language"""
+    if language not in translator.get_supported_languages():
+        return jsonify({'error': f"Unsupported language: {language}"}), 404
+
+    version = translator.catalogs.bundle_version(UI_STRINGS)
+    response = jsonify({
+        'language': language,
+        'version': version,
+        'messages': translator.catalogs.bundle(language, UI_STRINGS) if language != 'en' else {}
+    })
+    response.set_etag(f"{language}-{version}")
+    response.cache_control.public = True
+    if request.args.get('v') == version:
+        # The URL carries the version, so this exact response never changes
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'status': 'ok'})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: 503 until every condition's medical info is warm in every language"""
+    if warmup is None:
+        return jsonify({'status': 'ready'})
+    snapshot = warmup.snapshot()
+    if not snapshot['ready']:
+        return jsonify(dict(snapshot, status='warming')), 503
+    return jsonify(dict(snapshot, status='ready'))
+
+@app.route('/api/translation/metrics')
+@login_required
+def api_translation_metrics():
+    """Upstream translation latency and errors per language, circuit breaker state and medical info lookups"""
+    return jsonify(dict(translator.get_metrics(), medical_info=medical_info_cache.snapshot(),
+                        medical_search=medical_info.http.snapshot()))
+
 @app.route('/api/model_info/<body_part>')
 @login_required
 def get_model_info(body_part):
@@ -281,6 +795,7 @@ def get_supported_body_parts():
 
 @app.route('/prediction/<int:prediction_id>')
 @login_required
+@read_only
 def view_prediction(prediction_id):
     """View detailed prediction results"""
     prediction = Prediction.query.get_or_404(prediction_id)
@@ -291,18 +806,18 @@ def view_prediction(prediction_id):
         return redirect(url_for('dashboard'))
 
     # Get medical information
-    try:
-        medical_info_data = json.loads(prediction.additional_info) if prediction.additional_info else {}
-    except:
-        medical_info_data = medical_info.get_medical_info(prediction.prediction_result)
+    medical_info_data = stored_medical_info(prediction)
 
     return render_template('prediction_result.html',
                          prediction=prediction,
-                         medical_info=medical_info_data,
+                         medical_info=medical_info_cache.localize(medical_info_data, page_language()),
                          patient=prediction.patient)
 
 if __name__ == '__main__':
     print("Starting MediScan AI...")
     print("Visit: http://localhost:5000")
     print("Demo login: demo@mediscan.com / demo123")
+    # With the debug reloader only the child process serves
+    if warmup is not None and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warmup.start()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark dashboard reads while predictions are being written, comparing the
+default SQLite settings with the production profile (WAL + pragmas)
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+
+from models.engine import SQLITE_PRODUCTION_PRAGMAS, apply_sqlite_pragmas
+
+SCHEMA = """
+CREATE TABLE predictions (
+    id INTEGER PRIMARY KEY,
+    patient_id INTEGER NOT NULL,
+    body_part VARCHAR(50) NOT NULL,
+    prediction_result VARCHAR(100) NOT NULL,
+    confidence_score FLOAT NOT NULL,
+    additional_info TEXT,
+    created_at DATETIME
+)
+"""
+READ_QUERY = text("SELECT patient_id, COUNT(*), MAX(created_at) FROM predictions "
+                  "WHERE patient_id < 50 GROUP BY patient_id")
+INSERT = text("INSERT INTO predictions (patient_id, body_part, prediction_result, confidence_score, "
+              "additional_info, created_at) VALUES (:patient_id, 'chest', 'Normal', 0.9, :info, CURRENT_TIMESTAMP)")
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_profile(name, pragmas, duration, readers, rows_per_commit):
+    """Run one writer and several readers against a fresh database file"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                               connect_args={'check_same_thread': False})
+        apply_sqlite_pragmas(engine, pragmas)
+        with engine.begin() as conn:
+            conn.execute(text(SCHEMA))
+            conn.execute(INSERT, [{'patient_id': i % 500, 'info': 'x' * 200} for i in range(20000)])
+
+        stop = threading.Event()
+        latencies = []
+        errors = []
+        commits = [0]
+        lock = threading.Lock()
+
+        def writer():
+            batch = 0
+            while not stop.is_set():
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(INSERT, [{'patient_id': (batch + i) % 500, 'info': 'x' * 200}
+                                              for i in range(rows_per_commit)])
+                    commits[0] += 1
+                except Exception as e:
+                    errors.append(f"write: {e.__class__.__name__}")
+                batch += 1
+
+        def reader():
+            own = []
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(READ_QUERY).fetchall()
+                    own.append(time.perf_counter() - started)
+                except Exception as e:
+                    errors.append(f"read: {e.__class__.__name__}")
+            with lock:
+                latencies.extend(own)
+
+        threads = [threading.Thread(target=writer)] + [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    print(f"\n{name}")
+    print(f"  reads:   {len(latencies)} ({len(latencies) / duration:.0f}/s)")
+    print(f"  latency: p50 {percentile(latencies, 0.5) * 1000:.1f}ms, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.1f}ms, max {max(latencies or [0]) * 1000:.1f}ms")
+    print(f"  writes:  {commits[0]} commits of {rows_per_commit} rows")
+    print(f"  errors:  {len(errors)}")
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=5, help='seconds per profile')
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--rows-per-commit', type=int, default=2000)
+    args = parser.parse_args()
+
+    print("⏱️  SQLite concurrency benchmark")
+    print("=" * 40)
+    default_latencies, _ = run_profile('Default (rollback journal)', {}, args.duration,
+                                       args.readers, args.rows_per_commit)
+    production_latencies, _ = run_profile('Production profile (WAL)', SQLITE_PRODUCTION_PRAGMAS, args.duration,
+                                          args.readers, args.rows_per_commit)
+
+    default_p99 = percentile(default_latencies, 0.99)
+    production_p99 = percentile(production_latencies, 0.99)
+    if production_p99:
+        print(f"\n📊 p99 read latency improved {default_p99 / production_p99:.1f}x with the production profile")
+
+
+if __name__ == "__main__":
+    main()
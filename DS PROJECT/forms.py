@@ -48,7 +48,7 @@ class ImageUploadForm(FlaskForm):
     patient_id = SelectField('Select Patient', coerce=int, validators=[DataRequired()])
     image = FileField('X-ray Image', validators=[
         FileRequired(),
-        FileAllowed(['jpg', 'jpeg', 'png'], 'Only JPG, JPEG, and PNG images are allowed!')
+        FileAllowed(['jpg', 'jpeg', 'png', 'dcm', 'dicom'], 'Only JPG, JPEG, PNG and DICOM images are allowed!')
     ])
     body_part = SelectField('Body Part', choices=[
         ('chest', 'Chest'),
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+MediScan AI command line tools
+
+Usage:
+    python mediscan.py import <directory|manifest.csv> --user-email doctor@example.com
+    python mediscan.py migrate
+    python mediscan.py explain [--verbose]
+    python mediscan.py export <output.csv> [--user-email doctor@example.com] [--since 2024-01-01]
+    python mediscan.py backfill-medical-content [--batch-size 500] [--pause 0.1]
+    python mediscan.py rebuild-stats
+    python mediscan.py export-parquet <directory> [--full] [--chunk-size 50000]
+    python mediscan.py rescore [--apply] [--body-part chest] [--batch-size 1000]
+    python mediscan.py build-catalogs [--languages hi,ta] [--output catalogs] [--timeout 300]
+"""
+
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_images(args):
+    """Bulk import historical X-rays for one clinician"""
+    from app import app, ml_predictor
+    from models.database import db, User
+    from utils.bulk_import import BulkImporter
+
+    with app.app_context():
+        user = User.query.filter_by(email=args.user_email).first()
+        if not user:
+            print(f"❌ No user with email {args.user_email}")
+            return 1
+
+        checkpoint = args.checkpoint or f"{os.path.abspath(args.source).rstrip(os.sep)}.import-checkpoint"
+        if not args.resume and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+
+        print(f"📥 Importing {args.source} for {user.email}")
+        importer = BulkImporter(
+            db, user,
+            upload_folder=app.config['UPLOAD_FOLDER'],
+            body_parts=ml_predictor.get_supported_body_parts(),
+            default_body_part=args.body_part,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            checkpoint_path=checkpoint,
+            log_config={key: value for key, value in app.config.items() if key.startswith('PREDICTION_LOG_')}
+        )
+        importer.run(args.source)
+
+        print(f"✅ Imported {importer.imported} images ({importer.failed} failed, {importer.skipped} already imported)")
+        return 0 if not importer.failed else 2
+
+
+def migrate(args):
+    """Apply pending schema migrations"""
+    from app import app
+    from models.database import db
+    from models.migrations import run_migrations
+
+    with app.app_context():
+        applied = run_migrations(db.engine)
+    print(f"✅ Applied {len(applied)} migration(s): {', '.join(applied) or 'none pending'}")
+    return 0
+
+
+def explain(args):
+    """EXPLAIN every hot query and fail if any needs a full table scan"""
+    from app import app
+    from models.database import db
+    from models.query_catalog import check_query_plans
+
+    with app.app_context():
+        results = check_query_plans(db.engine)
+
+    failures = 0
+    for result in results:
+        ok = not result['full_scans']
+        failures += not ok
+        status = "✅" if ok else f"❌ full scan of {', '.join(result['full_scans'])}"
+        print(f"{result['name']:.<40} {status}")
+        if args.verbose or not ok:
+            for line in result['plan']:
+                print(f"    {line}")
+
+    print(f"\n{len(results) - failures}/{len(results)} statements use indexes")
+    return 1 if failures else 0
+
+
+def export_predictions(args):
+    """Export predictions as CSV without loading them into memory"""
+    from datetime import datetime
+    from sqlalchemy import select
+    from app import app
+    from models.bulk import copy_out
+    from models.database import db, User, Patient, Prediction
+
+    with app.app_context():
+        statement = select(
+            Prediction.id, Prediction.patient_id, Patient.name.label('patient_name'), Prediction.body_part,
+            Prediction.prediction_result, Prediction.confidence_score, Prediction.image_path, Prediction.created_at
+        ).join(Patient, Prediction.patient_id == Patient.id).order_by(Prediction.created_at, Prediction.id)
+
+        if args.user_email:
+            user = User.query.filter_by(email=args.user_email).first()
+            if not user:
+                print(f"❌ No user with email {args.user_email}")
+                return 1
+            statement = statement.where(Patient.user_id == user.id)
+        if args.since:
+            statement = statement.where(Prediction.created_at >= datetime.fromisoformat(args.since))
+
+        with db.engine.connect() as connection, open(args.output, 'w', newline='', encoding='utf-8') as f:
+            count = copy_out(connection, statement, f)
+
+    print(f"✅ Exported {count} predictions to {args.output}")
+    return 0
+
+
+def backfill_medical_content(args):
+    """Move per-prediction medical info JSON into the shared medical_content table"""
+    from app import app, medical_info
+    from models.database import db
+    from models.medical_content import backfill_medical_content as backfill
+
+    with app.app_context():
+        print("🩺 Backfilling medical content")
+        migrated = backfill(db.engine, medical_info, batch_size=args.batch_size, pause=args.pause)
+    print(f"✅ Migrated {migrated} predictions")
+    return 0
+
+
+def rebuild_stats(args):
+    """Regenerate the prediction_stats summary table from predictions"""
+    from app import app
+    from models.database import db
+    from models.stats import rebuild_prediction_stats
+
+    with app.app_context():
+        with db.engine.begin() as connection:
+            groups = rebuild_prediction_stats(connection)
+    print(f"✅ Rebuilt prediction stats: {groups} groups")
+    return 0
+
+
+def export_parquet(args):
+    """Export predictions with demographics and image features to partitioned Parquet"""
+    from app import app, ml_predictor
+    from models.database import db
+    from utils.parquet_export import ParquetExporter
+
+    with app.app_context():
+        try:
+            exporter = ParquetExporter(db.engine, args.directory, chunk_size=args.chunk_size)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"📦 Exporting predictions to {args.directory}")
+        exporter.run(ml_predictor.FEATURE_PIPELINE_VERSION, full=args.full)
+    print(f"✅ Wrote {len(exporter.files)} Parquet files")
+    return 0
+
+
+def rescore(args):
+    """Re-evaluate the prediction rules over history from stored image features"""
+    from app import app, ml_predictor, medical_info
+    from models.database import db
+    from utils.rescore import Rescorer
+
+    with app.app_context():
+        rescorer = Rescorer(db.engine, ml_predictor, medical_info, batch_size=args.batch_size)
+        print(f"🔁 Rescoring predictions from pipeline {ml_predictor.FEATURE_PIPELINE_VERSION} features"
+              + ("" if args.apply else " (dry run)"))
+        rescorer.run(ml_predictor.FEATURE_PIPELINE_VERSION, apply=args.apply, body_part=args.body_part)
+
+    for (body_part, old, new), count in rescorer.transitions.most_common():
+        print(f"  {body_part}: {old} → {new}  {count}")
+    verb = 'Updated' if args.apply else 'Would update'
+    print(f"✅ {verb} {rescorer.changed} of {rescorer.scanned} predictions "
+          f"({rescorer.skipped} without stored features)")
+    return 0
+
+
+def build_catalogs(args):
+    """Compile per-language catalogs of the static medical content and UI text"""
+    from utils.catalogs import build_catalogs as build, medical_strings, ui_strings
+    from utils.medical_info import MedicalInfoService
+    from utils.translator import TranslationService
+
+    translator = TranslationService(catalog_dir=args.output)
+    languages = args.languages.split(',') if args.languages else list(translator.get_supported_languages())
+    unknown = [language for language in languages if language not in translator.get_supported_languages()]
+    if unknown:
+        print(f"❌ Unsupported languages: {', '.join(unknown)}")
+        return 1
+
+    templates = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+    strings = medical_strings(MedicalInfoService()) + list(ui_strings(templates).values())
+    print(f"🌐 Building catalogs in {args.output}")
+    manifest = build(translator, args.output, strings, languages, timeout=args.timeout)
+
+    incomplete = [language for language, built in manifest['languages'].items() if built['untranslated']]
+    print(f"✅ Built {len(manifest['languages'])} catalogs of {manifest['strings']} strings "
+          f"(version {manifest['source_version']})")
+    if incomplete:
+        print(f"⚠️  Some strings are untranslated in: {', '.join(incomplete)}; rerun to retry them")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='mediscan', description='MediScan AI command line tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Bulk import historical X-rays')
+    import_parser.add_argument('source', help='Directory (<patient>/<...>/<image>) or CSV manifest')
+    import_parser.add_argument('--user-email', required=True, help='Clinician that owns the patients')
+    import_parser.add_argument('--body-part', default='chest', help='Body part when the source does not say')
+    import_parser.add_argument('--workers', type=int, default=None, help='Prediction processes (default: CPU count)')
+    import_parser.add_argument('--chunk-size', type=int, default=500, help='Rows per bulk insert')
+    import_parser.add_argument('--checkpoint', help='Checkpoint file (default: <source>.import-checkpoint)')
+    import_parser.add_argument('--resume', action='store_true', help='Skip images recorded in the checkpoint')
+    import_parser.set_defaults(func=import_images)
+
+    migrate_parser = subparsers.add_parser('migrate', help='Apply pending schema migrations')
+    migrate_parser.set_defaults(func=migrate)
+
+    explain_parser = subparsers.add_parser('explain', help='Check hot queries do not fall back to full scans')
+    explain_parser.add_argument('--verbose', action='store_true', help='Print every query plan')
+    explain_parser.set_defaults(func=explain)
+
+    export_parser = subparsers.add_parser('export', help='Export predictions as CSV')
+    export_parser.add_argument('output', help='CSV file to write')
+    export_parser.add_argument('--user-email', help='Only this clinician\'s patients')
+    export_parser.add_argument('--since', help='Only predictions on or after this ISO date')
+    export_parser.set_defaults(func=export_predictions)
+
+    backfill_parser = subparsers.add_parser('backfill-medical-content',
+                                            help='Move legacy medical info JSON into medical_content')
+    backfill_parser.add_argument('--batch-size', type=int, default=500, help='Rows per transaction')
+    backfill_parser.add_argument('--pause', type=float, default=0.0, help='Seconds to sleep between batches')
+    backfill_parser.set_defaults(func=backfill_medical_content)
+
+    stats_parser = subparsers.add_parser('rebuild-stats', help='Regenerate prediction statistics from scratch')
+    stats_parser.set_defaults(func=rebuild_stats)
+
+    parquet_parser = subparsers.add_parser('export-parquet', help='Export predictions and features to Parquet')
+    parquet_parser.add_argument('directory', help='Output directory (date=/body_part= partitions)')
+    parquet_parser.add_argument('--full', action='store_true', help='Ignore the watermark and export everything')
+    parquet_parser.add_argument('--chunk-size', type=int, default=50000, help='Rows buffered before writing')
+    parquet_parser.set_defaults(func=export_parquet)
+
+    rescore_parser = subparsers.add_parser('rescore', help='Re-run prediction rules from stored image features')
+    rescore_parser.add_argument('--apply', action='store_true', help='Update predictions (default: report only)')
+    rescore_parser.add_argument('--body-part', help='Only predictions for this body part')
+    rescore_parser.add_argument('--batch-size', type=int, default=1000, help='Rows per transaction')
+    rescore_parser.set_defaults(func=rescore)
+
+    catalogs_parser = subparsers.add_parser('build-catalogs', help='Precompile translation catalogs')
+    catalogs_parser.add_argument('--languages', help='Comma-separated language codes (default: all supported)')
+    catalogs_parser.add_argument('--output', default=os.getenv('TRANSLATION_CATALOG_DIR', 'catalogs'),
+                                 help='Catalog directory (default: TRANSLATION_CATALOG_DIR or catalogs)')
+    catalogs_parser.add_argument('--timeout', type=float, default=300, help='Seconds allowed per language')
+    catalogs_parser.set_defaults(func=build_catalogs)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import csv
+import io
+from datetime import datetime
+
+# Rows buffered in memory per COPY round trip
+COPY_CHUNK_ROWS = 5000
+# NULL marker in the CSV stream, so empty strings stay empty strings
+COPY_NULL = '\\N'
+
+
+def supports_copy(connection):
+    """COPY is used with psycopg2; other drivers and databases fall back to executemany"""
+    return connection.dialect.name == 'postgresql' and connection.dialect.driver == 'psycopg2'
+
+
+def _csv_value(value):
+    if value is None:
+        return COPY_NULL
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    return value
+
+
+def copy_rows(connection, table, rows):
+    """Insert a list of row dicts into ``table`` and return the row count.
+
+    On Postgres this streams the rows through ``COPY ... FROM STDIN`` on the
+    connection's own transaction; elsewhere it is a single executemany insert.
+    """
+    if not rows:
+        return 0
+    if not supports_copy(connection):
+        connection.execute(table.insert(), rows)
+        return len(rows)
+
+    columns = list(rows[0].keys())
+    statement = (f"COPY {table.name} ({', '.join(columns)}) FROM STDIN "
+                 f"WITH (FORMAT csv, NULL '{COPY_NULL}')")
+    cursor = connection.connection.cursor()
+    try:
+        for start in range(0, len(rows), COPY_CHUNK_ROWS):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in rows[start:start + COPY_CHUNK_ROWS]:
+                writer.writerow([_csv_value(row.get(column)) for column in columns])
+            buffer.seek(0)
+            cursor.copy_expert(statement, buffer)
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+def stream_rows(connection, statement, batch_size=1000):
+    """Yield result rows through a server-side cursor in batches of ``batch_size``"""
+    result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+    try:
+        for row in result:
+            yield row
+    finally:
+        result.close()
+
+
+def copy_out(connection, statement, fileobj, batch_size=1000):
+    """Write the rows of a select as CSV with a header, returning the row count.
+
+    Postgres runs ``COPY (select) TO STDOUT``; other databases stream the rows
+    through a server-side cursor so large exports never load into memory.
+    """
+    columns = [column.name for column in statement.selected_columns]
+    if supports_copy(connection):
+        compiled = statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+        cursor = connection.connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY ({compiled}) TO STDOUT WITH (FORMAT csv, HEADER)", fileobj)
+            return cursor.rowcount
+        finally:
+            cursor.close()
+
+    writer = csv.writer(fileobj)
+    writer.writerow(columns)
+    count = 0
+    for row in stream_rows(connection, statement, batch_size):
+        writer.writerow(['' if value is None else _csv_value(value) for value in row])
+        count += 1
+    return count
+
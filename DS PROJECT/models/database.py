@@ -2,8 +2,9 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
+from models.routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -31,6 +32,10 @@ class User(UserMixin, db.Model):
 
 class Patient(db.Model):
     __tablename__ = 'patients'
+    __table_args__ = (
+        # Keyset pagination of a user's patients
+        db.Index('ix_patients_user_id_created_at', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -49,11 +54,31 @@ class Patient(db.Model):
     # Relationship with predictions
     predictions = db.relationship('Prediction', backref='patient', lazy=True, cascade='all, delete-orphan')
     
+    def to_dict(self):
+        """Serialize for the JSON APIs"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'age': self.age,
+            'gender': self.gender,
+            'contact': self.contact,
+            'blood_group': self.blood_group,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
     def __repr__(self):
         return f'<Patient {self.name}>'
 
 class Prediction(db.Model):
     __tablename__ = 'predictions'
+    __table_args__ = (
+        # Keyset pagination of a patient's prediction history
+        db.Index('ix_predictions_patient_id_created_at', 'patient_id', 'created_at', 'id'),
+        # Time-range scans across all predictions
+        db.Index('ix_predictions_created_at', 'created_at'),
+        # Per body part analytics over a time range
+        db.Index('ix_predictions_body_part_created_at', 'body_part', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     patient_id = db.Column(db.Integer, db.ForeignKey('patients.id'), nullable=False)
@@ -61,13 +86,93 @@ class Prediction(db.Model):
     body_part = db.Column(db.String(50), nullable=False)
     prediction_result = db.Column(db.String(100), nullable=False)
     confidence_score = db.Column(db.Float, nullable=False)
+    # Legacy per-row copies of the medical information, cleared by the backfill
     additional_info = db.Column(db.Text, nullable=True)
     medical_tips = db.Column(db.Text, nullable=True)
+    medical_content_id = db.Column(db.Integer, db.ForeignKey('medical_content.id'), nullable=True, index=True)
+    # SHA-256 of the uploaded file, the key into image_features
+    image_hash = db.Column(db.String(64), nullable=True, index=True)
+    # 64-bit dHash as hex, for finding re-uploads and near-duplicate studies
+    perceptual_hash = db.Column(db.String(16), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    medical_content = db.relationship('MedicalContent', lazy=True)
+    
+    def to_dict(self):
+        """Serialize for the JSON APIs"""
+        return {
+            'id': self.id,
+            'patient_id': self.patient_id,
+            'image_path': self.image_path,
+            'body_part': self.body_part,
+            'prediction_result': self.prediction_result,
+            'confidence_score': self.confidence_score,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+    
     def __repr__(self):
         return f'<Prediction {self.prediction_result} - {self.confidence_score:.2f}>'
 
+class MedicalContent(db.Model):
+    """Medical information shown with a prediction, stored once per distinct content"""
+    __tablename__ = 'medical_content'
+    __table_args__ = (
+        db.UniqueConstraint('condition', 'content_version', 'language', name='uq_medical_content_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    condition = db.Column(db.String(100), nullable=False)
+    content_version = db.Column(db.String(40), nullable=False)
+    language = db.Column(db.String(10), nullable=False, default='en')
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<MedicalContent {self.condition} {self.content_version} {self.language}>'
+
+class PredictionStat(db.Model):
+    """Prediction count per clinician, day, body part and result, kept in step with every insert"""
+    __tablename__ = 'prediction_stats'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'day', 'body_part', 'prediction_result', name='uq_prediction_stats_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    body_part = db.Column(db.String(50), nullable=False)
+    prediction_result = db.Column(db.String(100), nullable=False)
+    prediction_count = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<PredictionStat {self.day} {self.body_part} {self.prediction_result}: {self.prediction_count}>'
+
+class ImageFeatures(db.Model):
+    """Image features computed by one version of the feature pipeline, stored once per image"""
+    __tablename__ = 'image_features'
+    __table_args__ = (
+        db.UniqueConstraint('image_hash', 'pipeline_version', name='uq_image_features_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    image_hash = db.Column(db.String(64), nullable=False)
+    pipeline_version = db.Column(db.String(20), nullable=False)
+    brightness = db.Column(db.Float, nullable=False)
+    contrast = db.Column(db.Float, nullable=False)
+    sharpness = db.Column(db.Float, nullable=False)
+    noise_level = db.Column(db.Float, nullable=False)
+    dark_regions = db.Column(db.Float, nullable=False)
+    white_patches = db.Column(db.Float, nullable=False)
+    bone_density = db.Column(db.Float, nullable=False)
+    abnormal_patterns = db.Column(db.Float, nullable=False)
+    image_quality = db.Column(db.String(10), nullable=True)
+    filename_hints = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ImageFeatures {self.image_hash[:12]} v{self.pipeline_version}>'
+
 def init_db(app):
     """Initialize database with app context"""
     db.init_app(app)
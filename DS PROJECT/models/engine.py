@@ -0,0 +1,112 @@
+import os
+
+from sqlalchemy import event
+
+# SQLite settings used by the production profile
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',          # readers no longer wait for writers
+    'synchronous': 'NORMAL',        # fsync on checkpoint only; safe with WAL
+    'busy_timeout': 5000,           # ms to wait for a lock instead of failing
+    'cache_size': -64000,           # negative means KiB, so ~64MB page cache
+    'mmap_size': 268435456,         # 256MB of the file memory-mapped for reads
+    'temp_store': 'MEMORY',
+}
+
+
+# Postgres settings used when DATABASE_URL points at a Postgres server
+POSTGRES_STATEMENT_TIMEOUT_MS = 30000
+POSTGRES_POOL_RECYCLE = 1800
+
+
+def database_url(url):
+    """Normalize the legacy postgres:// scheme some hosts still hand out"""
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def pool_size_from_config(config):
+    """Connections each process needs: one per request thread plus one for the writer/batch work"""
+    threads = int(config.get('GUNICORN_THREADS') or 1)
+    pool_size = int(config.get('DB_POOL_SIZE') or threads + 1)
+    overflow = config.get('DB_MAX_OVERFLOW')
+    max_overflow = int(overflow) if overflow is not None else max(2, pool_size // 2)
+    return pool_size, max_overflow
+
+
+def engine_options_from_config(url, config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the database the URL points at"""
+    if not url.startswith('postgresql'):
+        return {}
+
+    pool_size, max_overflow = pool_size_from_config(config)
+    workers = int(config.get('WEB_CONCURRENCY') or 1)
+    max_connections = int(config.get('DB_MAX_CONNECTIONS') or 100)
+    if workers * (pool_size + max_overflow) > max_connections:
+        print(f"Warning: {workers} workers x {pool_size + max_overflow} connections "
+              f"exceeds the server's {max_connections} connections")
+
+    timeout = int(config.get('DB_STATEMENT_TIMEOUT_MS') or POSTGRES_STATEMENT_TIMEOUT_MS)
+    return {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_pre_ping': True,                  # drop connections the server or a proxy closed
+        'pool_recycle': POSTGRES_POOL_RECYCLE,
+        'connect_args': {
+            'options': f'-c statement_timeout={timeout}',
+            'application_name': 'mediscan',
+        },
+    }
+
+
+def sqlite_pragmas_from_config(config):
+    """Pragmas for the configured SQLite profile (empty for the default profile)"""
+    if config.get('SQLITE_PROFILE', 'production') != 'production':
+        return {}
+
+    pragmas = dict(SQLITE_PRODUCTION_PRAGMAS)
+    for name in pragmas:
+        override = config.get(f'SQLITE_{name.upper()}')
+        if override is not None:
+            pragmas[name] = override
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """Run the pragmas on every new DBAPI connection of a SQLite engine"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def configure_engine(engine, config):
+    """Apply the database profile for the engine's dialect"""
+    if engine.dialect.name == 'sqlite':
+        apply_sqlite_pragmas(engine, sqlite_pragmas_from_config(config))
+
+
+def load_profile_config(config):
+    """Read the database profile settings from the environment"""
+    config['SQLITE_PROFILE'] = os.getenv('SQLITE_PROFILE', 'production')
+    config['SQLITE_WRITE_QUEUE'] = os.getenv('SQLITE_WRITE_QUEUE', 'true').lower() == 'true'
+    for name in SQLITE_PRODUCTION_PRAGMAS:
+        value = os.getenv(f'SQLITE_{name.upper()}')
+        if value is not None:
+            config[f'SQLITE_{name.upper()}'] = value
+
+    for name in ('WEB_CONCURRENCY', 'GUNICORN_THREADS', 'DB_POOL_SIZE', 'DB_MAX_OVERFLOW',
+                 'DB_MAX_CONNECTIONS', 'DB_STATEMENT_TIMEOUT_MS'):
+        if os.getenv(name) is not None:
+            config[name] = os.getenv(name)
+
+    config['SQLALCHEMY_DATABASE_URI'] = database_url(config['SQLALCHEMY_DATABASE_URI'])
+    if os.getenv('DATABASE_REPLICA_URL'):
+        config['SQLALCHEMY_BINDS'] = {'replica': database_url(os.getenv('DATABASE_REPLICA_URL'))}
+    config['REPLICA_STICKY_SECONDS'] = float(os.getenv('REPLICA_STICKY_SECONDS', 10))
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_config(config['SQLALCHEMY_DATABASE_URI'], config)
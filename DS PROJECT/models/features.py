@@ -0,0 +1,69 @@
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.database import ImageFeatures
+
+# Numeric features produced by EnhancedMLPredictor.analyze_image_features
+FEATURE_FIELDS = ('brightness', 'contrast', 'sharpness', 'noise_level',
+                  'dark_regions', 'white_patches', 'bone_density', 'abnormal_patterns')
+
+
+def image_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def features_row(image_hash_value, pipeline_version, features):
+    """Row for image_features from a features dict"""
+    row = {name: float(features[name]) for name in FEATURE_FIELDS}
+    row.update({
+        'image_hash': image_hash_value,
+        'pipeline_version': pipeline_version,
+        'image_quality': features.get('image_quality'),
+        'filename_hints': ','.join(features.get('filename_hints') or [])[:255] or None,
+        'created_at': datetime.utcnow(),
+    })
+    return row
+
+
+def store_features(connection, rows):
+    """Insert feature rows, skipping images already stored for that pipeline version"""
+    table = ImageFeatures.__table__
+    rows = list({(row['image_hash'], row['pipeline_version']): row for row in rows}.values())
+    if not rows:
+        return
+
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        connection.execute(dialect.insert(table).on_conflict_do_nothing(
+            index_elements=['image_hash', 'pipeline_version']), rows)
+        return
+
+    for row in rows:
+        exists = connection.execute(select(table.c.id).where(
+            table.c.image_hash == row['image_hash'], table.c.pipeline_version == row['pipeline_version']
+        )).first()
+        if exists is None:
+            connection.execute(insert(table), row)
+
+
+def load_features(connection, image_hash_value, pipeline_version):
+    """Stored features dict for an image, or None"""
+    table = ImageFeatures.__table__
+    row = connection.execute(select(table).where(
+        table.c.image_hash == image_hash_value, table.c.pipeline_version == pipeline_version
+    )).mappings().first()
+    if row is None:
+        return None
+
+    features = {name: row[name] for name in FEATURE_FIELDS}
+    features['image_quality'] = row['image_quality']
+    features['filename_hints'] = row['filename_hints'].split(',') if row['filename_hints'] else []
+    return features
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import sys
+import time
+
+from sqlalchemy import bindparam, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from models.database import MedicalContent, Prediction
+
+# (condition, content_version, language) -> id, and id -> parsed payload.
+# Content rows are never updated, so both caches are safe to keep per process.
+_content_ids = {}
+_payloads = {}
+
+
+def content_version(base_version, payload_json):
+    """Version string for a payload: the service's content version plus a digest.
+
+    The static tips only change with the content version, but online search
+    and fallback content can differ per call, so the digest keeps distinct
+    payloads from ever sharing a row.
+    """
+    digest = hashlib.sha1(payload_json.encode('utf-8')).hexdigest()[:12]
+    return f"{base_version}.{digest}"
+
+
+def pinnable(medical_info_data):
+    """Whether a payload may be stored with a prediction for good.
+
+    A fallback only stands in until the online search answers, so
+    predictions that got one keep no content row and show the current
+    information when viewed.
+    """
+    return medical_info_data.get('source') != 'fallback'
+
+
+def content_key(medical_info_data, base_version, language='en'):
+    """(condition, content_version, language) key and JSON for a payload"""
+    payload_json = json.dumps(medical_info_data, sort_keys=True)
+    condition = medical_info_data.get('condition', '')[:100]
+    return (condition, content_version(base_version, payload_json), language), payload_json
+
+
+def cached_content_id(key):
+    """Id already known for a content key in this process, or None"""
+    return _content_ids.get(key)
+
+
+def insert_content(connection, key, payload_json):
+    """Return the id of the content row for a key, inserting it in the caller's transaction.
+
+    Nothing is cached here: the caller may still roll back, so it calls
+    remember_content once the transaction has committed.
+    """
+    table = MedicalContent.__table__
+    lookup = select(table.c.id).where(table.c.condition == key[0], table.c.content_version == key[1],
+                                      table.c.language == key[2])
+    content_id = connection.execute(lookup).scalar()
+    if content_id is not None:
+        return content_id
+
+    row = {'condition': key[0], 'content_version': key[1], 'language': key[2], 'payload': payload_json}
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+    if dialect is not None:
+        # Inserted concurrently by another request or worker: keep theirs
+        connection.execute(dialect.insert(table).on_conflict_do_nothing(
+            index_elements=['condition', 'content_version', 'language']), row)
+    else:
+        connection.execute(insert(table), row)
+    return connection.execute(lookup).scalar()
+
+
+def remember_content(key, content_id, payload_json):
+    """Cache a committed content row's id and a parsed copy of its payload"""
+    _content_ids[key] = content_id
+    if content_id not in _payloads:
+        _payloads[content_id] = json.loads(payload_json)
+
+
+def medical_content_id(engine, medical_info_data, base_version, language='en'):
+    """Return the id of the content row for this payload, inserting it if new"""
+    key, payload_json = content_key(medical_info_data, base_version, language)
+    content_id = cached_content_id(key)
+    if content_id is None:
+        try:
+            with engine.begin() as connection:
+                content_id = insert_content(connection, key, payload_json)
+        except IntegrityError:
+            # Inserted concurrently by another request or worker
+            with engine.begin() as connection:
+                content_id = insert_content(connection, key, payload_json)
+        remember_content(key, content_id, payload_json)
+    return content_id
+
+
+def clear_content_cache():
+    """Forget cached ids and payloads (after the tables are recreated)"""
+    _content_ids.clear()
+    _payloads.clear()
+
+
+def content_payload(content):
+    """Parsed payload of a MedicalContent row, parsed once per process"""
+    if content.id not in _payloads:
+        _payloads[content.id] = json.loads(content.payload)
+    return _payloads[content.id]
+
+
+def prediction_medical_info(prediction):
+    """Medical information for a prediction, or None if it has none stored"""
+    if prediction.medical_content_id:
+        if prediction.medical_content_id in _payloads:
+            return _payloads[prediction.medical_content_id]
+        return content_payload(prediction.medical_content)
+    if prediction.additional_info:
+        # Rows written before the backfill
+        try:
+            return json.loads(prediction.additional_info)
+        except ValueError:
+            return None
+    return None
+
+
+def legacy_payload(prediction_result, additional_info, medical_tips):
+    """Rebuild the medical info dict from a row's legacy JSON columns, or None if they hold none"""
+    payload = None
+    try:
+        payload = json.loads(additional_info) if additional_info else None
+    except ValueError:
+        pass
+    tips = None
+    try:
+        tips = json.loads(medical_tips) if medical_tips else None
+    except ValueError:
+        pass
+    if not isinstance(payload, dict):
+        if tips is None:
+            return None
+        payload = {}
+
+    payload.setdefault('condition', prediction_result)
+    if 'medical_tips' not in payload and tips is not None:
+        payload['medical_tips'] = tips
+    return payload
+
+
+def backfill_medical_content(engine, medical_info_service, batch_size=500, pause=0.0, out=sys.stdout):
+    """Move legacy JSON columns into medical_content, one short transaction per batch.
+
+    Rows are walked in id order and each batch commits on its own, so the
+    backfill can run while the app is serving traffic and can be stopped and
+    restarted at any point.  Only what the rows already store is moved; rows
+    with no usable legacy JSON, or only fallback content, just have the
+    columns cleared and show the current information when viewed.  Returns the number of rows migrated.
+    """
+    table = Prediction.__table__
+    migrate = update(table).where(table.c.id == bindparam('row_id')).values(
+        medical_content_id=bindparam('content_id'), additional_info=None, medical_tips=None
+    )
+    last_id = 0
+    migrated = 0
+    while True:
+        with engine.begin() as connection:
+            rows = connection.execute(
+                select(table.c.id, table.c.prediction_result, table.c.additional_info, table.c.medical_tips)
+                .where(table.c.medical_content_id.is_(None), table.c.id > last_id,
+                       or_(table.c.additional_info.isnot(None), table.c.medical_tips.isnot(None)))
+                .order_by(table.c.id).limit(batch_size)
+            ).all()
+        if not rows:
+            break
+
+        params = []
+        content = []
+        with engine.begin() as connection:
+            for row_id, prediction_result, additional_info, medical_tips in rows:
+                payload = legacy_payload(prediction_result, additional_info, medical_tips)
+                content_id = None
+                if payload is not None and pinnable(payload):
+                    key, payload_json = content_key(payload, medical_info_service.CONTENT_VERSION)
+                    content_id = cached_content_id(key) or insert_content(connection, key, payload_json)
+                    content.append((key, content_id, payload_json))
+                params.append({'row_id': row_id, 'content_id': content_id})
+            connection.execute(migrate, params)
+        for key, content_id, payload_json in content:
+            remember_content(key, content_id, payload_json)
+        migrated += len(params)
+        last_id = rows[-1][0]
+        out.write(f"\r  {migrated} predictions migrated")
+        out.flush()
+        if pause:
+            time.sleep(pause)
+
+    out.write('\n')
+    return migrated
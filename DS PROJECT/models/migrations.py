@@ -0,0 +1,125 @@
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+
+from models.database import db, MedicalContent, PredictionStat, ImageFeatures
+
+
+def create_model_indexes(connection):
+    """Create every index declared on the models that the database lacks.
+
+    ``db.create_all()`` only creates indexes together with a new table, so
+    databases created before an index was declared need this step.
+    """
+    inspector = inspect(connection)
+    existing_tables = set(inspector.get_table_names())
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        # Columns added by a later migration get their indexes when that migration runs
+        columns = {column['name'] for column in inspector.get_columns(table.name)}
+        for index in table.indexes:
+            if all(column.name in columns for column in index.columns):
+                index.create(bind=connection, checkfirst=True)
+
+
+def add_medical_content(connection):
+    """Create the medical_content table and the predictions.medical_content_id reference"""
+    MedicalContent.__table__.create(bind=connection, checkfirst=True)
+    columns = {column['name'] for column in inspect(connection).get_columns('predictions')}
+    if 'medical_content_id' not in columns:
+        connection.execute(text(
+            "ALTER TABLE predictions ADD COLUMN medical_content_id INTEGER REFERENCES medical_content (id)"
+        ))
+    create_model_indexes(connection)
+
+
+def add_prediction_stats(connection):
+    """Create prediction_stats and fill it from the existing predictions"""
+    from models.stats import rebuild_prediction_stats
+
+    PredictionStat.__table__.create(bind=connection, checkfirst=True)
+    rebuild_prediction_stats(connection)
+
+
+def add_image_features(connection):
+    """Create image_features and the predictions.image_hash reference"""
+    ImageFeatures.__table__.create(bind=connection, checkfirst=True)
+    columns = {column['name'] for column in inspect(connection).get_columns('predictions')}
+    if 'image_hash' not in columns:
+        connection.execute(text("ALTER TABLE predictions ADD COLUMN image_hash VARCHAR(64)"))
+    create_model_indexes(connection)
+
+
+def add_perceptual_hash(connection):
+    """Add predictions.perceptual_hash"""
+    columns = {column['name'] for column in inspect(connection).get_columns('predictions')}
+    if 'perceptual_hash' not in columns:
+        connection.execute(text("ALTER TABLE predictions ADD COLUMN perceptual_hash VARCHAR(16)"))
+
+
+# Ordered (name, function) pairs; each runs once per database, in order
+MIGRATIONS = [
+    ('0001_hot_query_indexes', create_model_indexes),
+    ('0002_prediction_medical_content', add_medical_content),
+    ('0003_prediction_stats', add_prediction_stats),
+    ('0004_image_features', add_image_features),
+    ('0005_perceptual_hash', add_perceptual_hash),
+]
+
+
+def ensure_migrations_table(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "name VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+
+# Any constant works; it only has to be the same in every worker
+MIGRATION_LOCK_KEY = 0x6D656469
+
+
+def lock_migrations(connection):
+    """Make workers starting together apply migrations one at a time.
+
+    On PostgreSQL a transaction-scoped advisory lock is held until the
+    migration's transaction ends.  SQLite already serializes writers, and a
+    worker that loses the race fails on the duplicate DDL instead.
+    """
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {'key': MIGRATION_LOCK_KEY})
+
+
+def applied_migrations(connection):
+    return {row[0] for row in connection.execute(text("SELECT name FROM schema_migrations"))}
+
+
+def run_migrations(engine):
+    """Apply pending migrations, returning the names that were applied"""
+    with engine.begin() as connection:
+        ensure_migrations_table(connection)
+        done = applied_migrations(connection)
+
+    applied = []
+    for name, migration in MIGRATIONS:
+        if name in done:
+            continue
+        try:
+            with engine.begin() as connection:
+                lock_migrations(connection)
+                if name in applied_migrations(connection):
+                    # Another worker applied it while we waited for the lock
+                    continue
+                migration(connection)
+                connection.execute(
+                    text("INSERT INTO schema_migrations (name, applied_at) VALUES (:name, :applied_at)"),
+                    {'name': name, 'applied_at': datetime.utcnow()}
+                )
+            applied.append(name)
+        except DBAPIError:
+            # Another worker applied it first (duplicate row, or "already exists" from its DDL)
+            with engine.begin() as connection:
+                if name not in applied_migrations(connection):
+                    raise
+    return applied
@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import func, case, tuple_
+from sqlalchemy.orm import contains_eager
+
+from models.database import db, Patient, Prediction
+
+
+def recent_predictions_for_user(user_id, limit=5, per_patient=3):
+    """Most recent predictions across a user's patients in a single query.
+
+    A window function ranks each patient's predictions so no patient
+    contributes more than ``per_patient`` rows, and the patient is loaded in
+    the same statement so templates can use ``prediction.patient`` freely.
+    """
+    rank = func.row_number().over(
+        partition_by=Prediction.patient_id,
+        order_by=(Prediction.created_at.desc(), Prediction.id.desc())
+    ).label('patient_rank')
+
+    ranked = db.session.query(Prediction.id.label('id'), rank) \
+        .join(Patient, Patient.id == Prediction.patient_id) \
+        .filter(Patient.user_id == user_id) \
+        .subquery()
+
+    return Prediction.query \
+        .join(ranked, ranked.c.id == Prediction.id) \
+        .join(Prediction.patient) \
+        .options(contains_eager(Prediction.patient)) \
+        .filter(ranked.c.patient_rank <= per_patient) \
+        .order_by(Prediction.created_at.desc(), Prediction.id.desc()) \
+        .limit(limit) \
+        .all()
+
+
+def prediction_summary_by_patient(user_id, patient_ids=None):
+    """Prediction count and last scan time per patient from one aggregate query"""
+    query = db.session.query(
+        Prediction.patient_id,
+        func.count(Prediction.id),
+        func.max(Prediction.created_at)
+    ).join(Patient, Patient.id == Prediction.patient_id) \
+        .filter(Patient.user_id == user_id)
+
+    if patient_ids is not None:
+        query = query.filter(Prediction.patient_id.in_(patient_ids))
+
+    rows = query.group_by(Prediction.patient_id).all()
+
+    return {
+        patient_id: {'count': count, 'last_scan': last_scan}
+        for patient_id, count, last_scan in rows
+    }
+
+
+def prediction_stats_for_patient(patient_id):
+    """Total, normal count and average confidence of a patient's predictions"""
+    total, normal, avg_confidence = db.session.query(
+        func.count(Prediction.id),
+        func.sum(case((Prediction.prediction_result == 'Normal', 1), else_=0)),
+        func.avg(Prediction.confidence_score)
+    ).filter(Prediction.patient_id == patient_id).one()
+
+    normal = normal or 0
+    return {
+        'total': total,
+        'normal': normal,
+        'abnormal': total - normal,
+        'avg_confidence': avg_confidence or 0
+    }
+
+
+def encode_cursor(row):
+    """Opaque cursor pointing just after ``row`` in (created_at, id) order"""
+    payload = json.dumps([row.created_at.isoformat(), row.id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor produced by encode_cursor, raising ValueError if it is invalid"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_page(query, model, cursor=None, limit=20):
+    """Newest first page of ``query`` using keyset pagination over (created_at, id).
+
+    Returns ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    Unlike OFFSET paging the cost of a page does not depend on how deep it is,
+    as long as an index ends in (created_at, id).
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) < tuple_(created_at, row_id))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def patients_page(user_id, cursor=None, limit=20):
+    """One page of a user's patients, newest first"""
+    return keyset_page(Patient.query.filter(Patient.user_id == user_id), Patient, cursor, limit)
+
+
+def predictions_page(patient_id, cursor=None, limit=20):
+    """One page of a patient's prediction history, newest first"""
+    return keyset_page(Prediction.query.filter(Prediction.patient_id == patient_id), Prediction, cursor, limit)
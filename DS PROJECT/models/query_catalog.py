@@ -0,0 +1,118 @@
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import event, func
+
+from models.database import db, User, Patient, Prediction
+from models.queries import (recent_predictions_for_user, prediction_summary_by_patient,
+                            prediction_stats_for_patient, patients_page, predictions_page, encode_cursor)
+from models.stats import user_prediction_totals, analytics_summary
+
+SAMPLE_USER_ID = 1
+SAMPLE_PATIENT_ID = 1
+SAMPLE_SINCE = datetime(2024, 1, 1)
+SAMPLE_CURSOR = encode_cursor(SimpleNamespace(created_at=datetime(2025, 1, 1), id=100))
+
+
+def _condition_counts_by_body_part():
+    return db.session.query(Prediction.prediction_result, func.count(Prediction.id)) \
+        .filter(Prediction.body_part == 'chest', Prediction.created_at >= SAMPLE_SINCE) \
+        .group_by(Prediction.prediction_result).all()
+
+
+def _predictions_since():
+    return Prediction.query.filter(Prediction.created_at >= SAMPLE_SINCE) \
+        .order_by(Prediction.created_at.desc()).limit(100).all()
+
+
+# Hot query shapes, each run through the same code path the views use
+HOT_QUERIES = [
+    ('login_user_by_email', lambda: User.query.filter_by(email='demo@mediscan.com').first()),
+    ('dashboard_patients_page', lambda: patients_page(SAMPLE_USER_ID, None, 20)),
+    ('dashboard_patients_next_page', lambda: patients_page(SAMPLE_USER_ID, SAMPLE_CURSOR, 20)),
+    ('dashboard_patient_count', lambda: Patient.query.filter_by(user_id=SAMPLE_USER_ID).count()),
+    ('dashboard_recent_predictions', lambda: recent_predictions_for_user(SAMPLE_USER_ID)),
+    ('dashboard_prediction_summary', lambda: prediction_summary_by_patient(SAMPLE_USER_ID, [1, 2, 3])),
+    ('patient_history_page', lambda: predictions_page(SAMPLE_PATIENT_ID, None, 20)),
+    ('patient_history_next_page', lambda: predictions_page(SAMPLE_PATIENT_ID, SAMPLE_CURSOR, 20)),
+    ('patient_prediction_stats', lambda: prediction_stats_for_patient(SAMPLE_PATIENT_ID)),
+    ('dashboard_prediction_totals', lambda: user_prediction_totals(SAMPLE_USER_ID)),
+    ('analytics_summary', lambda: analytics_summary(SAMPLE_USER_ID)),
+    ('analytics_condition_counts', _condition_counts_by_body_part),
+    ('analytics_predictions_since', _predictions_since),
+]
+
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)(.*)')
+POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+
+
+@contextmanager
+def capture_statements(engine):
+    """Record (statement, parameters) for everything executed on the engine"""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def full_scans(dialect, plan_lines, tables):
+    """Base tables read by a full scan according to an EXPLAIN plan"""
+    scanned = []
+    for line in plan_lines:
+        if dialect == 'sqlite':
+            match = SQLITE_SCAN.search(line)
+            if match and match.group(1) in tables and 'INDEX' not in match.group(2):
+                scanned.append(match.group(1))
+        else:
+            match = POSTGRES_SEQ_SCAN.search(line)
+            if match and match.group(1) in tables:
+                scanned.append(match.group(1))
+    return scanned
+
+
+def explain(connection, dialect, statement, parameters):
+    """Plan lines for one statement"""
+    if dialect == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+    return [row[0] for row in rows]
+
+
+def check_query_plans(engine):
+    """EXPLAIN every catalog query and report the ones that fall back to a full scan.
+
+    Returns a list of dicts with ``name``, ``statement``, ``plan`` and
+    ``full_scans``; the catalog is healthy when every ``full_scans`` is empty.
+    Must be called inside an application context.
+    """
+    dialect = engine.dialect.name
+    tables = set(db.metadata.tables)
+    results = []
+
+    for name, run_query in HOT_QUERIES:
+        with capture_statements(engine) as captured:
+            run_query()
+        db.session.rollback()
+
+        with engine.connect() as connection:
+            if dialect == 'postgresql':
+                # Tiny tables make sequential scans cheaper; only flag them when no index applies
+                connection.exec_driver_sql("SET enable_seqscan = off")
+            for statement, parameters in captured:
+                plan = explain(connection, dialect, statement, parameters)
+                results.append({
+                    'name': name,
+                    'statement': statement,
+                    'plan': plan,
+                    'full_scans': full_scans(dialect, plan, tables)
+                })
+    return results
@@ -0,0 +1,71 @@
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, request, session as flask_session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_BIND = 'replica'
+# Flask session key holding the time of the user's last committed write
+LAST_WRITE_KEY = '_db_last_write'
+
+
+def read_only(view):
+    """Mark a view as safe to serve from the read replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def record_write():
+    """Pin the current user to the primary for REPLICA_STICKY_SECONDS"""
+    if has_request_context():
+        g.db_wrote = True
+        flask_session[LAST_WRITE_KEY] = time.time()
+
+
+def recently_wrote():
+    """Whether the current user committed recently enough that the replica may lag behind"""
+    if g.get('db_wrote'):
+        return True
+    last_write = flask_session.get(LAST_WRITE_KEY)
+    return bool(last_write) and time.time() - last_write < current_app.config.get('REPLICA_STICKY_SECONDS', 10)
+
+
+class RoutingSession(Session):
+    """Session that sends reads in ``read_only`` views to the replica bind.
+
+    Everything else uses the primary: writes, flushes, any request that is not
+    a GET, and every request from a user who committed within the sticky
+    window, so a clinician always sees the patient or scan they just saved.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.use_replica():
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def use_replica(self):
+        if self.wrote or self._flushing or not has_request_context():
+            return False
+        if REPLICA_BIND not in self._db.engines:
+            return False
+        return g.get('use_replica', False) and request.method in ('GET', 'HEAD') and not recently_wrote()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session.wrote = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if session.wrote:
+        record_write()
+        session.wrote = False
@@ -0,0 +1,175 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.database import db, Patient, Prediction, PredictionStat
+from models.routing import RoutingSession
+
+# Prediction columns that decide which stats row a prediction is counted in
+TRACKED_COLUMNS = ('patient_id', 'created_at', 'body_part', 'prediction_result', 'confidence_score')
+
+
+def _day(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).date()
+    return datetime.utcnow().date()
+
+
+def increments_for_rows(connection, rows, sign=1):
+    """Group prediction rows (dicts of TRACKED_COLUMNS) into stats increments.
+
+    Returns {(user_id, day, body_part, prediction_result): [count, confidence_sum]}.
+    """
+    patient_ids = {row['patient_id'] for row in rows}
+    if not patient_ids:
+        return {}
+    owners = dict(connection.execute(
+        select(Patient.__table__.c.id, Patient.__table__.c.user_id)
+        .where(Patient.__table__.c.id.in_(patient_ids))
+    ).all())
+
+    increments = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        user_id = owners.get(row['patient_id'])
+        if user_id is None:
+            continue
+        key = (user_id, _day(row['created_at']), row['body_part'], row['prediction_result'])
+        increments[key][0] += sign
+        increments[key][1] += sign * (row['confidence_score'] or 0)
+    return increments
+
+
+def merge_increments(target, increments):
+    """Add one increments dict into another"""
+    for key, (count, confidence_sum) in increments.items():
+        target[key][0] += count
+        target[key][1] += confidence_sum
+
+
+def apply_increments(connection, increments):
+    """Add increments to prediction_stats on the caller's connection and transaction"""
+    table = PredictionStat.__table__
+    dialect = {'sqlite': sqlite, 'postgresql': postgresql}.get(connection.dialect.name)
+
+    for (user_id, day, body_part, prediction_result), (count, confidence_sum) in increments.items():
+        if not count and not confidence_sum:
+            continue
+        values = {'user_id': user_id, 'day': day, 'body_part': body_part,
+                  'prediction_result': prediction_result,
+                  'prediction_count': count, 'confidence_sum': confidence_sum}
+        if dialect is not None:
+            statement = dialect.insert(table).values(**values)
+            connection.execute(statement.on_conflict_do_update(
+                index_elements=['user_id', 'day', 'body_part', 'prediction_result'],
+                set_={
+                    'prediction_count': table.c.prediction_count + statement.excluded.prediction_count,
+                    'confidence_sum': table.c.confidence_sum + statement.excluded.confidence_sum,
+                }
+            ))
+            continue
+
+        result = connection.execute(update(table).where(
+            table.c.user_id == user_id, table.c.day == day,
+            table.c.body_part == body_part, table.c.prediction_result == prediction_result
+        ).values(prediction_count=table.c.prediction_count + count,
+                 confidence_sum=table.c.confidence_sum + confidence_sum))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(**values))
+
+
+def _column_values(obj, current=True):
+    """Tracked column values of a Prediction, either as flushed now or as loaded before"""
+    state = inspect(obj)
+    values = {}
+    for name in TRACKED_COLUMNS:
+        history = state.attrs[name].history
+        if current or not history.deleted:
+            values[name] = getattr(obj, name)
+        else:
+            values[name] = history.deleted[0]
+    return values
+
+
+def _changed(obj):
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in TRACKED_COLUMNS)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _track_prediction_changes(session, flush_context):
+    """Keep prediction_stats in step with ORM inserts, updates and deletes in the same transaction"""
+    added = [_column_values(obj) for obj in session.new if isinstance(obj, Prediction)]
+    removed = [_column_values(obj, current=False) for obj in session.deleted if isinstance(obj, Prediction)]
+    for obj in session.dirty:
+        if isinstance(obj, Prediction) and _changed(obj):
+            removed.append(_column_values(obj, current=False))
+            added.append(_column_values(obj))
+    if not added and not removed:
+        return
+
+    connection = session.connection()
+    increments = defaultdict(lambda: [0, 0.0])
+    merge_increments(increments, increments_for_rows(connection, added))
+    merge_increments(increments, increments_for_rows(connection, removed, sign=-1))
+    apply_increments(connection, increments)
+
+
+def rebuild_prediction_stats(connection):
+    """Regenerate prediction_stats from the predictions table, returning the group count"""
+    stats = PredictionStat.__table__
+    predictions = Prediction.__table__
+    patients = Patient.__table__
+    day = func.date(predictions.c.created_at)
+
+    connection.execute(delete(stats))
+    connection.execute(insert(stats).from_select(
+        ['user_id', 'day', 'body_part', 'prediction_result', 'prediction_count', 'confidence_sum'],
+        select(patients.c.user_id, day, predictions.c.body_part, predictions.c.prediction_result,
+               func.count(predictions.c.id), func.coalesce(func.sum(predictions.c.confidence_score), 0))
+        .select_from(predictions.join(patients, patients.c.id == predictions.c.patient_id))
+        .group_by(patients.c.user_id, day, predictions.c.body_part, predictions.c.prediction_result)
+    ))
+    return connection.execute(select(func.count()).select_from(stats)).scalar()
+
+
+def user_prediction_totals(user_id):
+    """Total, normal and abnormal prediction counts for a clinician"""
+    total, normal, confidence_sum = db.session.query(
+        func.coalesce(func.sum(PredictionStat.prediction_count), 0),
+        func.coalesce(func.sum(case((PredictionStat.prediction_result == 'Normal',
+                                     PredictionStat.prediction_count), else_=0)), 0),
+        func.coalesce(func.sum(PredictionStat.confidence_sum), 0)
+    ).filter(PredictionStat.user_id == user_id).one()
+
+    return {
+        'total': total,
+        'normal': normal,
+        'abnormal': total - normal,
+        'abnormal_rate': (total - normal) / total if total else 0,
+        'avg_confidence': confidence_sum / total if total else 0
+    }
+
+
+def analytics_summary(user_id, days=30):
+    """Counts per condition, per body part and per day for a clinician, read from prediction_stats"""
+    def grouped(column, *filters):
+        rows = db.session.query(column, func.sum(PredictionStat.prediction_count)) \
+            .filter(PredictionStat.user_id == user_id, *filters) \
+            .group_by(column).order_by(column).all()
+        return {key: count for key, count in rows if count}
+
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    by_day = grouped(PredictionStat.day, PredictionStat.day >= since)
+
+    return {
+        'totals': user_prediction_totals(user_id),
+        'by_condition': grouped(PredictionStat.prediction_result),
+        'by_body_part': grouped(PredictionStat.body_part),
+        'by_day': {day.isoformat(): count for day, count in by_day.items()},
+    }
@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class WriteQueue:
+    """Single writer thread that serializes and batches database commits.
+
+    SQLite allows one writer at a time, so instead of every request thread
+    competing for the write lock, jobs are handed to one thread that runs up
+    to ``max_batch`` of them in a single transaction.  A job is a callable
+    taking the session and returning a value (typically ids after a flush);
+    ``submit`` returns a Future resolved once the batch has committed.
+    """
+
+    def __init__(self, app, db, max_batch=50, max_wait=0.005):
+        self.app = app
+        self.db = db
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.jobs = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.batches = 0
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='mediscan-writer', daemon=True)
+                self.thread.start()
+
+    def submit(self, job):
+        """Queue a job and return a Future for its result"""
+        self.start()
+        future = Future()
+        self.jobs.put((job, future))
+        return future
+
+    def stop(self, timeout=10):
+        """Finish queued jobs and stop the writer thread"""
+        if self.thread is not None and self.thread.is_alive():
+            self.jobs.put(None)
+            self.thread.join(timeout)
+
+    def next_batch(self):
+        """Block for one job, then collect whatever else arrives within max_wait"""
+        first = self.jobs.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.jobs.get(timeout=max(remaining, 0)) if remaining > 0 else self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # Put the stop marker back so the loop exits after this batch
+                self.jobs.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def run(self):
+        with self.app.app_context():
+            while True:
+                batch = self.next_batch()
+                if batch is None:
+                    break
+                try:
+                    self.commit_batch(batch)
+                finally:
+                    self.db.session.remove()
+
+    def commit_batch(self, batch):
+        session = self.db.session
+        try:
+            results = [job(session) for job, _ in batch]
+            session.commit()
+            self.batches += 1
+        except Exception:
+            session.rollback()
+            # Retry one by one so a single bad job does not fail the others
+            for job, future in batch:
+                self.commit_one(job, future)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def commit_one(self, job, future):
+        session = self.db.session
+        try:
+            result = job(session)
+            session.commit()
+            self.batches += 1
+            future.set_result(result)
+        except Exception as e:
+            session.rollback()
+            future.set_exception(e)
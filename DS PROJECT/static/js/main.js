@@ -7,8 +7,10 @@ let translations = {};
 // Initialize when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
     initializeApp();
-    loadTranslations();
     setupEventListeners();
+    if (currentLanguage !== 'en') {
+        translatePage();
+    }
 });
 
 // Initialize application
@@ -29,6 +31,7 @@ function initializeApp() {
     const savedLanguage = localStorage.getItem('mediscan_language');
     if (savedLanguage) {
         currentLanguage = savedLanguage;
+        saveLanguageCookie(savedLanguage);
         updateLanguageDisplay();
     }
 }
@@ -156,10 +159,16 @@ function handleFormSubmit(event) {
 function changeLanguage(langCode) {
     currentLanguage = langCode;
     localStorage.setItem('mediscan_language', langCode);
+    saveLanguageCookie(langCode);
     updateLanguageDisplay();
     translatePage();
 }
 
+// The server renders result pages in this language
+function saveLanguageCookie(langCode) {
+    document.cookie = `mediscan_language=${encodeURIComponent(langCode)}; path=/; max-age=31536000; SameSite=Lax`;
+}
+
 function updateLanguageDisplay() {
     const currentLangElement = document.getElementById('currentLanguage');
     const languages = {
@@ -175,39 +184,86 @@ function updateLanguageDisplay() {
     }
 }
 
-// Load translations
-async function loadTranslations() {
+// Load the i18n bundle for a language: one cacheable request per language and catalog version
+async function loadTranslations(langCode = currentLanguage) {
+    if (langCode === 'en' || translations[langCode]) {
+        return translations[langCode] || {};
+    }
+    
     try {
-        // In a real application, you would load translations from a file or API
-        translations = {
-            'en': {
-                'hero-title': 'AI for Smarter Disease Detection',
-                'hero-subtitle': 'Advanced X-ray analysis powered by artificial intelligence to help healthcare professionals make faster, more accurate diagnoses.',
-                'features-title': 'Why Choose MediScan AI?',
-                'login-title': 'Welcome Back',
-                'signup-title': 'Create Account'
-            },
-            'hi': {
-                'hero-title': 'स्मार्ट रोग निदान के लिए AI',
-                'hero-subtitle': 'कृत्रिम बुद्धिमत्ता द्वारा संचालित उन्नत एक्स-रे विश्लेषण',
-                'features-title': 'MediScan AI क्यों चुनें?',
-                'login-title': 'वापस स्वागत है',
-                'signup-title': 'खाता बनाएं'
-            }
-        };
+        const version = document.documentElement.dataset.i18nVersion || '';
+        const response = await fetch(`/i18n/${langCode}.json?v=${encodeURIComponent(version)}`);
+        translations[langCode] = response.ok ? (await response.json()).messages : {};
     } catch (error) {
         console.error('Error loading translations:', error);
+        translations[langCode] = {};
     }
+    return translations[langCode];
 }
 
+// Translate strings missing from the bundle in a single request
+async function translateBulk(texts, langCode) {
+    try {
+        const response = await fetch('/translate/bulk', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ texts: texts, target_language: langCode })
+        });
+        if (!response.ok || !response.headers.get('Content-Type')?.includes('application/json')) {
+            return texts;
+        }
+        return (await response.json()).translations;
+    } catch (error) {
+        console.error('Error translating text:', error);
+        return texts;
+    }
+}
+
+// Original markup of translated elements, so switching back to English restores it
+const originalContent = new WeakMap();
+
 // Translate page content
-function translatePage() {
-    if (currentLanguage === 'en') return;
+async function translatePage() {
+    const elementsToTranslate = Array.from(document.querySelectorAll('[data-translate]'));
+    elementsToTranslate.forEach(element => {
+        if (!originalContent.has(element)) {
+            originalContent.set(element, {
+                html: element.innerHTML,
+                text: element.textContent.trim().replace(/\s+/g, ' ')
+            });
+        }
+    });
     
-    const elementsToTranslate = document.querySelectorAll('[data-translate]');
+    if (currentLanguage === 'en') {
+        elementsToTranslate.forEach(element => {
+            element.innerHTML = originalContent.get(element).html;
+        });
+        return;
+    }
+    
+    const langCode = currentLanguage;
+    const messages = await loadTranslations(langCode);
+    const misses = [];
     elementsToTranslate.forEach(element => {
-        const key = element.getAttribute('data-translate');
-        const translation = translations[currentLanguage]?.[key];
+        const translation = messages[originalContent.get(element).text];
+        if (translation) {
+            element.textContent = translation;
+        } else {
+            misses.push(element);
+        }
+    });
+    if (misses.length === 0) return;
+    
+    const texts = [...new Set(misses.map(element => originalContent.get(element).text))];
+    const translated = await translateBulk(texts, langCode);
+    texts.forEach((text, i) => {
+        if (translated[i] && translated[i] !== text) {
+            messages[text] = translated[i];
+        }
+    });
+    if (langCode !== currentLanguage) return;
+    misses.forEach(element => {
+        const translation = messages[originalContent.get(element).text];
         if (translation) {
             element.textContent = translation;
         }
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test the multi-image batch upload endpoint
+"""
+
+import io
+import json
+import os
+import sys
+import zipfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app, reset_database, create_user, login
+
+DEMO_IMAGES = [
+    'static/uploads/test_chest_normal.jpg',
+    'static/uploads/test_chest_pneumonia.jpg',
+    'static/uploads/test_chest_covid.jpg',
+]
+
+
+def _image_bytes(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def _post_batch(client, patient_id, files):
+    response = client.post('/upload_batch', data={
+        'patient_id': str(patient_id),
+        'body_part': 'chest',
+        'images': files
+    }, content_type='multipart/form-data')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+    return response, lines
+
+
+def test_batch_upload_streams_results():
+    """Every file gets its own NDJSON line and all rows are committed"""
+    from models.database import Prediction
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    files = [(io.BytesIO(_image_bytes(path)), os.path.basename(path)) for path in DEMO_IMAGES]
+    response, lines = _post_batch(client, patient_id, files)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    results, summary = lines[:-1], lines[-1]
+    assert len(results) == len(DEMO_IMAGES)
+    assert all(line['status'] == 'ok' for line in results)
+    assert summary['status'] == 'done' and summary['saved'] == len(DEMO_IMAGES)
+
+    with app.app_context():
+        assert Prediction.query.filter_by(patient_id=patient_id).count() == len(DEMO_IMAGES)
+
+
+def test_batch_upload_zip():
+    """Images inside a zip archive are expanded and predicted"""
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for path in DEMO_IMAGES:
+            zf.writestr(f"visit/{os.path.basename(path)}", _image_bytes(path))
+        zf.writestr('visit/notes.txt', 'not an image')
+    archive.seek(0)
+
+    response, lines = _post_batch(client, patient_id, [(archive, 'visit.zip')])
+    assert response.status_code == 200
+    assert lines[-1]['saved'] == len(DEMO_IMAGES)
+
+
+def test_batch_upload_limits():
+    """Oversized zip members and files past BATCH_MAX_FILES are not stored and get error lines"""
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    image = _image_bytes(DEMO_IMAGES[0])
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('scan.jpg', image)
+        # Compresses to a few kilobytes but expands past the per-file limit
+        zf.writestr('bomb.jpg', b'\0' * (len(image) * 4))
+        zf.writestr('extra.jpg', image)
+    archive.seek(0)
+
+    limits = {name: app.config[name] for name in ('BATCH_MAX_FILES', 'BATCH_MAX_FILE_BYTES')}
+    app.config.update(BATCH_MAX_FILES=2, BATCH_MAX_FILE_BYTES=len(image) * 2)
+    try:
+        uploads = os.listdir(app.config['UPLOAD_FOLDER'])
+        response, lines = _post_batch(client, patient_id, [(archive, 'visit.zip')])
+        stored = set(os.listdir(app.config['UPLOAD_FOLDER'])) - set(uploads)
+    finally:
+        app.config.update(limits)
+
+    assert response.status_code == 200
+    errors = {line['file']: line['error'] for line in lines if line['status'] == 'error'}
+    assert set(errors) == {'bomb.jpg', 'extra.jpg'}
+    assert 'larger than' in errors['bomb.jpg']
+    assert lines[-1]['saved'] == 1 and lines[-1]['skipped'] == 2
+    assert not any('bomb' in name or 'extra' in name for name in stored)
+
+
+def test_batch_upload_removes_unreadable_files():
+    """A file that fails to parse gets an error line and is not left in the upload folder"""
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    broken = b'\0' * 128 + b'DICM' + b'\x02\x00\x10\x00UI'
+    files = [(io.BytesIO(_image_bytes(DEMO_IMAGES[0])), 'scan.jpg'), (io.BytesIO(broken), 'broken.dcm')]
+    uploads = os.listdir(app.config['UPLOAD_FOLDER'])
+    response, lines = _post_batch(client, patient_id, files)
+    stored = set(os.listdir(app.config['UPLOAD_FOLDER'])) - set(uploads)
+
+    assert response.status_code == 200
+    errors = [line for line in lines if line['status'] == 'error']
+    assert [line['file'] for line in errors] == ['broken.dcm']
+    assert lines[-1]['saved'] == 1
+    assert not any('broken' in name for name in stored)
+
+
+def test_batch_upload_rejects_other_users_patient():
+    """A clinician cannot upload to another clinician's patient"""
+    app = get_app()
+    reset_database(app)
+    _, (other_patient_id,) = create_user(app, email='other@mediscan.com')
+    create_user(app)
+    client = app.test_client()
+    login(client)
+
+    response, _ = _post_batch(client, other_patient_id, [(io.BytesIO(_image_bytes(DEMO_IMAGES[0])), 'a.jpg')])
+    assert response.status_code == 404
+
+
+if __name__ == "__main__":
+    print("📦 Testing batch upload")
+    print("=" * 40)
+
+    tests = [
+        test_batch_upload_streams_results,
+        test_batch_upload_zip,
+        test_batch_upload_limits,
+        test_batch_upload_removes_unreadable_files,
+        test_batch_upload_rejects_other_users_patient,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
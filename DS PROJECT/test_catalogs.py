@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test building and serving precompiled translation catalogs
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.catalogs import build_catalogs, medical_strings, ui_strings
+from utils.medical_info import MedicalInfoService
+from utils.translator import TranslationService
+
+
+class FakeBackend:
+    """Tags each delimited segment with the language; leaves strings marked '(as is)' untranslated"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, text, target_language, source_language='auto'):
+        self.calls += 1
+        return '\n⁂\n'.join(part.strip() if '(as is)' in part else f"[{target_language}] {part.strip()}"
+                            for part in text.split('⁂'))
+
+
+class OfflineBackend:
+    def translate(self, text, target_language, source_language='auto'):
+        raise AssertionError(f"unexpected upstream call for {text!r}")
+
+
+def _service(catalog_dir, backend):
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    return TranslationService(cache_path=path, backend=backend, catalog_dir=catalog_dir)
+
+
+def test_ui_strings_from_templates():
+    """data-translate elements give their English text; Jinja output is skipped"""
+    directory = tempfile.mkdtemp(prefix='templates_')
+    with open(os.path.join(directory, 'page.html'), 'w', encoding='utf-8') as f:
+        f.write('<h1 data-translate="title">\n  Welcome <b>back</b><br>\n</h1>'
+                '<p data-translate="greeting">Hello {{ user.name }}</p>'
+                '<p data-translate="title">Ignored duplicate</p>')
+    assert ui_strings(directory) == {'title': 'Welcome back'}
+
+    real = ui_strings(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates'))
+    assert real['login-title'] == 'Welcome Back'
+    assert 'hero-title' in real
+
+
+def test_build_and_serve_without_network():
+    """Catalog hits are dictionary lookups; medical info translates with no upstream call"""
+    directory = os.path.join(tempfile.mkdtemp(prefix='catalogs_'), 'catalogs')
+    service = MedicalInfoService()
+    strings = medical_strings(service) + ['Brand name (as is)']
+    manifest = build_catalogs(_service(directory, FakeBackend()), directory, strings, ['en', 'hi', 'ta'],
+                              out=lambda line: None)
+
+    assert set(manifest['languages']) == {'hi', 'ta'}
+    assert manifest['languages']['hi']['untranslated'] == 1
+    with open(os.path.join(directory, 'hi.json'), encoding='utf-8') as f:
+        catalog = json.load(f)
+    assert catalog['version'] == manifest['languages']['hi']['version']
+    assert catalog['messages']['Wash hands frequently'] == '[hi] Wash hands frequently'
+    assert 'Brand name (as is)' not in catalog['messages']
+
+    offline = _service(directory, OfflineBackend())
+    info = service.get_medical_info('Pneumonia')
+    translated = offline.translate_dict(info, 'ta')
+    assert translated['description'] == f"[ta] {info['description']}"
+    assert translated['precautions'] == [f"[ta] {item}" for item in info['precautions']]
+    assert offline.translate_text('Wash hands frequently', 'hi') == '[hi] Wash hands frequently'
+
+
+def test_misses_fall_back_and_feed_the_next_build():
+    """New app strings go to the runtime translator and are compiled in by the next build"""
+    directory = os.path.join(tempfile.mkdtemp(prefix='catalogs_'), 'catalogs')
+    build_catalogs(_service(directory, FakeBackend()), directory, ['Rest well'], ['hi'], out=lambda line: None)
+
+    backend = FakeBackend()
+    runtime = _service(directory, backend)
+    assert runtime.translate_text('Rest well', 'hi') == '[hi] Rest well'
+    assert backend.calls == 0
+    assert runtime.translate_batch(['Drink water', 'Drink water', 'Rest well'], 'hi') == \
+        ['[hi] Drink water', '[hi] Drink water', '[hi] Rest well']
+    assert backend.calls == 1
+    runtime.translate_text('Drink water', 'hi', record_missing=True)
+    # Free text (the /translate endpoints, search results) is never written out
+    runtime.translate_text('Patient John Doe, 42, reports pain', 'hi')
+
+    with open(os.path.join(directory, 'missing.jsonl'), encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == [{'language': 'hi', 'text': 'Drink water'}]
+
+    manifest = build_catalogs(_service(directory, FakeBackend()), directory, ['Rest well'], ['hi', 'ta'],
+                              out=lambda line: None)
+    assert manifest['strings'] == 2
+    assert not os.path.exists(os.path.join(directory, 'missing.jsonl'))
+    assert _service(directory, OfflineBackend()).translate_text('Drink water', 'ta') == '[ta] Drink water'
+
+    # A running worker drops its loaded catalogs once the manifest changes
+    runtime.catalogs.check_interval = 0
+    assert runtime.catalogs.lookup('Drink water', 'hi') == '[hi] Drink water'
+
+    # Runtime strings stay in later builds even once the miss log is gone
+    assert build_catalogs(_service(directory, FakeBackend()), directory, ['Rest well'], ['hi'],
+                          out=lambda line: None)['strings'] == 2
+
+
+if __name__ == "__main__":
+    print("📚 Testing translation catalogs")
+    print("=" * 40)
+
+    tests = [
+        test_ui_strings_from_templates,
+        test_build_and_serve_without_network,
+        test_misses_fall_back_and_feed_the_next_build,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test that the dashboard runs a constant number of queries
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+
+from test_helpers import get_app, reset_database, create_user, login
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect every SQL statement executed on the engine"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _add_predictions(app, patient_ids, per_patient=4):
+    from models.database import db, Prediction
+
+    start = datetime(2024, 1, 1)
+    with app.app_context():
+        for index, patient_id in enumerate(patient_ids):
+            for scan in range(per_patient):
+                db.session.add(Prediction(
+                    patient_id=patient_id, image_path='demo_chest_xray.jpg', body_part='chest',
+                    prediction_result='Normal' if scan % 2 else 'Pneumonia', confidence_score=0.9,
+                    created_at=start + timedelta(hours=index * per_patient + scan)
+                ))
+        db.session.commit()
+
+
+def _dashboard_query_count(patients):
+    from models.database import db
+
+    app = get_app()
+    reset_database(app)
+    _, patient_ids = create_user(app, patients=patients)
+    _add_predictions(app, patient_ids)
+
+    client = app.test_client()
+    login(client)
+    with app.app_context():
+        engine = db.engine
+    with count_queries(engine) as statements:
+        response = client.get('/dashboard')
+    assert response.status_code == 200
+    return len(statements)
+
+
+def test_query_count_is_constant():
+    """The dashboard query count does not grow with the number of patients"""
+    small = _dashboard_query_count(patients=3)
+    large = _dashboard_query_count(patients=60)
+    assert small == large, f"{small} queries for 3 patients, {large} for 60"
+    assert large <= 6, f"dashboard ran {large} queries"
+
+
+def test_recent_predictions_and_summary():
+    """The windowed query returns the latest scans, at most three per patient"""
+    from models.queries import recent_predictions_for_user, prediction_summary_by_patient
+
+    app = get_app()
+    reset_database(app)
+    user_id, patient_ids = create_user(app, patients=2)
+    # The second patient has the six newest scans
+    _add_predictions(app, patient_ids[:1], per_patient=1)
+    _add_predictions(app, patient_ids[1:], per_patient=6)
+
+    with app.app_context():
+        recent = recent_predictions_for_user(user_id, limit=5, per_patient=3)
+        assert [p.patient_id for p in recent].count(patient_ids[1]) == 3
+        assert [p.patient_id for p in recent].count(patient_ids[0]) == 1
+        assert recent == sorted(recent, key=lambda p: p.created_at, reverse=True)
+
+        summary = prediction_summary_by_patient(user_id)
+        assert summary[patient_ids[1]]['count'] == 6
+        assert summary[patient_ids[0]]['count'] == 1
+        assert isinstance(summary[patient_ids[1]]['last_scan'], datetime)
+
+
+if __name__ == "__main__":
+    print("📊 Testing dashboard queries")
+    print("=" * 40)
+
+    tests = [
+        test_query_count_is_constant,
+        test_recent_predictions_and_summary,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
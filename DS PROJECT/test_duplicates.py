@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test perceptual-hash duplicate detection
+"""
+
+import io
+import os
+import random
+import re
+import sys
+import tempfile
+
+from PIL import Image
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app, reset_database, create_user, login
+
+CHEST_IMAGE = 'static/uploads/realistic_chest_normal.jpg'
+HAND_IMAGE = 'static/uploads/realistic_hand_fracture.jpg'
+
+
+def test_hash_survives_rescaling_and_recompression():
+    """A resized, re-encoded copy hashes close to the original; a different film does not"""
+    from utils.duplicates import hamming, perceptual_hash
+
+    directory = tempfile.mkdtemp(prefix='phash_')
+    copy_path = os.path.join(directory, 'copy.jpg')
+    with Image.open(CHEST_IMAGE) as image:
+        image.resize((image.width // 2, image.height // 2)).save(copy_path, quality=60)
+
+    original = int(perceptual_hash(CHEST_IMAGE), 16)
+    assert hamming(original, int(perceptual_hash(copy_path), 16)) <= 4
+    assert hamming(original, int(perceptual_hash(HAND_IMAGE), 16)) > 10
+
+
+def test_index_matches_brute_force():
+    """Multi-index queries return exactly the hashes a linear scan finds"""
+    from utils.duplicates import PHashIndex, hamming
+
+    rng = random.Random(7)
+    hashes = [rng.getrandbits(64) for _ in range(20000)]
+    # Plant near neighbours of the first few hashes
+    for i in range(50):
+        value = hashes[i]
+        for bit in rng.sample(range(64), rng.randint(0, 7)):
+            value ^= 1 << bit
+        hashes.append(value)
+
+    index = PHashIndex()
+    for item_id, value in enumerate(hashes):
+        index.add(item_id, value)
+
+    for radius in (0, 3, 7):
+        for query in hashes[:50]:
+            expected = sorted((hamming(query, value), item_id) for item_id, value in enumerate(hashes)
+                              if hamming(query, value) <= radius)
+            assert index.query(query, radius) == expected
+    assert len(index) == len(hashes)
+
+
+def test_reupload_links_and_reuses_earlier_study():
+    """Uploading the same film again points at the first study and keeps its result"""
+    from models.database import db, Prediction
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    with open(CHEST_IMAGE, 'rb') as f:
+        image = f.read()
+    pages = []
+    for name in ('first.jpg', 'again.jpg'):
+        response = client.post('/upload_predict', data={
+            'patient_id': patient_id, 'body_part': 'chest', 'image': (io.BytesIO(image), name)
+        }, content_type='multipart/form-data')
+        assert response.status_code == 200
+        pages.append(response.get_data(as_text=True))
+
+    with app.app_context():
+        first, second = Prediction.query.order_by(Prediction.id).all()
+        assert first.perceptual_hash and first.perceptual_hash == second.perceptual_hash
+        assert (second.prediction_result, second.confidence_score) == (first.prediction_result,
+                                                                       first.confidence_score)
+        assert second.image_hash == first.image_hash
+
+    assert 'looks like' not in pages[0]
+    assert re.search(rf"study #{first.id}\b", pages[1])
+
+
+def test_rows_committed_late_are_indexed():
+    """A study whose id is below ones already indexed, but committed after them, is still found"""
+    from models.database import db, Prediction
+    from utils.duplicates import DuplicateIndex
+
+    app = get_app()
+    reset_database(app)
+    user_id, (patient_id,) = create_user(app)
+    index = DuplicateIndex()
+    with app.app_context():
+        for number in range(1, 6):
+            db.session.add(Prediction(id=number, patient_id=patient_id, image_path=f'{number}.png',
+                                      body_part='chest', prediction_result='Normal', confidence_score=0.9,
+                                      perceptual_hash=f"{number:016x}"))
+        db.session.commit()
+        late = db.session.get(Prediction, 3)
+        values = {column.name: getattr(late, column.name) for column in Prediction.__table__.columns}
+        db.session.delete(late)
+        db.session.commit()
+        with db.engine.connect() as connection:
+            assert index.nearest(connection, 'ffffffffffffff00', 0, user_id) is None
+
+        # Row 3 was still in an uncommitted batch during that refresh
+        db.session.add(Prediction(**dict(values, perceptual_hash='ffffffffffffff00')))
+        db.session.commit()
+        with db.engine.connect() as connection:
+            match = index.nearest(connection, 'ffffffffffffff00', 0, user_id)
+        assert match is not None and match.prediction_id == 3
+        assert len(index.index) == 5
+
+
+def test_other_clinicians_studies_are_not_surfaced():
+    """Matches are limited to the uploading clinician's own patients"""
+    from models.database import db, Prediction
+
+    app = get_app()
+    reset_database(app)
+    _, (own_patient,) = create_user(app, email='first@example.com')
+    _, (other_patient,) = create_user(app, email='second@example.com')
+
+    with open(HAND_IMAGE, 'rb') as f:
+        image = f.read()
+    for email, patient_id in (('first@example.com', own_patient), ('second@example.com', other_patient)):
+        client = app.test_client()
+        login(client, email=email)
+        response = client.post('/upload_predict', data={
+            'patient_id': patient_id, 'body_part': 'hand', 'image': (io.BytesIO(image), 'hand.jpg')
+        }, content_type='multipart/form-data')
+        assert response.status_code == 200
+
+    assert 'looks like' not in response.get_data(as_text=True)
+    with app.app_context():
+        assert Prediction.query.count() == 2
+
+
+if __name__ == "__main__":
+    print("🧬 Testing duplicate detection")
+    print("=" * 40)
+
+    tests = [
+        test_hash_survives_rescaling_and_recompression,
+        test_index_matches_brute_force,
+        test_reupload_links_and_reuses_earlier_study,
+        test_rows_committed_late_are_indexed,
+        test_other_clinicians_studies_are_not_surfaced,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for tests that need the Flask app and a throwaway database
+"""
+
+import os
+import sys
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+TEST_DIR = tempfile.mkdtemp(prefix='mediscan_test_')
+
+# Point the app at a temporary database before it is imported
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(TEST_DIR, 'test.db')}")
+os.environ.setdefault('PREDICTION_LOG_DIR', os.path.join(TEST_DIR, 'prediction_logs'))
+os.environ.setdefault('TRANSLATION_CACHE_DB', os.path.join(TEST_DIR, 'translations.db'))
+os.environ.setdefault('TRANSLATION_CATALOG_DIR', os.path.join(TEST_DIR, 'catalogs'))
+# Warming every condition and language would translate upstream in the background of every test
+os.environ.setdefault('WARMUP_ENABLED', 'false')
+
+
+def get_app():
+    """Import the app configured for testing"""
+    from app import app
+
+    app.config['TESTING'] = True
+    app.config['WTF_CSRF_ENABLED'] = False
+    app.config['UPLOAD_FOLDER'] = os.path.join(TEST_DIR, 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    return app
+
+
+def reset_database(app):
+    """Drop and recreate all tables"""
+    from models.database import db
+    from models.medical_content import clear_content_cache
+    from app import duplicate_index, similar_cases
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+        db.create_all()
+    clear_content_cache()
+    duplicate_index.clear()
+    similar_cases.clear()
+
+
+def create_user(app, email='doctor@mediscan.com', password='secret123', patients=1):
+    """Create a user with a number of patients, returning (user_id, patient_ids)"""
+    from models.database import db, User, Patient
+
+    with app.app_context():
+        user = User(name='Test Doctor', email=email, phone='+91-98765-43210')
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+
+        patient_ids = []
+        for index in range(patients):
+            patient = Patient(user_id=user.id, name=f'Patient {index}', age=30 + index % 50,
+                              gender='male' if index % 2 else 'female', contact='+91-98765-12345')
+            db.session.add(patient)
+            db.session.flush()
+            patient_ids.append(patient.id)
+        db.session.commit()
+        return user.id, patient_ids
+
+
+def login(client, email='doctor@mediscan.com', password='secret123'):
+    """Log a test client in"""
+    return client.post('/login', data={'email': email, 'password': password})
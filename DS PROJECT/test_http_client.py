@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Test the pooled HTTP client used for online medical information lookups
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.http_client import DeadlineExceeded, HTTPClient, RetryableError
+from utils.medical_info import MedicalInfoService
+
+
+class StandInCustomSearch(BaseHTTPRequestHandler):
+    """Custom Search-style /customsearch/v1 with scripted latency and status codes"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlsplit(self.path).query)
+        with server.lock:
+            server.calls += 1
+            call = server.calls
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            latencies = server.latencies
+            time.sleep(latencies[call - 1] if call <= len(latencies) else server.latency)
+            statuses = server.statuses
+            status = statuses[call - 1] if call <= len(statuses) else 200
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+        body = b''
+        if status == 200:
+            body = json.dumps({'items': [
+                {'title': f"Result {index} for {query['q'][0]}", 'link': f"https://example.org/{call}/{index}"}
+                for index in range(int(query.get('num', ['3'])[0]))
+            ]}).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _server(latency=0.0, latencies=(), statuses=()):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInCustomSearch)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.calls = 0
+    server.connections = 0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.latency = latency
+    server.latencies = list(latencies)
+    server.statuses = list(statuses)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_port}/customsearch/v1"
+
+
+def test_connections_are_reused_and_responses_cached():
+    """Sequential lookups share one keep-alive connection; equivalent queries hit the cache"""
+    server = _server()
+    try:
+        client = HTTPClient()
+        for index in range(20):
+            client.get_json(_url(server), {'q': f"condition {index}", 'num': 1})
+        assert server.calls == 20
+        assert server.connections == 1
+
+        first = client.get_json(_url(server), {'q': 'Pleural  Effusion', 'num': 1})
+        assert client.get_json(_url(server), {'q': ' pleural effusion', 'num': 1}) == first
+        assert server.calls == 21
+        assert client.snapshot()['cache_hits'] == 1
+    finally:
+        server.shutdown()
+
+
+def test_concurrency_is_bounded():
+    """However many threads look things up at once, at most max_concurrency requests are in flight"""
+    server = _server(latency=0.05)
+    try:
+        client = HTTPClient(max_concurrency=2, hedge_after=5)
+        threads = [threading.Thread(target=client.get_json, args=(_url(server), {'q': f"query {index}"}))
+                   for index in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert server.calls == 10
+        assert server.max_in_flight == 2
+    finally:
+        server.shutdown()
+
+
+def test_slow_attempt_is_hedged():
+    """A second attempt after hedge_after answers before the slow first one"""
+    server = _server(latencies=[1.5])
+    try:
+        client = HTTPClient(hedge_after=0.1)
+        started = time.perf_counter()
+        data = client.get_json(_url(server), {'q': 'hedged'})
+        assert time.perf_counter() - started < 0.75
+        assert data['items'][0]['link'].startswith('https://example.org/2/')
+        assert client.snapshot()['hedges'] == 1
+    finally:
+        server.shutdown()
+
+
+def test_retries_and_deadline():
+    """Busy and failing replies are retried within the deadline; client errors are not"""
+    server = _server(statuses=[503, 500])
+    try:
+        client = HTTPClient(retries=2, backoff=0.01)
+        assert client.get_json(_url(server), {'q': 'retried'})['items']
+        assert server.calls == 3
+        assert client.snapshot()['retries'] == 2
+    finally:
+        server.shutdown()
+
+    server = _server(statuses=[503] * 10)
+    try:
+        client = HTTPClient(retries=2, backoff=0.01)
+        try:
+            client.get_json(_url(server), {'q': 'failing'})
+            assert False, 'expected RetryableError'
+        except RetryableError:
+            pass
+        assert server.calls == 3
+        # Retries ran out well before the deadline, so this was no timeout
+        host = urlsplit(_url(server)).netloc
+        assert client.snapshot()['hosts'][host]['timeouts'] == 0
+    finally:
+        server.shutdown()
+
+    server = _server(statuses=[400])
+    try:
+        try:
+            HTTPClient().get_json(_url(server), {'q': 'bad request'})
+            assert False, 'expected HTTPError'
+        except requests.HTTPError:
+            pass
+        assert server.calls == 1
+    finally:
+        server.shutdown()
+
+    server = _server(latency=2.0)
+    try:
+        client = HTTPClient(deadline=0.3, hedge_after=0.1)
+        started = time.perf_counter()
+        try:
+            client.get_json(_url(server), {'q': 'slow'})
+            assert False, 'expected DeadlineExceeded'
+        except DeadlineExceeded:
+            pass
+        assert time.perf_counter() - started < 0.6
+        assert client.snapshot()['hosts'][urlsplit(_url(server)).netloc]['timeouts'] == 1
+    finally:
+        server.shutdown()
+
+
+def test_medical_info_search():
+    """Online lookups go through the pooled client and repeat lookups are served from its cache"""
+    server = _server()
+    try:
+        service = MedicalInfoService()
+        service.google_api_key, service.search_engine_id, service.search_url = 'key', 'engine', _url(server)
+        info = service.search_medical_info('Scoliosis')
+        assert info['source'] == 'online_search'
+        assert info['references'] == ['https://example.org/1/0', 'https://example.org/1/1']
+        assert service.search_medical_info('Scoliosis') == info
+        assert server.calls == 1
+    finally:
+        server.shutdown()
+
+    # An unreachable search falls back without waiting out the old 10 second timeout
+    service = MedicalInfoService(http_client=HTTPClient(deadline=0.5, backoff=0.01))
+    service.google_api_key, service.search_engine_id, service.search_url = 'key', 'engine', _url(server)
+    assert service.search_medical_info('Scoliosis')['source'] == 'fallback'
+
+
+if __name__ == "__main__":
+    print("🌐 Testing the pooled HTTP client")
+    print("=" * 40)
+
+    tests = [
+        test_connections_are_reused_and_responses_cached,
+        test_concurrency_is_bounded,
+        test_slow_attempt_is_hedged,
+        test_retries_and_deadline,
+        test_medical_info_search,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test the bulk translation endpoint and the cacheable i18n bundles
+"""
+
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app, reset_database, create_user, login
+
+
+class FakeBackend:
+    def __init__(self):
+        self.calls = 0
+
+    def translate(self, text, target_language, source_language='auto'):
+        self.calls += 1
+        return '\n⁂\n'.join(f"[{target_language}] {part.strip()}" for part in text.split('⁂'))
+
+
+def test_bulk_translate():
+    """Many strings are translated in one request, in order, with one upstream call"""
+    import app as app_module
+
+    app = get_app()
+    reset_database(app)
+    create_user(app)
+    client = app.test_client()
+    payload = {'texts': ['Bulk one', 'Bulk two', 'Bulk one', ''], 'target_language': 'te'}
+    assert client.post('/translate/bulk', json=payload).status_code == 302
+
+    login(client)
+    backend, app_module.translator.backend = app_module.translator.backend, FakeBackend()
+    try:
+        response = client.post('/translate/bulk', json=payload)
+        assert response.status_code == 200
+        assert response.get_json()['translations'] == ['[te] Bulk one', '[te] Bulk two', '[te] Bulk one', '']
+        assert app_module.translator.backend.calls == 1
+
+        assert client.post('/translate/bulk', json={'texts': 'Bulk one', 'target_language': 'te'}).status_code == 400
+        assert client.post('/translate/bulk', json={'texts': ['x'], 'target_language': 'xx'}).status_code == 400
+        too_many = ['x'] * (app.config['TRANSLATE_BULK_MAX_TEXTS'] + 1)
+        assert client.post('/translate/bulk', json={'texts': too_many, 'target_language': 'te'}).status_code == 400
+    finally:
+        app_module.translator.backend = backend
+
+
+def test_i18n_bundle():
+    """Bundles carry only page text, revalidate by ETag and are immutable under a versioned URL"""
+    import app as app_module
+
+    app = get_app()
+    catalogs = app_module.translator.catalogs
+    os.makedirs(catalogs.directory, exist_ok=True)
+    with open(os.path.join(catalogs.directory, 'kn.json'), 'w', encoding='utf-8') as f:
+        json.dump({'format': 1, 'language': 'kn', 'version': 'abc123',
+                   'messages': {'Welcome Back': 'ಮರಳಿ ಸ್ವಾಗತ', 'Rest and stay hydrated': 'ವಿಶ್ರಾಂತಿ'}}, f)
+    catalogs.reload()
+
+    client = app.test_client()
+    response = client.get('/i18n/kn.json')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['messages'] == {'Welcome Back': 'ಮರಳಿ ಸ್ವಾಗತ'}
+    assert 'no-cache' in response.headers['Cache-Control']
+    etag = response.headers['ETag']
+
+    assert client.get('/i18n/kn.json', headers={'If-None-Match': etag}).status_code == 304
+
+    versioned = client.get(f"/i18n/kn.json?v={data['version']}")
+    assert 'max-age=31536000' in versioned.headers['Cache-Control']
+    assert 'immutable' in versioned.headers['Cache-Control']
+    assert 'max-age' not in client.get('/i18n/kn.json?v=stale').headers['Cache-Control']
+
+    assert client.get('/i18n/en.json').get_json()['messages'] == {}
+    assert client.get('/i18n/xx.json').status_code == 404
+
+    page = client.get('/login').get_data(as_text=True)
+    assert f'data-i18n-version="{data["version"]}"' in page
+
+
+if __name__ == "__main__":
+    print("🌍 Testing bulk translation and i18n bundles")
+    print("=" * 40)
+
+    tests = [
+        test_bulk_translate,
+        test_i18n_bundle,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
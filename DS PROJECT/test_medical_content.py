@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test that predictions reference shared medical content rows
+"""
+
+import io
+import json
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select, text
+
+from test_helpers import get_app, reset_database, create_user, login
+
+
+def test_uploads_share_content_rows():
+    """Predictions of the same condition point at one content row and store no JSON"""
+    from models.database import db, MedicalContent, Prediction
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    with open('static/uploads/test_chest_normal.jpg', 'rb') as f:
+        image = f.read()
+    files = [(io.BytesIO(image), f'scan_{index}.jpg') for index in range(4)]
+    response = client.post('/upload_batch', data={'patient_id': str(patient_id), 'body_part': 'chest',
+                                                  'images': files}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    # Reading the streamed body runs the predictions and the final commit
+    assert json.loads(response.get_data(as_text=True).splitlines()[-1])['saved'] == 4
+
+    with app.app_context():
+        predictions = Prediction.query.filter_by(patient_id=patient_id).all()
+        assert len(predictions) == 4
+        assert all(p.additional_info is None and p.medical_tips is None for p in predictions)
+        assert len({p.medical_content_id for p in predictions}) == 1
+        assert MedicalContent.query.count() == 1
+
+        prediction_id = predictions[0].id
+        content = json.loads(predictions[0].medical_content.payload)
+    page = client.get(f'/prediction/{prediction_id}').get_data(as_text=True)
+    assert content['description'] in page
+
+
+def test_content_cache_keeps_its_own_copy():
+    """Callers mutating their dict afterwards, or rolling back, never reach the process cache"""
+    from models.database import db, MedicalContent, Prediction
+    from models.medical_content import (cached_content_id, content_key, insert_content, medical_content_id,
+                                        prediction_medical_info)
+
+    app = get_app()
+    reset_database(app)
+    with app.app_context():
+        payload = {'condition': 'Pneumonia', 'description': 'Infection that inflames air sacs in lungs'}
+        content_id = medical_content_id(db.engine, payload, 'v1')
+        payload['description'] = 'Changed by the caller'
+        info = prediction_medical_info(Prediction(medical_content_id=content_id))
+        assert info['description'] == 'Infection that inflames air sacs in lungs'
+
+        key, payload_json = content_key({'condition': 'Fracture'}, 'v1')
+        with db.engine.connect() as connection:
+            transaction = connection.begin()
+            assert insert_content(connection, key, payload_json) is not None
+            transaction.rollback()
+        assert cached_content_id(key) is None
+        assert MedicalContent.query.count() == 1
+
+
+class NoLookups:
+    """Medical info service that fails the test if the backfill asks it for content"""
+
+    def __init__(self, service):
+        self.CONTENT_VERSION = service.CONTENT_VERSION
+
+    def get_medical_info(self, condition):
+        raise AssertionError(f"backfill looked up {condition}")
+
+
+def test_backfill_migrates_legacy_rows():
+    """Legacy JSON rows are moved in batches and render the same afterwards, with no live lookups"""
+    from app import medical_info
+    from models.database import db, MedicalContent, Prediction
+    from models.medical_content import backfill_medical_content
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    legacy = {'condition': 'Pneumonia', 'description': 'Infection that inflames air sacs in lungs'}
+    with app.app_context():
+        for index in range(7):
+            db.session.add(Prediction(
+                patient_id=patient_id, image_path=f'{index}.png', body_part='chest',
+                prediction_result='Pneumonia', confidence_score=0.8,
+                additional_info=json.dumps(legacy), medical_tips=json.dumps(['Get plenty of rest'])
+            ))
+        db.session.add(Prediction(patient_id=patient_id, image_path='empty.png', body_part='chest',
+                                  prediction_result='Normal', confidence_score=0.9))
+        db.session.add(Prediction(patient_id=patient_id, image_path='garbled.png', body_part='chest',
+                                  prediction_result='Normal', confidence_score=0.9, additional_info='not json'))
+        fallback = {'condition': 'Normal', 'description': 'Information unavailable', 'source': 'fallback'}
+        db.session.add(Prediction(patient_id=patient_id, image_path='fallback.png', body_part='chest',
+                                  prediction_result='Normal', confidence_score=0.9,
+                                  additional_info=json.dumps(fallback)))
+        db.session.commit()
+        first_id = Prediction.query.order_by(Prediction.id).first().id
+
+        before = client.get(f'/prediction/{first_id}').get_data(as_text=True)
+        migrated = backfill_medical_content(db.engine, NoLookups(medical_info), batch_size=3, out=io.StringIO())
+        assert migrated == 9
+        assert backfill_medical_content(db.engine, NoLookups(medical_info), out=io.StringIO()) == 0
+
+        remaining = db.session.execute(
+            select(func.count()).select_from(Prediction).where(Prediction.additional_info.isnot(None))
+        ).scalar()
+        assert remaining == 0
+        assert MedicalContent.query.count() == 1
+        # Nothing usable was stored, so nothing is pinned; the page shows the current information
+        garbled = Prediction.query.filter_by(image_path='garbled.png').one()
+        assert garbled.medical_content_id is None
+        # Fallback text is a stand-in, not content worth keeping with the prediction
+        assert Prediction.query.filter_by(image_path='fallback.png').one().medical_content_id is None
+
+        migrated_payload = json.loads(db.session.get(Prediction, first_id).medical_content.payload)
+        assert migrated_payload['medical_tips'] == ['Get plenty of rest']
+
+    after = client.get(f'/prediction/{first_id}').get_data(as_text=True)
+    assert legacy['description'] in before and legacy['description'] in after
+
+
+def test_migration_adds_column_to_existing_database():
+    """Databases created before medical_content get the table, column and index"""
+    from models.database import db
+    from models.migrations import run_migrations
+
+    app = get_app()
+    reset_database(app)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            # Recreate predictions with the schema from before medical_content existed
+            connection.execute(text("DROP TABLE predictions"))
+            connection.execute(text("DROP TABLE medical_content"))
+            connection.execute(text(
+                "CREATE TABLE predictions (id INTEGER PRIMARY KEY, patient_id INTEGER NOT NULL REFERENCES patients (id), "
+                "image_path VARCHAR(255) NOT NULL, body_part VARCHAR(50) NOT NULL, "
+                "prediction_result VARCHAR(100) NOT NULL, confidence_score FLOAT NOT NULL, "
+                "additional_info TEXT, medical_tips TEXT, created_at DATETIME)"
+            ))
+            connection.execute(text("DELETE FROM schema_migrations"))
+
+        applied = run_migrations(db.engine)
+        assert applied[:2] == ['0001_hot_query_indexes', '0002_prediction_medical_content']
+        with db.engine.connect() as connection:
+            columns = [row[1] for row in connection.execute(text("PRAGMA table_info(predictions)"))]
+            indexes = [row[1] for row in connection.execute(text("PRAGMA index_list(predictions)"))]
+        assert 'medical_content_id' in columns
+        assert 'ix_predictions_medical_content_id' in indexes
+
+
+if __name__ == "__main__":
+    print("🩺 Testing medical content normalization")
+    print("=" * 40)
+
+    tests = [
+        test_uploads_share_content_rows,
+        test_content_cache_keeps_its_own_copy,
+        test_backfill_migrates_legacy_rows,
+        test_migration_adds_column_to_existing_database,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test the localized medical information cache
+"""
+
+import html
+import io
+import os
+import sys
+import tempfile
+import threading
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app, reset_database, create_user, login
+from utils.medical_info import MedicalInfoService
+from utils.medical_info_cache import MedicalInfoCache
+from utils.translator import TranslationService
+
+CHEST_IMAGE = 'static/uploads/realistic_chest_normal.jpg'
+
+
+class RecordingBackend:
+    """Tags each delimited segment with the language and records the calling thread"""
+
+    def __init__(self):
+        self.threads = []
+
+    def translate(self, text, target_language, source_language='auto'):
+        self.threads.append(threading.current_thread().name)
+        return '\n⁂\n'.join(f"[{target_language}] {part.strip()}" for part in text.split('⁂'))
+
+
+class FakeSearchService(MedicalInfoService):
+    """Search results numbered by call, with the calling thread recorded"""
+
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fail = fail
+        self.threads = []
+
+    def search_medical_info(self, condition):
+        self.threads.append(threading.current_thread().name)
+        if self.fail:
+            return self.get_fallback_info(condition)
+        return {'condition': condition, 'description': f"Search result {len(self.threads)} for {condition}",
+                'medical_tips': [], 'precautions': [], 'source': 'online_search', 'references': []}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _translator(backend, path=None):
+    path = path or os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    return TranslationService(cache_path=path, backend=backend,
+                              catalog_dir=os.path.join(tempfile.mkdtemp(prefix='catalogs_'), 'catalogs'))
+
+
+def test_localized_in_background_and_shared():
+    """A new language is served from what is translated, completed off the request thread and then shared"""
+    backend = RecordingBackend()
+    translator = _translator(backend)
+    service = MedicalInfoService()
+    cache = MedicalInfoCache(service, translator)
+    english = service.get_medical_info('Pneumonia')
+
+    first = cache.get('Pneumonia', 'hi')
+    assert first['description'] == english['description']
+    cache.drain()
+    assert backend.threads and threading.current_thread().name not in backend.threads
+
+    localized = cache.get('Pneumonia', 'hi')
+    assert localized['description'] == f"[hi] {english['description']}"
+    assert localized['precautions'] == [f"[hi] {item}" for item in english['precautions']]
+    assert (localized['condition'], localized['source'], localized['language']) == ('Pneumonia', 'local_database',
+                                                                                  'hi')
+    assert cache.get('Pneumonia', 'en') == english
+
+    # Another worker finds the payload in the shared store without translating anything
+    other = RecordingBackend()
+    worker = MedicalInfoCache(service, _translator(other, translator.cache.path))
+    assert worker.get('Pneumonia', 'hi') == localized
+    assert other.threads == []
+
+    # A new content version is a new key, never the old translation
+    changed = dict(english, description='Updated description.')
+    assert cache.localize(changed, 'hi')['description'] == 'Updated description.'
+
+
+def test_search_results_expire_and_revalidate():
+    """Searches run in the background; stale results are served while they refresh"""
+    clock = Clock()
+    service = FakeSearchService()
+    cache = MedicalInfoCache(service, _translator(RecordingBackend()), ttl=60, clock=clock)
+
+    assert cache.get('Scoliosis')['source'] == 'fallback'
+    cache.drain()
+    assert threading.current_thread().name not in service.threads
+    assert cache.get('Scoliosis')['description'] == 'Search result 1 for Scoliosis'
+    assert len(service.threads) == 1
+
+    clock.now += 61
+    assert cache.get('Scoliosis')['description'] == 'Search result 1 for Scoliosis'
+    cache.drain()
+    assert cache.get('Scoliosis')['description'] == 'Search result 2 for Scoliosis'
+    assert cache.snapshot()['stale'] == 1
+
+    # Conditions in the tips database never search
+    assert cache.get('Fracture')['source'] == 'local_database'
+    assert len(service.threads) == 2
+
+
+def test_failed_searches_retry_sooner():
+    """A fallback from a failed search is kept for fallback_ttl only"""
+    clock = Clock()
+    service = FakeSearchService(fail=True)
+    cache = MedicalInfoCache(service, _translator(RecordingBackend()), ttl=3600, fallback_ttl=30, clock=clock)
+    cache.get('Scoliosis')
+    cache.drain()
+    clock.now += 31
+    cache.get('Scoliosis')
+    cache.drain()
+    assert len(service.threads) == 2
+
+
+def test_result_page_in_selected_language():
+    """The upload result page renders localized text with no translation on the request thread"""
+    import app as app_module
+    from models.database import Prediction
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+    client.set_cookie('mediscan_language', 'ml')
+
+    with open(CHEST_IMAGE, 'rb') as f:
+        image = f.read()
+    backend, app_module.translator.backend = app_module.translator.backend, RecordingBackend()
+    try:
+        pages = []
+        for name in ('first.jpg', 'second.jpg'):
+            response = client.post('/upload_predict', data={
+                'patient_id': patient_id, 'body_part': 'chest', 'image': (io.BytesIO(image), name)
+            }, content_type='multipart/form-data')
+            assert response.status_code == 200
+            pages.append(response.get_data(as_text=True))
+            app_module.medical_info_cache.drain()
+        assert threading.current_thread().name not in app_module.translator.backend.threads
+    finally:
+        app_module.translator.backend = backend
+
+    with app.app_context():
+        prediction = Prediction.query.order_by(Prediction.id).first()
+        description = app_module.prediction_medical_info(prediction)['description']
+    # The stored payload stays in English; only the page is localized
+    assert not description.startswith('[')
+    assert html.escape(f"[ml] {description}") in pages[1]
+
+
+def test_fallback_is_not_pinned_to_predictions():
+    """A prediction saved while its search was pending shows the search result once it lands"""
+    import app as app_module
+    from models.database import db, Prediction
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    service = FakeSearchService()
+    fallback = service.get_fallback_info('Scoliosis')
+    with app.test_request_context():
+        prediction_id, = app_module.save_predictions([
+            app_module.build_prediction(patient_id, 'scan.png', 'spine', 'Scoliosis', 0.7, fallback)
+        ])
+    with app.app_context():
+        assert db.session.get(Prediction, prediction_id).medical_content_id is None
+
+    cache, app_module.medical_info_cache = app_module.medical_info_cache, MedicalInfoCache(
+        service, _translator(RecordingBackend()))
+    try:
+        app_module.medical_info_cache.get('Scoliosis')
+        app_module.medical_info_cache.drain()
+        page = client.get(f'/prediction/{prediction_id}').get_data(as_text=True)
+    finally:
+        app_module.medical_info_cache = cache
+    assert 'Search result 1 for Scoliosis' in page
+
+
+if __name__ == "__main__":
+    print("🗂️ Testing the medical info cache")
+    print("=" * 40)
+
+    tests = [
+        test_localized_in_background_and_shared,
+        test_search_results_expire_and_revalidate,
+        test_failed_searches_retry_sooner,
+        test_result_page_in_selected_language,
+        test_fallback_is_not_pinned_to_predictions,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test keyset pagination of patients and prediction history
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app, reset_database, create_user, login
+
+
+def _setup(patients=45, predictions=0):
+    from models.database import db, Patient, Prediction
+
+    app = get_app()
+    reset_database(app)
+    _, patient_ids = create_user(app, patients=patients)
+
+    with app.app_context():
+        # Identical timestamps make the id tie-breaker do the work
+        same_time = datetime(2024, 5, 1, 12, 0, 0)
+        Patient.query.update({Patient.created_at: same_time})
+        for index in range(predictions):
+            db.session.add(Prediction(patient_id=patient_ids[0], image_path='demo_chest_xray.jpg',
+                                      body_part='chest', prediction_result='Normal' if index % 3 else 'Pneumonia',
+                                      confidence_score=0.8, created_at=same_time))
+        db.session.commit()
+
+    client = app.test_client()
+    login(client)
+    return app, client, patient_ids
+
+
+def _collect(client, url, key):
+    items, cursor, pages = [], None, 0
+    while True:
+        response = client.get(url, query_string={'limit': 20, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200
+        data = response.get_json()
+        items.extend(data[key])
+        pages += 1
+        cursor = data['next_cursor']
+        if not cursor:
+            return items, pages
+
+
+def test_patient_api_pages_through_everything():
+    """Every patient appears exactly once, newest first"""
+    _, client, patient_ids = _setup(patients=45)
+    patients, pages = _collect(client, '/api/patients', 'patients')
+
+    assert pages == 3
+    ids = [p['id'] for p in patients]
+    assert sorted(ids) == sorted(patient_ids)
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_prediction_history_api():
+    """Prediction history pages are complete and scoped to the user"""
+    _, client, patient_ids = _setup(patients=1, predictions=50)
+    predictions, pages = _collect(client, f'/api/patients/{patient_ids[0]}/predictions', 'predictions')
+
+    assert pages == 3
+    assert len({p['id'] for p in predictions}) == 50
+
+    assert client.get('/api/patients/9999/predictions').status_code == 404
+    assert client.get('/api/patients', query_string={'cursor': 'not-a-cursor'}).status_code == 400
+
+
+def test_templates_paginate():
+    """Dashboard and patient detail pages link to the next page"""
+    _, client, patient_ids = _setup(patients=25, predictions=25)
+
+    dashboard = client.get('/dashboard').get_data(as_text=True)
+    assert 'Older Patients' in dashboard
+    assert '25</div>' in dashboard  # total patient count, not page size
+
+    detail = client.get(f'/patient/{patient_ids[0]}').get_data(as_text=True)
+    assert 'Older Scans' in detail
+    assert '25 Total Scans' in detail
+
+
+if __name__ == "__main__":
+    print("📄 Testing keyset pagination")
+    print("=" * 40)
+
+    tests = [
+        test_patient_api_pages_through_everything,
+        test_prediction_history_api,
+        test_templates_paginate,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
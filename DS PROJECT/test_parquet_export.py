@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test image feature storage and the partitioned Parquet export
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app, reset_database, create_user, login
+
+DEMO_IMAGE = 'static/uploads/test_chest_normal.jpg'
+
+
+def test_upload_stores_features_once_per_image():
+    """Uploading the same image twice stores one feature row keyed by its hash"""
+    from models.database import db, ImageFeatures, Prediction
+    from models.features import image_hash, load_features
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    with open(DEMO_IMAGE, 'rb') as f:
+        image = f.read()
+    for name in ('first.jpg', 'second.jpg'):
+        response = client.post('/upload_predict', data={
+            'patient_id': patient_id, 'body_part': 'chest', 'image': (io.BytesIO(image), name)
+        }, content_type='multipart/form-data')
+        assert response.status_code == 200
+
+    with app.app_context():
+        hashes = {p.image_hash for p in Prediction.query.all()}
+        assert hashes == {image_hash(DEMO_IMAGE)}
+        assert ImageFeatures.query.count() == 1
+        with db.engine.connect() as connection:
+            features = load_features(connection, hashes.pop(), '1')
+    assert 0 < features['brightness'] < 255
+    assert features['image_quality'] in ('good', 'poor')
+
+
+def _seed(app, patient_id, count, start=0):
+    from models.database import db, Prediction
+    from models.features import features_row, store_features
+
+    with app.app_context():
+        rows = []
+        for index in range(start, start + count):
+            digest = f"{index:064x}"
+            rows.append(features_row(digest, '1', {
+                'brightness': 100 + index % 50, 'contrast': 40, 'sharpness': 0.5, 'noise_level': 0.2,
+                'dark_regions': 0.3, 'white_patches': 0.1, 'bone_density': 0.6, 'abnormal_patterns': 0.05,
+                'image_quality': 'good', 'filename_hints': []
+            }))
+            db.session.add(Prediction(
+                patient_id=patient_id, image_path=f'{index}.png',
+                body_part='chest' if index % 3 else 'hand',
+                prediction_result='Normal' if index % 2 else 'Fracture', confidence_score=0.8,
+                image_hash=digest, created_at=datetime(2024, 6, 1 + index % 4, 12)
+            ))
+        with db.engine.begin() as connection:
+            store_features(connection, rows)
+        db.session.commit()
+
+
+def test_parquet_export_is_partitioned_and_incremental():
+    """Rows land in date/body_part partitions and re-runs only export new rows"""
+    pytest.importorskip('pyarrow')
+    import pyarrow.dataset as ds
+    from models.database import db
+    from utils.parquet_export import ParquetExporter
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    _seed(app, patient_id, 60)
+
+    with tempfile.TemporaryDirectory() as out_dir, app.app_context():
+        exporter = ParquetExporter(db.engine, out_dir, chunk_size=7, out=io.StringIO())
+        assert exporter.run('1') == 60
+        assert os.path.isdir(os.path.join(out_dir, 'date=2024-06-01', 'body_part=hand'))
+
+        table = ds.dataset(out_dir, format='parquet', partitioning='hive').to_table()
+        assert table.num_rows == 60
+        assert set(table.column('body_part').to_pylist()) == {'chest', 'hand'}
+        assert None not in table.column('brightness').to_pylist()
+        assert table.column('patient_age').to_pylist()[0] == 30
+
+        _seed(app, patient_id, 5, start=60)
+        second = ParquetExporter(db.engine, out_dir, out=io.StringIO())
+        assert second.run('1') == 5
+        assert ParquetExporter(db.engine, out_dir, out=io.StringIO()).run('1') == 0
+        with open(os.path.join(out_dir, '_watermark.json')) as f:
+            assert json.load(f)['id'] == 65
+
+        ids = ds.dataset(out_dir, format='parquet', partitioning='hive').to_table().column('prediction_id')
+        assert sorted(ids.to_pylist()) == list(range(1, 66))
+
+
+def test_rows_committed_late_below_the_watermark_are_exported():
+    """A row whose id is below the watermark but committed after the last run is picked up once"""
+    pytest.importorskip('pyarrow')
+    import pyarrow.dataset as ds
+    from models.database import db, Prediction
+    from utils.parquet_export import ParquetExporter
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    _seed(app, patient_id, 10)
+
+    with tempfile.TemporaryDirectory() as out_dir, app.app_context():
+        # Row 4 was still in an uncommitted batch when the first run read past it
+        late = db.session.get(Prediction, 4)
+        values = {column.name: getattr(late, column.name) for column in Prediction.__table__.columns}
+        db.session.delete(late)
+        db.session.commit()
+        assert ParquetExporter(db.engine, out_dir, out=io.StringIO()).run('1') == 9
+
+        db.session.add(Prediction(**values))
+        db.session.commit()
+        assert ParquetExporter(db.engine, out_dir, out=io.StringIO()).run('1') == 1
+        assert ParquetExporter(db.engine, out_dir, out=io.StringIO()).run('1') == 0
+        with open(os.path.join(out_dir, '_watermark.json')) as f:
+            assert json.load(f)['id'] == 10
+
+        ids = ds.dataset(out_dir, format='parquet', partitioning='hive').to_table().column('prediction_id')
+        assert sorted(ids.to_pylist()) == list(range(1, 11))
+
+
+def test_duckdb_reads_export():
+    """The layout is queryable from DuckDB with hive partitioning"""
+    duckdb = pytest.importorskip('duckdb')
+    pytest.importorskip('pyarrow')
+    from models.database import db
+    from utils.parquet_export import ParquetExporter
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    _seed(app, patient_id, 12)
+
+    with tempfile.TemporaryDirectory() as out_dir, app.app_context():
+        ParquetExporter(db.engine, out_dir, out=io.StringIO()).run('1')
+        rows = duckdb.sql(
+            f"SELECT body_part, count(*) FROM read_parquet('{out_dir}/**/*.parquet', hive_partitioning = true) "
+            "GROUP BY body_part ORDER BY body_part"
+        ).fetchall()
+    assert rows == [('chest', 8), ('hand', 4)]
+
+
+if __name__ == "__main__":
+    print("📦 Testing Parquet export")
+    print("=" * 40)
+
+    tests = [
+        test_upload_stores_features_once_per_image,
+        test_parquet_export_is_partitioned_and_incremental,
+        test_rows_committed_late_below_the_watermark_are_exported,
+        test_duckdb_reads_export,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except pytest.skip.Exception as e:
+            print(f"⏭️  {test.__name__}: skipped ({e})")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
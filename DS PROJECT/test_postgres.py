@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test the Postgres profile: pool settings, COPY bulk paths and streamed exports.
+
+Integration tests start a throwaway Postgres cluster with initdb/pg_ctl in a
+temporary directory and are skipped when Postgres or psycopg2 is not installed.
+"""
+
+import atexit
+import io
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+import pytest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, func, select, text
+
+from models.bulk import copy_out, copy_rows
+from models.engine import database_url, engine_options_from_config
+
+_postgres = {}
+
+
+def _find_pg_binary(name):
+    found = shutil.which(name)
+    if found:
+        return found
+    try:
+        bindir = subprocess.check_output(['pg_config', '--bindir'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    candidate = os.path.join(bindir, name)
+    return candidate if os.path.exists(candidate) else None
+
+
+def postgres_url():
+    """Start (once) a throwaway Postgres cluster and return its URL"""
+    if 'url' in _postgres:
+        return _postgres['url']
+
+    try:
+        import psycopg2  # noqa: F401
+    except ImportError:
+        pytest.skip('psycopg2 is not installed')
+    initdb, pg_ctl = _find_pg_binary('initdb'), _find_pg_binary('pg_ctl')
+    if not initdb or not pg_ctl:
+        pytest.skip('Postgres server binaries (initdb/pg_ctl) not found')
+
+    data_dir = tempfile.mkdtemp(prefix='mediscan_pg_')
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    subprocess.run([initdb, '-D', data_dir, '-U', 'mediscan', '--auth=trust'], check=True,
+                   stdout=subprocess.DEVNULL)
+    subprocess.run([pg_ctl, '-D', data_dir, '-w', '-l', os.path.join(data_dir, 'server.log'),
+                    '-o', f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1", 'start'],
+                   check=True, stdout=subprocess.DEVNULL)
+
+    def stop():
+        subprocess.run([pg_ctl, '-D', data_dir, '-m', 'immediate', 'stop'], stdout=subprocess.DEVNULL)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    atexit.register(stop)
+    _postgres['url'] = f"postgresql://mediscan@127.0.0.1:{port}/postgres"
+    return _postgres['url']
+
+
+def postgres_engine():
+    """Engine built with the app's Postgres profile and a fresh schema"""
+    from models.database import db
+    from models.migrations import run_migrations
+
+    url = postgres_url()
+    engine = create_engine(url, **engine_options_from_config(url, {'GUNICORN_THREADS': 4}))
+    db.metadata.drop_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    db.metadata.create_all(engine)
+    run_migrations(engine)
+    return engine
+
+
+def _seed_patient(connection):
+    from models.database import User, Patient
+
+    user_id = connection.execute(User.__table__.insert().values(
+        name='Test Doctor', email='doctor@mediscan.com', phone='+91-98765-43210', password_hash='x'
+    ).returning(User.__table__.c.id)).scalar()
+    return connection.execute(Patient.__table__.insert().values(
+        user_id=user_id, name='Patient 0', age=40, gender='male', contact='+91-98765-12345'
+    ).returning(Patient.__table__.c.id)).scalar()
+
+
+def _prediction_rows(patient_id, count):
+    return [{
+        'patient_id': patient_id,
+        'image_path': f'import_{index}.png',
+        'body_part': 'chest',
+        'prediction_result': 'Normal' if index % 2 else 'Pneumonia',
+        'confidence_score': 0.5 + index / (2 * count),
+        'additional_info': '{"description": "line, with \\"quotes\\""}',
+        'medical_tips': '' if index % 3 else None,
+        'created_at': datetime(2024, 1, 1 + index % 28),
+    } for index in range(count)]
+
+
+def test_engine_options():
+    """Pool sizing follows the thread count and every connection is pre-pinged"""
+    url = database_url('postgres://user@db/mediscan')
+    assert url == 'postgresql://user@db/mediscan'
+
+    options = engine_options_from_config(url, {'GUNICORN_THREADS': '8', 'DB_STATEMENT_TIMEOUT_MS': '5000'})
+    assert options['pool_size'] == 9
+    assert options['max_overflow'] == 4
+    assert options['pool_pre_ping'] is True
+    assert options['connect_args']['options'] == '-c statement_timeout=5000'
+
+    assert engine_options_from_config(url, {'DB_POOL_SIZE': '3', 'DB_MAX_OVERFLOW': '0'})['max_overflow'] == 0
+    assert engine_options_from_config('sqlite:///mediscan.db', {}) == {}
+
+
+def test_bulk_paths_fall_back_on_sqlite():
+    """Without Postgres the same helpers use executemany and a streamed select"""
+    from models.database import db, Prediction
+    from test_helpers import get_app, reset_database, create_user
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            assert copy_rows(connection, Prediction.__table__, _prediction_rows(patient_id, 50)) == 50
+
+        out = io.StringIO()
+        with db.engine.connect() as connection:
+            count = copy_out(connection, select(Prediction.id, Prediction.medical_tips), out)
+    assert count == 50
+    assert out.getvalue().splitlines()[0] == 'id,medical_tips'
+
+
+def test_postgres_profile_connection():
+    """Connections carry the statement timeout and survive a server-side disconnect"""
+    engine = postgres_engine()
+    with engine.connect() as connection:
+        assert connection.execute(text("SHOW statement_timeout")).scalar() == '30s'
+        pid = connection.execute(text("SELECT pg_backend_pid()")).scalar()
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_terminate_backend(:pid)"), {'pid': pid})
+
+    # pool_pre_ping replaces the terminated connection instead of failing the request
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+    engine.dispose()
+
+
+def test_postgres_copy_round_trip():
+    """COPY imports keep NULLs, empty strings and quoting, and COPY exports every row"""
+    from models.database import Prediction
+
+    engine = postgres_engine()
+    rows = _prediction_rows(None, 12000)
+    with engine.begin() as connection:
+        patient_id = _seed_patient(connection)
+        for row in rows:
+            row['patient_id'] = patient_id
+        assert copy_rows(connection, Prediction.__table__, rows) == len(rows)
+
+    with engine.connect() as connection:
+        table = Prediction.__table__
+        assert connection.execute(select(func.count()).select_from(table)).scalar() == len(rows)
+        assert connection.execute(select(func.count()).where(table.c.medical_tips.is_(None))).scalar() == 4000
+        assert connection.execute(select(func.count()).where(table.c.medical_tips == '')).scalar() == 8000
+        assert connection.execute(select(table.c.additional_info).limit(1)).scalar() == rows[0]['additional_info']
+
+        out = io.StringIO()
+        count = copy_out(connection, select(table.c.id, table.c.created_at).order_by(table.c.id), out)
+    assert count == len(rows)
+    assert len(out.getvalue().splitlines()) == len(rows) + 1
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    print("🐘 Testing Postgres profile")
+    print("=" * 40)
+
+    tests = [
+        test_engine_options,
+        test_bulk_paths_fall_back_on_sqlite,
+        test_postgres_profile_connection,
+        test_postgres_copy_round_trip,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except pytest.skip.Exception as e:
+            print(f"⏭️  {test.__name__}: skipped ({e})")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test that prediction_stats stays in step with predictions and serves the dashboard
+"""
+
+import os
+import sys
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select
+
+from test_helpers import get_app, reset_database, create_user, login
+
+
+def _stats_rows(connection):
+    from models.database import PredictionStat
+
+    table = PredictionStat.__table__
+    return sorted(
+        (row.user_id, row.day, row.body_part, row.prediction_result, row.prediction_count,
+         round(row.confidence_sum, 6))
+        for row in connection.execute(select(table)) if row.prediction_count
+    )
+
+
+def _add(patient_id, result, day, body_part='chest', confidence=0.8):
+    from models.database import Prediction
+
+    return Prediction(patient_id=patient_id, image_path='scan.png', body_part=body_part,
+                      prediction_result=result, confidence_score=confidence,
+                      created_at=datetime(2024, 3, day, 10))
+
+
+def test_stats_follow_inserts_updates_and_deletes():
+    """ORM writes update the summary in the same transaction and match a full rebuild"""
+    from models.database import db, Prediction
+    from models.stats import rebuild_prediction_stats
+
+    app = get_app()
+    reset_database(app)
+    _, (first, second) = create_user(app, patients=2)
+
+    with app.app_context():
+        db.session.add_all([
+            _add(first, 'Normal', 1), _add(first, 'Normal', 1), _add(first, 'Pneumonia', 1, confidence=0.6),
+            _add(second, 'Fracture', 2, body_part='hand'), _add(second, 'Normal', 3),
+        ])
+        db.session.commit()
+
+        rescored = Prediction.query.filter_by(prediction_result='Pneumonia').one()
+        rescored.prediction_result = 'COVID-19'
+        db.session.delete(Prediction.query.filter_by(prediction_result='Fracture').one())
+        db.session.commit()
+
+        with db.engine.connect() as connection:
+            incremental = _stats_rows(connection)
+        with db.engine.begin() as connection:
+            rebuild_prediction_stats(connection)
+            rebuilt = _stats_rows(connection)
+
+    assert incremental == rebuilt
+    assert [row[3:5] for row in rebuilt] == [('COVID-19', 1), ('Normal', 2), ('Normal', 1)]
+
+
+def test_rolled_back_insert_leaves_stats_alone():
+    """Stats written during a flush roll back with the prediction"""
+    from models.database import db
+    from models.stats import user_prediction_totals
+
+    app = get_app()
+    reset_database(app)
+    user_id, (patient_id,) = create_user(app)
+
+    with app.app_context():
+        db.session.add(_add(patient_id, 'Normal', 1))
+        db.session.flush()
+        assert user_prediction_totals(user_id)['total'] == 1
+        db.session.rollback()
+        assert user_prediction_totals(user_id)['total'] == 0
+
+
+def test_bulk_rows_update_stats():
+    """Core bulk inserts apply the same increments as ORM inserts"""
+    from models.bulk import copy_rows
+    from models.database import db, Prediction
+    from models.stats import apply_increments, increments_for_rows, user_prediction_totals
+
+    app = get_app()
+    reset_database(app)
+    user_id, (patient_id,) = create_user(app)
+    rows = [{'patient_id': patient_id, 'image_path': f'{index}.png', 'body_part': 'chest',
+             'prediction_result': 'Normal' if index % 2 else 'Tuberculosis', 'confidence_score': 0.7,
+             'created_at': datetime(2024, 5, 1 + index % 3)} for index in range(10)]
+
+    with app.app_context():
+        connection = db.session.connection()
+        copy_rows(connection, Prediction.__table__, rows)
+        apply_increments(connection, increments_for_rows(connection, rows))
+        db.session.commit()
+        totals = user_prediction_totals(user_id)
+
+    assert totals['total'] == 10 and totals['normal'] == 5
+    assert abs(totals['avg_confidence'] - 0.7) < 1e-9
+
+
+def test_dashboard_and_analytics_endpoint():
+    """Dashboard cards and /api/analytics/summary read the aggregates"""
+    from models.database import db
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    with app.app_context():
+        db.session.add_all([_add(patient_id, 'Normal', 1), _add(patient_id, 'Pneumonia', 2),
+                            _add(patient_id, 'Fracture', 2, body_part='leg')])
+        db.session.add(_add(patient_id, 'Normal', 1))
+        db.session.commit()
+
+    client = app.test_client()
+    login(client)
+    summary = client.get('/api/analytics/summary?days=366').get_json()
+    assert summary['totals']['total'] == 4
+    assert summary['totals']['abnormal'] == 2
+    assert summary['totals']['abnormal_rate'] == 0.5
+    assert summary['by_condition'] == {'Fracture': 1, 'Normal': 2, 'Pneumonia': 1}
+    assert summary['by_body_part'] == {'chest': 3, 'leg': 1}
+
+    page = client.get('/dashboard').get_data(as_text=True)
+    assert 'Total Scans' in page
+
+
+if __name__ == "__main__":
+    print("📊 Testing prediction statistics")
+    print("=" * 40)
+
+    tests = [
+        test_stats_follow_inserts_updates_and_deletes,
+        test_rolled_back_insert_leaves_stats_alone,
+        test_bulk_rows_update_stats,
+        test_dashboard_and_analytics_endpoint,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test that every catalogued hot query is served by an index
+"""
+
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from test_helpers import get_app, reset_database
+
+INDEXES = [
+    'ix_patients_user_id_created_at',
+    'ix_predictions_patient_id_created_at',
+    'ix_predictions_created_at',
+    'ix_predictions_body_part_created_at',
+]
+
+
+def test_catalog_uses_indexes():
+    """No catalog query falls back to a full table scan"""
+    from models.database import db
+    from models.query_catalog import check_query_plans
+
+    app = get_app()
+    reset_database(app)
+    with app.app_context():
+        results = check_query_plans(db.engine)
+
+    assert results
+    bad = {r['name']: r['plan'] for r in results if r['full_scans']}
+    assert not bad, f"full scans: {bad}"
+
+
+def test_migration_restores_missing_indexes():
+    """Databases created before the indexes existed are fixed by the migration"""
+    from models.database import db
+    from models.migrations import run_migrations
+    from models.query_catalog import check_query_plans
+
+    app = get_app()
+    reset_database(app)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            for name in INDEXES:
+                connection.execute(text(f"DROP INDEX {name}"))
+            connection.execute(text("DELETE FROM schema_migrations"))
+
+        assert any(r['full_scans'] for r in check_query_plans(db.engine))
+
+        assert '0001_hot_query_indexes' in run_migrations(db.engine)
+        assert run_migrations(db.engine) == []
+        assert not any(r['full_scans'] for r in check_query_plans(db.engine))
+
+
+def test_migration_applied_by_another_worker_is_skipped():
+    """Losing a migration race to another worker's DDL is not an error; a real failure still is"""
+    from datetime import datetime
+
+    from sqlalchemy.exc import OperationalError
+    from models import migrations
+    from models.database import db
+
+    def applied_meanwhile(connection):
+        with db.engine.begin() as other:
+            other.execute(text("INSERT INTO schema_migrations (name, applied_at) VALUES ('9999_race', :now)"),
+                          {'now': datetime.utcnow()})
+        connection.execute(text("CREATE TABLE predictions (id INTEGER PRIMARY KEY)"))
+
+    def broken(connection):
+        connection.execute(text("CREATE TABLE predictions (id INTEGER PRIMARY KEY)"))
+
+    app = get_app()
+    reset_database(app)
+    original = migrations.MIGRATIONS
+    try:
+        with app.app_context():
+            migrations.MIGRATIONS = original + [('9999_race', applied_meanwhile)]
+            assert migrations.run_migrations(db.engine) == []
+
+            migrations.MIGRATIONS = original + [('9999_broken', broken)]
+            try:
+                migrations.run_migrations(db.engine)
+            except OperationalError:
+                pass
+            else:
+                raise AssertionError("a failing migration was swallowed")
+    finally:
+        migrations.MIGRATIONS = original
+        with app.app_context(), db.engine.begin() as connection:
+            connection.execute(text("DELETE FROM schema_migrations WHERE name LIKE '9999%'"))
+
+
+def test_full_scan_detection():
+    """Plan parsing flags table scans but not index scans or subqueries"""
+    from models.query_catalog import full_scans
+
+    tables = {'patients', 'predictions'}
+    assert full_scans('sqlite', ['SCAN predictions'], tables) == ['predictions']
+    assert full_scans('sqlite', ['SCAN predictions USING INDEX ix_predictions_created_at'], tables) == []
+    assert full_scans('sqlite', ['SCAN (subquery-3)', 'SCAN anon_1'], tables) == []
+    assert full_scans('postgresql', ['Seq Scan on patients  (cost=0.00..1.01 rows=1 width=4)'], tables) == ['patients']
+    assert full_scans('postgresql', ['Index Scan using ix_patients_user_id_created_at on patients'], tables) == []
+
+
+if __name__ == "__main__":
+    print("🔎 Testing query plans")
+    print("=" * 40)
+
+    tests = [
+        test_catalog_uses_indexes,
+        test_migration_restores_missing_indexes,
+        test_migration_applied_by_another_worker_is_skipped,
+        test_full_scan_detection,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
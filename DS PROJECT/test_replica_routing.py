@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test read-replica routing with a second SQLite database standing in for the replica
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, insert, select
+
+from test_helpers import TEST_DIR, get_app, reset_database, create_user, login
+
+
+@contextmanager
+def replica(app):
+    """Attach an empty replica database holding a copy of the users table"""
+    from models.database import db, User
+    from models.routing import REPLICA_BIND
+
+    path = os.path.join(TEST_DIR, 'replica.db')
+    if os.path.exists(path):
+        os.remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    with app.app_context():
+        db.metadata.create_all(engine)
+        users = [dict(row._mapping) for row in db.session.execute(select(User.__table__))]
+        with engine.begin() as connection:
+            connection.execute(insert(User.__table__), users)
+        db.engines[REPLICA_BIND] = engine
+    try:
+        yield engine
+    finally:
+        with app.app_context():
+            del db.engines[REPLICA_BIND]
+        engine.dispose()
+
+
+def _add_replica_patient(engine, user_id, name):
+    from models.database import Patient
+
+    with engine.begin() as connection:
+        return connection.execute(insert(Patient.__table__).values(
+            user_id=user_id, name=name, age=50, gender='male', contact='+91-98765-12345'
+        )).inserted_primary_key[0]
+
+
+def test_read_only_views_use_replica():
+    """Dashboard and JSON APIs read from the replica"""
+    app = get_app()
+    reset_database(app)
+    user_id, _ = create_user(app, patients=0)
+    client = app.test_client()
+    login(client)
+
+    with replica(app) as engine:
+        _add_replica_patient(engine, user_id, 'Replica Only')
+        # Login wrote nothing, so there is no sticky window to wait out
+        assert b'Replica Only' in client.get('/dashboard').data
+        names = [p['name'] for p in client.get('/api/patients').get_json()['patients']]
+        assert names == ['Replica Only']
+
+
+def test_writes_go_to_primary_and_read_your_writes():
+    """A new patient is written to the primary and visible right after the commit"""
+    from models.database import db, Patient
+
+    app = get_app()
+    app.config['REPLICA_STICKY_SECONDS'] = 10
+    reset_database(app)
+    user_id, _ = create_user(app, patients=0)
+    client = app.test_client()
+    login(client)
+
+    with replica(app) as engine:
+        response = client.post('/patient_form', data={
+            'name': 'Fresh Patient', 'age': 34, 'gender': 'female', 'contact': '+91-98765-12345'
+        })
+        assert response.status_code == 302
+
+        with app.app_context():
+            assert Patient.query.filter_by(name='Fresh Patient').count() == 1
+        with engine.connect() as connection:
+            assert connection.execute(select(Patient.__table__).where(Patient.name == 'Fresh Patient')).first() is None
+
+        # The replica has not caught up, but the sticky window keeps this user on the primary
+        assert b'Fresh Patient' in client.get('/dashboard').data
+
+        app.config['REPLICA_STICKY_SECONDS'] = 0
+        assert b'Fresh Patient' not in client.get('/dashboard').data
+    app.config['REPLICA_STICKY_SECONDS'] = 10
+
+
+def test_streamed_batch_upload_pins_to_primary():
+    """Rows committed while a batch upload streams are read back from the primary"""
+    import io
+
+    app = get_app()
+    app.config['REPLICA_STICKY_SECONDS'] = 10
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    client = app.test_client()
+    login(client)
+
+    with open('static/uploads/test_chest_normal.jpg', 'rb') as f:
+        image = f.read()
+    with replica(app):
+        response = client.post('/upload_batch', data={
+            'patient_id': str(patient_id), 'body_part': 'chest', 'images': [(io.BytesIO(image), 'scan.jpg')]
+        }, content_type='multipart/form-data')
+        assert response.status_code == 200
+        response.get_data()
+
+        predictions = client.get(f'/api/patients/{patient_id}/predictions').get_json()['predictions']
+        assert len(predictions) == 1
+
+
+def test_no_replica_configured_uses_primary():
+    """Without a replica bind every query uses the primary"""
+    app = get_app()
+    reset_database(app)
+    create_user(app)
+    client = app.test_client()
+    login(client)
+
+    assert b'Patient 0' in client.get('/dashboard').data
+
+
+if __name__ == "__main__":
+    print("🔀 Testing read-replica routing")
+    print("=" * 40)
+
+    tests = [
+        test_read_only_views_use_replica,
+        test_writes_go_to_primary_and_read_your_writes,
+        test_streamed_batch_upload_pins_to_primary,
+        test_no_replica_configured_uses_primary,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test re-scoring prediction history from stored image features
+"""
+
+import io
+import os
+import sys
+from datetime import datetime
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import select
+
+from test_helpers import get_app, reset_database, create_user
+
+PIPELINE_VERSION = '1'
+
+
+def _features(image_hash, **values):
+    from models.features import FEATURE_FIELDS
+
+    row = {name: 0.3 for name in FEATURE_FIELDS}
+    row.update(values)
+    row.update({'image_hash': image_hash, 'pipeline_version': PIPELINE_VERSION,
+                'image_quality': 'good', 'filename_hints': None, 'created_at': datetime.utcnow()})
+    return row
+
+
+def _seed(app):
+    """Three chest predictions stored as Normal: one consolidated, one clear, one without features"""
+    from models.database import db, Prediction
+    from models.features import store_features
+
+    _, (patient_id,) = create_user(app)
+    with app.app_context():
+        with db.engine.begin() as connection:
+            store_features(connection, [
+                _features('a' * 64, white_patches=0.2, abnormal_patterns=0.05),
+                _features('b' * 64, white_patches=0.05, dark_regions=0.1, abnormal_patterns=0.02),
+            ])
+        # Image files do not exist: rescoring must only read stored features
+        db.session.add_all([
+            Prediction(patient_id=patient_id, image_path=f"missing_{n}.png", body_part='chest',
+                       prediction_result='Normal', confidence_score=0.9, image_hash=image_hash,
+                       created_at=datetime(2024, 3, 1, 10))
+            for n, image_hash in enumerate(['a' * 64, 'b' * 64, None])
+        ])
+        db.session.commit()
+
+
+def _results(app):
+    from models.database import db, Prediction
+
+    with app.app_context():
+        return [row.prediction_result for row in Prediction.query.order_by(Prediction.id)]
+
+
+def test_dry_run_reports_without_writing():
+    """Without apply the rescore only reports the predictions that would change"""
+    from models.database import db
+    from app import ml_predictor, medical_info
+    from utils.rescore import Rescorer
+
+    app = get_app()
+    reset_database(app)
+    _seed(app)
+
+    with app.app_context():
+        rescorer = Rescorer(db.engine, ml_predictor, medical_info, batch_size=2, out=io.StringIO())
+        changed = rescorer.run(PIPELINE_VERSION)
+
+    assert changed == 1
+    assert (rescorer.scanned, rescorer.skipped) == (3, 1)
+    assert rescorer.transitions == {('chest', 'Normal', 'Pneumonia'): 1}
+    assert _results(app) == ['Normal', 'Normal', 'Normal']
+
+
+def test_apply_updates_predictions_and_stats():
+    """Applied changes update the prediction, its medical content and prediction_stats"""
+    from models.database import db, Prediction, PredictionStat
+    from models.stats import rebuild_prediction_stats
+    from app import ml_predictor, medical_info
+    from utils.rescore import Rescorer
+
+    app = get_app()
+    reset_database(app)
+    _seed(app)
+
+    def stats(connection):
+        table = PredictionStat.__table__
+        return sorted((row.prediction_result, row.prediction_count, round(row.confidence_sum, 6))
+                      for row in connection.execute(select(table)) if row.prediction_count)
+
+    with app.app_context():
+        Rescorer(db.engine, ml_predictor, medical_info, out=io.StringIO()).run(PIPELINE_VERSION, apply=True)
+        rescored = Prediction.query.filter_by(prediction_result='Pneumonia').one()
+        assert rescored.image_hash == 'a' * 64
+        assert rescored.medical_content.condition == 'Pneumonia'
+
+        with db.engine.connect() as connection:
+            incremental = stats(connection)
+        with db.engine.begin() as connection:
+            rebuild_prediction_stats(connection)
+            rebuilt = stats(connection)
+
+    assert _results(app) == ['Pneumonia', 'Normal', 'Normal']
+    assert incremental == rebuilt
+
+
+if __name__ == "__main__":
+    print("🔁 Testing rescore")
+    print("=" * 40)
+
+    tests = [
+        test_dry_run_reports_without_writing,
+        test_apply_updates_predictions_and_stats,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
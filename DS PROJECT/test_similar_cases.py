@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Test the similar-case index and /api/similar
+"""
+
+import io
+import os
+import sys
+
+import numpy as np
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app, reset_database, create_user, login
+
+CHEST_IMAGES = ['static/uploads/realistic_chest_normal.jpg', 'static/uploads/realistic_chest_pneumonia.jpg',
+                'static/uploads/realistic_chest_covid.jpg']
+HAND_IMAGE = 'static/uploads/realistic_hand_fracture.jpg'
+
+
+def _brute_force(vectors, query, k):
+    distances = np.sqrt(((vectors - query) ** 2).sum(axis=1))
+    order = np.argsort(distances, kind='stable')[:k]
+    return [int(i) for i in order]
+
+
+def test_exact_search_and_filters():
+    """Exact search matches a linear scan and respects owner, group and exclusions"""
+    from utils.similar_cases import SimilarCaseIndex
+
+    rng = np.random.default_rng(1)
+    vectors = rng.random((3000, 8), dtype=np.float32)
+    index = SimilarCaseIndex(mode='exact', capacity=16)
+    for item_id, vector in enumerate(vectors):
+        index.add(item_id, vector, owner=item_id % 3, group='chest' if item_id % 2 else 'hand')
+    assert len(index) == 3000
+
+    query = vectors[10]
+    assert [item_id for item_id, _ in index.search(query, k=5)] == _brute_force(vectors, query, 5)
+
+    matches = index.search(query, k=5, owner=1, group='chest', exclude=10)
+    assert len(matches) == 5
+    assert all(item_id % 3 == 1 and item_id % 2 == 1 and item_id != 10 for item_id, _ in matches)
+    assert [d for _, d in matches] == sorted(d for _, d in matches)
+    assert index.search(query, group='skull') == []
+
+
+def test_ivf_search_recall():
+    """Inverted-list search finds nearly all of the exact nearest neighbours"""
+    from utils.similar_cases import SimilarCaseIndex
+
+    rng = np.random.default_rng(2)
+    centers = rng.random((40, 8), dtype=np.float32)
+    vectors = (centers[rng.integers(0, 40, 20000)] + rng.normal(0, 0.03, (20000, 8))).astype(np.float32)
+    index = SimilarCaseIndex(ivf_threshold=len(vectors), nprobe=8)
+    for item_id, vector in enumerate(vectors):
+        index.add(item_id, vector, owner=1, group='chest')
+    assert index.centroids is not None
+
+    found = total = 0
+    for query in vectors[:100]:
+        expected = set(_brute_force(vectors, query, 10))
+        found += len(expected & {item_id for item_id, _ in index.search(query, k=10)})
+        total += len(expected)
+    assert found / total >= 0.9
+
+    # Inserts after training go to their nearest list and are searchable
+    index.add(99999, vectors[0], owner=1, group='chest')
+    assert 99999 in [item_id for item_id, _ in index.search(vectors[0], k=3)]
+
+
+def test_small_tenant_in_ivf_index_is_scanned_exactly():
+    """A clinician with few cases gets all their nearest neighbours, not just those in the probed lists"""
+    from utils.similar_cases import SimilarCaseIndex
+
+    rng = np.random.default_rng(3)
+    vectors = rng.random((5000, 8), dtype=np.float32)
+    index = SimilarCaseIndex(ivf_threshold=len(vectors), nprobe=1)
+    for item_id, vector in enumerate(vectors):
+        index.add(item_id, vector, owner=2 if item_id % 250 == 0 else 1, group='chest')
+    assert index.centroids is not None
+
+    small = vectors[::250]
+    query = vectors[0]
+    expected = [int(i) * 250 for i in _brute_force(small, query, 10)]
+    assert [item_id for item_id, _ in index.search(query, k=10, owner=2)] == expected
+
+
+def test_rows_committed_late_are_indexed():
+    """A case whose id is below ones already loaded, but committed after them, still shows up"""
+    from models.database import db, Prediction
+    from models.features import features_row, store_features
+    from utils.similar_cases import SimilarCases
+
+    app = get_app()
+    reset_database(app)
+    user_id, (patient_id,) = create_user(app)
+    with app.app_context():
+        rows = []
+        for number in range(1, 6):
+            digest = f"{number:064x}"
+            rows.append(features_row(digest, '1', {
+                'brightness': 100 + number, 'contrast': 40, 'sharpness': 0.5, 'noise_level': 0.2,
+                'dark_regions': 0.3, 'white_patches': 0.1, 'bone_density': 0.6, 'abnormal_patterns': 0.05,
+                'image_quality': 'good', 'filename_hints': []
+            }))
+            db.session.add(Prediction(id=number, patient_id=patient_id, image_path=f'{number}.png',
+                                      body_part='chest', prediction_result='Normal', confidence_score=0.9,
+                                      image_hash=digest))
+        with db.engine.begin() as connection:
+            store_features(connection, rows)
+        db.session.commit()
+        late = db.session.get(Prediction, 3)
+        values = {column.name: getattr(late, column.name) for column in Prediction.__table__.columns}
+        db.session.delete(late)
+        db.session.commit()
+
+        cases = SimilarCases('1')
+        with db.engine.connect() as connection:
+            assert [case for case, _ in cases.similar(connection, 1, user_id, 'chest', k=10)] == [2, 4, 5]
+
+        # Row 3 was still in an uncommitted batch during that refresh
+        db.session.add(Prediction(**values))
+        db.session.commit()
+        with db.engine.connect() as connection:
+            assert [case for case, _ in cases.similar(connection, 1, user_id, 'chest', k=10)] == [2, 3, 4, 5]
+
+
+def test_similar_api():
+    """/api/similar returns the clinician's other cases of the same body part, nearest first"""
+    from models.database import Prediction
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    _, (other_patient,) = create_user(app, email='other@example.com')
+
+    client = app.test_client()
+    login(client)
+    for path in CHEST_IMAGES + [HAND_IMAGE]:
+        with open(path, 'rb') as f:
+            body_part = 'hand' if path == HAND_IMAGE else 'chest'
+            response = client.post('/upload_predict', data={
+                'patient_id': patient_id, 'body_part': body_part,
+                'image': (io.BytesIO(f.read()), os.path.basename(path))
+            }, content_type='multipart/form-data')
+            assert response.status_code == 200
+
+    with app.app_context():
+        first = Prediction.query.order_by(Prediction.id).first()
+
+    data = client.get(f'/api/similar/{first.id}?k=10').get_json()
+    similar = data['similar']
+    assert data['prediction_id'] == first.id
+    assert len(similar) == 2
+    assert all(case['body_part'] == 'chest' and case['id'] != first.id for case in similar)
+    assert similar[0]['distance'] <= similar[1]['distance']
+
+    other = app.test_client()
+    login(other, email='other@example.com')
+    assert other.get(f'/api/similar/{first.id}').status_code == 404
+
+
+if __name__ == "__main__":
+    print("🔍 Testing similar-case retrieval")
+    print("=" * 40)
+
+    tests = [
+        test_exact_search_and_filters,
+        test_ivf_search_recall,
+        test_small_tenant_in_ivf_index_is_scanned_exactly,
+        test_rows_committed_late_are_indexed,
+        test_similar_api,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite production profile and the write queue
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, text
+
+from models.engine import SQLITE_PRODUCTION_PRAGMAS, apply_sqlite_pragmas, sqlite_pragmas_from_config
+from test_helpers import get_app, reset_database, create_user
+
+
+def test_app_connections_use_production_pragmas():
+    """Every pooled connection gets WAL, busy timeout and relaxed sync"""
+    from models.database import db
+
+    app = get_app()
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -64000
+
+
+def test_profile_config():
+    """The default profile leaves SQLite alone and settings can be overridden"""
+    assert sqlite_pragmas_from_config({'SQLITE_PROFILE': 'default'}) == {}
+    pragmas = sqlite_pragmas_from_config({'SQLITE_BUSY_TIMEOUT': '250'})
+    assert pragmas['busy_timeout'] == '250'
+    assert pragmas['journal_mode'] == 'WAL'
+
+
+def test_reads_not_blocked_by_open_write():
+    """With WAL a reader sees the last commit while a write transaction is open"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'wal.db')}")
+        apply_sqlite_pragmas(engine, dict(SQLITE_PRODUCTION_PRAGMAS, busy_timeout=100))
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+            conn.execute(text("INSERT INTO t (id) VALUES (1)"))
+
+        writer = engine.connect()
+        transaction = writer.begin()
+        writer.execute(text("INSERT INTO t (id) VALUES (2)"))
+        writer.execute(text("UPDATE t SET id = 3 WHERE id = 2"))
+
+        started = time.perf_counter()
+        with engine.connect() as reader:
+            assert reader.execute(text("SELECT COUNT(*) FROM t")).scalar() == 1
+        assert time.perf_counter() - started < 0.1
+
+        transaction.commit()
+        writer.close()
+        engine.dispose()
+
+
+def test_write_queue_batches_commits():
+    """Concurrent submissions are committed together by the writer thread"""
+    from models.database import Prediction
+    from models.write_queue import WriteQueue
+    from models.database import db
+
+    app = get_app()
+    reset_database(app)
+    _, (patient_id,) = create_user(app)
+    queue = WriteQueue(app, db, max_batch=50, max_wait=0.05)
+
+    def insert(index):
+        def job(session):
+            prediction = Prediction(patient_id=patient_id, image_path=f'{index}.png', body_part='chest',
+                                    prediction_result='Normal', confidence_score=0.9)
+            session.add(prediction)
+            session.flush()
+            return prediction.id
+        return job
+
+    futures = []
+    threads = [threading.Thread(target=lambda i=i: futures.append(queue.submit(insert(i)))) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    ids = [future.result(timeout=10) for future in futures]
+    queue.stop()
+
+    assert len(set(ids)) == 20
+    assert queue.batches < 20
+    with app.app_context():
+        assert Prediction.query.filter_by(patient_id=patient_id).count() == 20
+
+
+def test_write_queue_isolates_failures():
+    """A failing job only fails its own future"""
+    from models.database import db, Patient
+    from models.write_queue import WriteQueue
+
+    app = get_app()
+    reset_database(app)
+    user_id, _ = create_user(app, patients=0)
+    queue = WriteQueue(app, db, max_wait=0.05)
+
+    def good(session):
+        session.add(Patient(user_id=user_id, name='Queued', age=40, gender='male', contact='+91-98765-12345'))
+        session.flush()
+        return 'ok'
+
+    def bad(session):
+        session.add(Patient(user_id=user_id, name=None, age=40, gender='male', contact='+91-98765-12345'))
+        session.flush()
+
+    futures = [queue.submit(good), queue.submit(bad), queue.submit(good)]
+    assert futures[0].result(timeout=10) == 'ok'
+    assert futures[2].result(timeout=10) == 'ok'
+    assert futures[1].exception(timeout=10) is not None
+    queue.stop()
+
+    with app.app_context():
+        assert Patient.query.filter_by(user_id=user_id).count() == 2
+
+
+if __name__ == "__main__":
+    print("🗄️  Testing SQLite production profile")
+    print("=" * 40)
+
+    tests = [
+        test_app_connections_use_production_pragmas,
+        test_profile_config,
+        test_reads_not_blocked_by_open_write,
+        test_write_queue_batches_commits,
+        test_write_queue_isolates_failures,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test batched translation against a local fake LibreTranslate server
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.medical_info import MedicalInfoService
+from utils.translation_backends import LibreTranslateBackend
+from utils.translator import TranslationService
+
+LATENCY = 0.05
+
+
+class FakeTranslator(BaseHTTPRequestHandler):
+    """LibreTranslate-style /translate that upper-cases text after a fixed delay"""
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.calls += 1
+        time.sleep(server.latency)
+
+        # Each segment is "translated" separately, the way a real translator keeps sentences apart
+        text = payload['q']
+        if server.drop_delimiters:
+            text = text.replace('⁂', '')
+        segments = [f"{payload['target']}:{segment.strip().upper()}" for segment in text.split('⁂')]
+        body = json.dumps({'translatedText': '\n⁂ \n'.join(segments)})
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body.encode('utf-8'))))
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+def _server(latency=LATENCY, drop_delimiters=False):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeTranslator)
+    server.calls = 0
+    server.lock = threading.Lock()
+    server.latency = latency
+    server.drop_delimiters = drop_delimiters
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _service(server, **options):
+    backend = LibreTranslateBackend(f"http://127.0.0.1:{server.server_port}", timeout=5)
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    return TranslationService(cache_path=path, backend=backend, **options)
+
+
+def test_medical_info_is_translated_in_one_call():
+    """A medical info dict costs one upstream call instead of one per string, and is faster"""
+    server = _server()
+    try:
+        info = MedicalInfoService().get_medical_info('Pneumonia')
+        strings = [v for v in info.values() if isinstance(v, str)] + \
+                  [item for v in info.values() if isinstance(v, list) for item in v if isinstance(item, str)]
+        unique = len(set(s for s in strings if s))
+        assert unique >= 5
+
+        serial = _service(server)
+        started = time.perf_counter()
+        expected = {s: serial.translate_text(s, 'ta') for s in strings}
+        serial_time = time.perf_counter() - started
+        assert server.calls == unique
+
+        server.calls = 0
+        batched = _service(server)
+        started = time.perf_counter()
+        translated = batched.translate_dict(info, 'ta')
+        batched_time = time.perf_counter() - started
+
+        assert server.calls == 1
+        assert batched_time < serial_time / 3
+        for key, value in info.items():
+            if isinstance(value, str):
+                assert translated[key] == expected[value]
+            elif isinstance(value, list):
+                assert translated[key] == [expected[item] if isinstance(item, str) else item for item in value]
+    finally:
+        server.shutdown()
+
+
+def test_duplicates_and_cache_hits_stay_local():
+    """Repeated strings are sent once and cached strings are not sent at all"""
+    server = _server()
+    try:
+        service = _service(server)
+        assert service.translate_batch(['Rest', 'Rest', '', 'Drink water'], 'hi') == \
+            ['hi:REST', 'hi:REST', '', 'hi:DRINK WATER']
+        assert server.calls == 1
+        assert service.translate_batch(['Drink water', 'Rest'], 'hi') == ['hi:DRINK WATER', 'hi:REST']
+        assert server.calls == 1
+        assert service.translate_batch(['Rest'], 'en') == ['Rest']
+    finally:
+        server.shutdown()
+
+
+def test_chunks_run_concurrently():
+    """Misses too long for one call are split into chunks sent in parallel"""
+    server = _server(latency=0.2)
+    try:
+        service = _service(server, max_concurrency=4)
+        service.MAX_BATCH_CHARS = 60
+        texts = [f"instruction number {i}" for i in range(8)]
+        started = time.perf_counter()
+        translated = service.translate_batch(texts, 'ta')
+        elapsed = time.perf_counter() - started
+
+        assert translated == [f"ta:{text.upper()}" for text in texts]
+        assert 2 <= server.calls <= 4
+        assert elapsed < 0.2 * server.calls * 0.75
+    finally:
+        server.shutdown()
+
+
+def test_lost_delimiters_fall_back_to_single_calls():
+    """If the translator mangles the delimiters each string is translated on its own"""
+    server = _server(drop_delimiters=True)
+    try:
+        service = _service(server)
+        assert service.translate_batch(['Rest', 'Drink water', 'Sleep'], 'hi') == \
+            ['hi:REST', 'hi:DRINK WATER', 'hi:SLEEP']
+        assert server.calls == 4
+    finally:
+        server.shutdown()
+
+
+def test_deadline_returns_untranslated_text():
+    """A batch that misses its deadline comes back untranslated instead of hanging"""
+    server = _server(latency=1.0)
+    try:
+        service = _service(server)
+        started = time.perf_counter()
+        assert service.translate_batch(['Rest', 'Sleep'], 'hi', timeout=0.2) == ['Rest', 'Sleep']
+        assert time.perf_counter() - started < 0.8
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    print("🌐 Testing batched translation")
+    print("=" * 40)
+
+    tests = [
+        test_medical_info_is_translated_in_one_call,
+        test_duplicates_and_cache_hits_stay_local,
+        test_chunks_run_concurrently,
+        test_lost_delimiters_fall_back_to_single_calls,
+        test_deadline_returns_untranslated_text,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
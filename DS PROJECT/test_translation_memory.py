@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Test the translation memory: templated condition names and fuzzy template matches
+"""
+
+import os
+import sys
+import tempfile
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.medical_info import MedicalInfoService
+from utils.translation_memory import TranslationMemory
+from utils.translation_store import TranslationStore
+from utils.translator import TranslationService
+
+CONDITIONS = ['Pneumonia', 'COVID-19', 'Tuberculosis', 'Lung Cancer', 'Fracture', 'Arthritis']
+
+
+class CountingBackend:
+    """Upper-cases each delimited segment and counts how many strings went upstream"""
+
+    def __init__(self, mangle_placeholders=False):
+        self.segments = []
+        self.mangle_placeholders = mangle_placeholders
+
+    def translate(self, text, target_language, source_language='auto'):
+        parts = [part.strip() for part in text.split('⁂')]
+        self.segments.extend(parts)
+        if self.mangle_placeholders:
+            parts = [part.replace('{', '(').replace('}', ')') for part in parts]
+        return '\n⁂\n'.join(f"[{target_language}] {part.upper()}" for part in parts)
+
+
+def _cache_path():
+    return os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+
+
+def _service(backend, path=None, terms=CONDITIONS):
+    service = TranslationService(cache_path=path or _cache_path(), backend=backend)
+    service.memory.add_terms(terms)
+    return service
+
+
+def test_templates_replace_known_terms():
+    """Known terms become numbered placeholders; a bare term is left alone"""
+    memory = TranslationMemory(TranslationStore(_cache_path()), terms=['Lung Cancer', 'Pneumonia'])
+    assert memory.template('Medical condition detected: Lung Cancer') == \
+        ('Medical condition detected: {0}', ['Lung Cancer'])
+    assert memory.template('Pneumonia or Lung Cancer follow-up') == ('{0} or {1} follow-up', ['Pneumonia', 'Lung Cancer'])
+    assert memory.template('Pneumonia') == ('Pneumonia', [])
+    assert memory.template('Pneumonias are common') == ('Pneumonias are common', [])
+
+
+def test_templated_text_costs_one_call_per_template():
+    """Fallback descriptions and medical terms for every condition share two translated templates"""
+    service = MedicalInfoService()
+    descriptions = [service.get_fallback_info(condition)['description'] for condition in CONDITIONS[:5]]
+
+    # Without known terms every string is its own upstream translation
+    baseline = CountingBackend()
+    plain = TranslationService(cache_path=_cache_path(), backend=baseline)
+    plain.translate_batch([f"Medical condition: {condition}" for condition in CONDITIONS] + descriptions, 'hi')
+
+    backend = CountingBackend()
+    translator = _service(backend)
+    terms = translator.translate_medical_terms(CONDITIONS, 'hi')
+    translated = translator.translate_batch(descriptions, 'hi')
+
+    assert len(baseline.segments) == len(CONDITIONS) + len(descriptions)
+    assert sorted(backend.segments) == sorted(['Medical condition: {0}', 'Medical condition detected: {0}']
+                                              + CONDITIONS)
+    assert terms == [f"[hi] {condition.upper()}" for condition in CONDITIONS]
+    assert translated[3] == '[hi] MEDICAL CONDITION DETECTED: [hi] LUNG CANCER'
+    assert translator.get_metrics()['memory']['template_hits'] == 0
+
+    # Another string from a known template is assembled locally
+    before = len(backend.segments)
+    assert translator.translate_text('Medical condition detected: Arthritis', 'hi') == \
+        '[hi] MEDICAL CONDITION DETECTED: [hi] ARTHRITIS'
+    assert len(backend.segments) == before
+    assert translator.get_metrics()['memory']['template_hits'] == 1
+
+    # A new language translates the template and the term once
+    assert translator.translate_text('Medical condition detected: Fracture', 'ta') == \
+        '[ta] MEDICAL CONDITION DETECTED: [ta] FRACTURE'
+    assert backend.segments[before:] == ['Medical condition detected: {0}', 'Fracture']
+
+
+def test_fuzzy_match_fills_only_known_terms():
+    """A near-identical template is reused for known terms only; other text is never made a term"""
+    backend = CountingBackend()
+    path = _cache_path()
+    translator = _service(backend, path)
+    translator.translate_batch(['Medical condition detected: Pneumonia'], 'hi')
+
+    before = len(backend.segments)
+    assert translator.translate_batch(['Medical  condition detected:  Fracture'], 'hi') == \
+        ['[hi] MEDICAL CONDITION DETECTED: [hi] FRACTURE']
+    assert backend.segments[before:] == ['Fracture']
+    assert translator.get_metrics()['memory']['fuzzy_hits'] == 1
+
+    before = len(backend.segments)
+    assert translator.translate_batch(['Medical condition detected: not present'], 'hi') == \
+        ['[hi] MEDICAL CONDITION DETECTED: NOT PRESENT']
+    assert backend.segments[before:] == ['Medical condition detected: not present']
+    assert translator.get_metrics()['memory']['fuzzy_hits'] == 1
+    assert 'not present' not in translator.memory.terms
+
+    # Templates persist in the shared store, so a new worker matches fuzzily straight away
+    other = CountingBackend()
+    restarted = _service(other, path)
+    assert restarted.translate_text('Medical condition detected: lung cancer', 'hi') == \
+        '[hi] MEDICAL CONDITION DETECTED: [hi] LUNG CANCER'
+    assert other.segments == ['lung cancer']
+    assert restarted.memory.terms == set(CONDITIONS)
+
+
+def test_differences_outside_slots_are_not_reused():
+    """Near-identical text that changes a fixed word gets its own translation"""
+    backend = CountingBackend()
+    translator = _service(backend)
+    translator.translate_batch(['Monitor Pneumonia symptoms daily'], 'hi')
+
+    assert translator.translate_batch(['Monitor Fracture symptoms weekly'], 'hi') == \
+        ['[hi] MONITOR [hi] FRACTURE SYMPTOMS WEEKLY']
+    assert 'Monitor {0} symptoms weekly' in backend.segments
+    assert translator.translate_batch(['Monitor breathing symptoms closely'], 'hi') == \
+        ['[hi] MONITOR BREATHING SYMPTOMS CLOSELY']
+    assert translator.get_metrics()['memory']['fuzzy_hits'] == 0
+
+
+def test_mangled_placeholders_fall_back():
+    """If the translator breaks the placeholders the full string is translated instead"""
+    backend = CountingBackend(mangle_placeholders=True)
+    translator = _service(backend)
+    assert translator.translate_batch(['Medical condition detected: Pneumonia'], 'hi') == \
+        ['[hi] MEDICAL CONDITION DETECTED: PNEUMONIA']
+    assert translator.translate_text('Medical condition: Fracture', 'hi') == '[hi] MEDICAL CONDITION: FRACTURE'
+    assert translator.memory.match('Medical condition detected: Fracture', 'hi') is None
+
+
+if __name__ == "__main__":
+    print("🧠 Testing translation memory")
+    print("=" * 40)
+
+    tests = [
+        test_templates_replace_known_terms,
+        test_templated_text_costs_one_call_per_template,
+        test_fuzzy_match_fills_only_known_terms,
+        test_differences_outside_slots_are_not_reused,
+        test_mangled_placeholders_fall_back,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
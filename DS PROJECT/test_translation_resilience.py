@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test request coalescing, deadlines and the circuit breaker in front of the translator
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app, reset_database, create_user, login
+from utils.translation_backends import LibreTranslateBackend
+from utils.translator import TranslationService
+
+
+class StandInTranslator(BaseHTTPRequestHandler):
+    """LibreTranslate-style /translate with injectable latency and failures"""
+
+    def do_POST(self):
+        server = self.server
+        payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        with server.lock:
+            server.calls += 1
+        time.sleep(server.latency)
+
+        if server.failing:
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'translatedText': f"{payload['target']}:{payload['q'].upper()}"}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _server(latency=0.0, failing=False):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInTranslator)
+    server.calls = 0
+    server.lock = threading.Lock()
+    server.latency = latency
+    server.failing = failing
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _service(server, **options):
+    backend = LibreTranslateBackend(f"http://127.0.0.1:{server.server_port}", timeout=5)
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    return TranslationService(cache_path=path, backend=backend, **options)
+
+
+def test_concurrent_misses_share_one_call():
+    """Many threads missing on the same string at once cause a single upstream call"""
+    server = _server(latency=0.2)
+    try:
+        service = _service(server)
+        barrier = threading.Barrier(20)
+        results = []
+
+        def request():
+            barrier.wait()
+            results.append(service.translate_text('Fever', 'hi'))
+
+        threads = [threading.Thread(target=request) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ['hi:FEVER'] * 20
+        assert server.calls == 1
+        assert service.get_metrics()['coalesced'] >= 1
+    finally:
+        server.shutdown()
+
+
+def test_slow_upstream_hits_the_deadline():
+    """A slow call returns the source text at the deadline and is cached when it lands"""
+    server = _server(latency=0.6)
+    try:
+        service = _service(server, call_timeout=0.2)
+        started = time.perf_counter()
+        assert service.translate_text('Cough', 'ta') == 'Cough'
+        assert time.perf_counter() - started < 0.5
+
+        time.sleep(0.7)
+        assert service.translate_text('Cough', 'ta') == 'ta:COUGH'
+        assert server.calls == 1
+
+        metrics = service.get_metrics()['languages']['ta']
+        assert metrics['timeouts'] == 1
+        assert metrics['calls'] == 1 and metrics['errors'] == 1
+        assert metrics['p50_ms'] >= 600
+    finally:
+        server.shutdown()
+
+
+def test_breaker_opens_and_recovers():
+    """After repeated failures the upstream is skipped until a trial call succeeds"""
+    server = _server(failing=True)
+    try:
+        service = _service(server, breaker_failures=3, breaker_reset=0.3)
+        for word in ('one', 'two', 'three'):
+            assert service.translate_text(word, 'hi') == word
+        assert server.calls == 3
+        assert service.get_metrics()['circuit']['state'] == 'open'
+
+        # Open: answered with the source text without touching the upstream
+        assert service.translate_text('four', 'hi') == 'four'
+        assert service.translate_batch(['five', 'six'], 'hi') == ['five', 'six']
+        assert server.calls == 3
+
+        server.failing = False
+        time.sleep(0.35)
+        assert service.translate_text('four', 'hi') == 'hi:FOUR'
+        assert service.get_metrics()['circuit']['state'] == 'closed'
+
+        metrics = service.get_metrics()['languages']['hi']
+        assert metrics['errors'] == 3
+        assert metrics['rejected'] == 2
+    finally:
+        server.shutdown()
+
+
+def test_metrics_endpoint():
+    """/api/translation/metrics reports per-language metrics to signed-in users"""
+    app = get_app()
+    reset_database(app)
+    create_user(app)
+    client = app.test_client()
+    assert client.get('/api/translation/metrics').status_code == 302
+
+    login(client)
+    response = client.get('/api/translation/metrics')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['circuit']['state'] in ('closed', 'open', 'half_open')
+    assert isinstance(data['languages'], dict)
+
+
+if __name__ == "__main__":
+    print("🛡️  Testing translation resilience")
+    print("=" * 40)
+
+    tests = [
+        test_concurrent_misses_share_one_call,
+        test_slow_upstream_hits_the_deadline,
+        test_breaker_opens_and_recovers,
+        test_metrics_endpoint,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite translation store behind TranslationService
+"""
+
+import _thread
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.translation_store import TranslationStore
+
+
+def _write_entries(path, worker, count):
+    store = TranslationStore(path)
+    for i in range(count):
+        store.set(f"text {worker}-{i}", 'auto', 'hi', f"अनुवाद {worker}-{i}")
+
+
+def test_set_and_get():
+    """Entries are written immediately and read back by a fresh store"""
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    store = TranslationStore(path)
+    store.set('Hello', 'auto', 'hi', 'नमस्ते')
+
+    reopened = TranslationStore(path)
+    assert reopened.get('Hello', 'auto', 'hi') == 'नमस्ते'
+    assert reopened.get('Hello', 'auto', 'ta') is None
+    assert len(reopened) == 1
+
+
+def test_legacy_json_is_imported_once():
+    """The old JSON cache is imported on first open and left untouched"""
+    directory = tempfile.mkdtemp(prefix='translations_')
+    legacy = os.path.join(directory, 'translation_cache.json')
+    with open(legacy, 'w', encoding='utf-8') as f:
+        json.dump({'Hello, this is a test_auto_hi': 'हैलो, यह एक परीक्षण है',
+                   'snake_case term_auto_ta': 'பாம்பு'}, f, ensure_ascii=False)
+
+    path = os.path.join(directory, 'cache.db')
+    store = TranslationStore(path, legacy_json=legacy)
+    assert store.get('Hello, this is a test', 'auto', 'hi') == 'हैलो, यह एक परीक्षण है'
+    assert store.get('snake_case term', 'auto', 'ta') == 'பாம்பு'
+
+    # Later opens skip the import, so an entry changed since then stays changed
+    store.set('snake_case term', 'auto', 'ta', 'updated')
+    assert TranslationStore(path, legacy_json=legacy).import_json(legacy) == 0
+    assert store.get('snake_case term', 'auto', 'ta') == 'updated'
+    assert os.path.exists(legacy)
+
+
+def test_least_recently_used_entries_are_evicted():
+    """Beyond max_entries the entries used longest ago are dropped first"""
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    store = TranslationStore(path, max_entries=3, touch_interval=0)
+    for word in ('one', 'two', 'three'):
+        store.set(word, 'auto', 'hi', word.upper())
+        time.sleep(0.01)
+    store.get('one', 'auto', 'hi')
+    time.sleep(0.01)
+    store.set('four', 'auto', 'hi', 'FOUR')
+
+    assert store.evict() == 1
+    assert store.get('two', 'auto', 'hi') is None
+    assert [store.get(word, 'auto', 'hi') for word in ('one', 'three', 'four')] == ['ONE', 'THREE', 'FOUR']
+
+
+def test_concurrent_processes_keep_every_entry():
+    """Workers writing at the same time never lose each other's entries"""
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    TranslationStore(path)
+    processes = [multiprocessing.Process(target=_write_entries, args=(path, worker, 100)) for worker in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    store = TranslationStore(path)
+    assert len(store) == 400
+    assert store.get('text 3-99', 'auto', 'hi') == 'अनुवाद 3-99'
+
+
+def test_connections_of_exited_threads_are_closed():
+    """Short-lived threads do not leave a connection behind each"""
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    store = TranslationStore(path)
+    store.set('Hello', 'auto', 'hi', 'नमस्ते')
+
+    for _ in range(20):
+        thread = threading.Thread(target=store.get, args=('Hello', 'auto', 'hi'))
+        thread.start()
+        thread.join()
+    assert len(store.connections) <= 2
+    assert store.get('Hello', 'auto', 'hi') == 'नमस्ते'
+
+    # Threads coming and going concurrently, and a live thread not started by threading
+    errors = []
+    opened, pruned, done = threading.Event(), threading.Event(), threading.Event()
+
+    def foreign():
+        try:
+            connection = store.connection()
+            opened.set()
+            pruned.wait(10)
+            assert store.connection() is connection
+            assert store.get('Hello', 'auto', 'hi') == 'नमस्ते'
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def churn():
+        try:
+            for _ in range(20):
+                store.get('Hello', 'auto', 'hi')
+        except Exception as e:
+            errors.append(e)
+
+    _thread.start_new_thread(foreign, ())
+    assert opened.wait(10)
+    threads = [threading.Thread(target=lambda: [churn() for _ in range(5)]) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pruned.set()
+    assert done.wait(10)
+    assert errors == []
+
+
+def test_service_caches_in_store():
+    """TranslationService only calls the translator on a cache miss"""
+    from utils.translator import TranslationService
+
+    class FakeBackend:
+        calls = 0
+
+        def translate(self, text, target_language, source_language='auto'):
+            FakeBackend.calls += 1
+            return f"[{target_language}] {text}"
+
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    service = TranslationService(cache_path=path, backend=FakeBackend())
+    assert service.translate_text('Rest well', 'hi') == '[hi] Rest well'
+    assert service.translate_text('Rest well', 'hi') == '[hi] Rest well'
+    assert FakeBackend.calls == 1
+
+    reopened = TranslationService(cache_path=path, backend=FakeBackend())
+    assert reopened.translate_text('Rest well', 'hi') == '[hi] Rest well'
+    assert FakeBackend.calls == 1
+
+
+if __name__ == "__main__":
+    print("🗂️  Testing translation store")
+    print("=" * 40)
+
+    tests = [
+        test_set_and_get,
+        test_legacy_json_is_imported_once,
+        test_least_recently_used_entries_are_evicted,
+        test_concurrent_processes_keep_every_entry,
+        test_connections_of_exited_threads_are_closed,
+        test_service_caches_in_store,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
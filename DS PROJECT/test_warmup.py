@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Test background warm-up of the medical info and translation caches
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_helpers import get_app
+from utils.medical_info import MedicalInfoService
+from utils.medical_info_cache import MedicalInfoCache
+from utils.translator import TranslationService
+from utils.warmup import Warmup
+
+
+class RecordingBackend:
+    def __init__(self, failing=False):
+        self.calls = 0
+        self.failing = failing
+
+    def translate(self, text, target_language, source_language='auto'):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError('translator unreachable')
+        return '\n⁂\n'.join(f"[{target_language}] {part.strip()}" for part in text.split('⁂'))
+
+
+class FakeSearchService(MedicalInfoService):
+    def __init__(self):
+        super().__init__()
+        self.searches = []
+
+    def search_medical_info(self, condition):
+        self.searches.append(condition)
+        return {'condition': condition, 'description': f"About {condition}", 'medical_tips': [],
+                'precautions': [], 'source': 'online_search', 'references': []}
+
+
+class BlockedCache:
+    """Stands in for MedicalInfoCache; each pair waits until released"""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def warm(self, condition, language):
+        self.entered.set()
+        self.release.wait(5)
+        return True, False
+
+
+def _cache(backend, service=None):
+    path = os.path.join(tempfile.mkdtemp(prefix='translations_'), 'cache.db')
+    translator = TranslationService(cache_path=path, backend=backend,
+                                    catalog_dir=os.path.join(tempfile.mkdtemp(prefix='catalogs_'), 'catalogs'))
+    return MedicalInfoCache(service or MedicalInfoService(), translator)
+
+
+def test_warm_pairs_are_served_without_upstream_calls():
+    """After warm-up every condition is cached in every language and searched once"""
+    backend = RecordingBackend()
+    service = FakeSearchService()
+    cache = _cache(backend, service)
+    warmup = Warmup(cache, ['Pneumonia', 'Scoliosis', 'Pneumonia'], ['hi', 'en', 'ta'], rate=0)
+    assert warmup.pairs[:2] == [('Pneumonia', 'en'), ('Scoliosis', 'en')]
+
+    warmup.start()
+    warmup.thread.join(10)
+    assert warmup.ready()
+    assert warmup.snapshot()['warmed'] == 6
+    assert service.searches == ['Scoliosis']
+
+    calls = backend.calls
+    assert cache.get('Scoliosis', 'ta')['description'] == '[ta] About Scoliosis'
+    assert cache.get('Pneumonia', 'hi')['description'].startswith('[hi] ')
+    assert backend.calls == calls
+    assert service.searches == ['Scoliosis']
+    cache.drain()
+
+
+def test_rate_limit_and_failures():
+    """Pairs that call upstream are spaced by the rate limit; cached ones are not; failures still count as tried"""
+    cache = _cache(RecordingBackend(failing=True))
+    warmup = Warmup(cache, ['Pneumonia', 'Fracture', 'Arthritis'], ['en', 'hi'], rate=20)
+    started = time.monotonic()
+    warmup.start()
+    warmup.thread.join(10)
+    # The English pairs come from the tips database; only the three translations go upstream
+    assert time.monotonic() - started >= 2 / 20
+    assert warmup.ready()
+    assert (warmup.snapshot()['warmed'], warmup.snapshot()['failed']) == (3, 3)
+
+    # Once everything is cached a slow rate costs nothing
+    warm = _cache(RecordingBackend())
+    Warmup(warm, ['Pneumonia', 'Fracture'], ['en', 'hi'], rate=0).run()
+    rewarm = Warmup(warm, ['Pneumonia', 'Fracture'], ['en', 'hi'], rate=0.1)
+    started = time.monotonic()
+    rewarm.run()
+    assert time.monotonic() - started < 5
+    assert rewarm.snapshot()['warmed'] == 4
+
+
+def test_stop_and_resume():
+    """A stopped warm-up (or one whose thread was lost to a fork) resumes after the last finished pair"""
+    cache = BlockedCache()
+    warmup = Warmup(cache, ['Pneumonia', 'Fracture'], ['en', 'hi'], rate=0)
+    warmup.start()
+    assert cache.entered.wait(5)
+    threading.Timer(0.05, cache.release.set).start()
+    warmup.stop()
+    assert warmup.done == 1
+    assert not warmup.ready()
+
+    warmup.start()
+    warmup.thread.join(10)
+    assert warmup.ready()
+    assert warmup.done == 4
+
+
+def test_importing_the_app_does_not_warm_up():
+    """CLI commands import the app; only a serving process starts the warm-up"""
+    env = dict(os.environ, WARMUP_ENABLED='true')
+    script = "import app; assert app.warmup is not None and app.warmup.thread is None; print('idle')"
+    result = subprocess.run([sys.executable, '-c', script], env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert 'idle' in result.stdout
+
+
+def test_readiness_endpoint():
+    """/healthz is always up; /readyz answers 503 until the warm-up finishes"""
+    import app as app_module
+
+    app = get_app()
+    client = app.test_client()
+    assert client.get('/healthz').get_json() == {'status': 'ok'}
+    assert client.get('/readyz').status_code == 200
+
+    cache = BlockedCache()
+    warmup, app_module.warmup = app_module.warmup, Warmup(cache, ['Pneumonia'], ['en', 'hi'], rate=0)
+    try:
+        response = client.get('/readyz')
+        assert response.status_code == 503
+        assert response.get_json()['status'] == 'warming'
+        assert app_module.warmup.thread.is_alive()
+
+        cache.release.set()
+        app_module.warmup.thread.join(10)
+        response = client.get('/readyz')
+        assert response.status_code == 200
+        assert response.get_json()['pairs'] == 2
+    finally:
+        app_module.warmup = warmup
+
+
+if __name__ == "__main__":
+    print("🔥 Testing cache warm-up")
+    print("=" * 40)
+
+    tests = [
+        test_warm_pairs_are_served_without_upstream_calls,
+        test_rate_limit_and_failures,
+        test_stop_and_resume,
+        test_importing_the_app_does_not_warm_up,
+        test_readiness_endpoint,
+    ]
+
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            print(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n{len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
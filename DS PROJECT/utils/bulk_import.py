@@ -0,0 +1,310 @@
+import csv
+import hashlib
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+from werkzeug.utils import secure_filename
+
+from utils.dicom_reader import DicomImage, is_dicom
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.dcm', '.dicom'}
+
+# Per-process services, created once by the pool initializer
+_worker_predictor = None
+_worker_medical_info = None
+
+
+def _init_worker(log_config=None):
+    """Load the prediction services once per worker process"""
+    global _worker_predictor, _worker_medical_info
+    from multiprocessing.util import Finalize
+    from utils.enhanced_ml_model import EnhancedMLPredictor
+    from utils.medical_info import MedicalInfoService
+    from utils.prediction_log import prediction_log_from_config
+
+    _worker_predictor = EnhancedMLPredictor()
+    _worker_medical_info = MedicalInfoService()
+
+    # Each worker writes its own log files (the pid is in the file name).
+    # Pool workers skip atexit, so flush through a multiprocessing finalizer.
+    _worker_predictor.prediction_log = prediction_log_from_config(log_config or {})
+    if _worker_predictor.prediction_log is not None:
+        Finalize(_worker_predictor.prediction_log, _worker_predictor.prediction_log.close, exitpriority=10)
+
+
+def _predict_task(task):
+    """Copy one image into the upload folder and run feature extraction and prediction"""
+    from models.features import features_row, image_hash
+    from utils.duplicates import perceptual_hash
+
+    dest_path = os.path.join(task['upload_folder'], task['image_path'])
+    shutil.copyfile(task['source'], dest_path)
+
+    image_path = task['image_path']
+    body_part = task['body_part']
+    if is_dicom(dest_path):
+        dicom = DicomImage(dest_path)
+        image_path = f"{os.path.splitext(task['image_path'])[0]}.png"
+        dicom.save_preview(os.path.join(task['upload_folder'], image_path))
+        body_part = task['explicit_body_part'] or dicom.body_part or body_part
+
+    try:
+        perceptual = perceptual_hash(os.path.join(task['upload_folder'], image_path))
+    except Exception:
+        perceptual = None
+
+    prediction, confidence, features = _worker_predictor.predict_with_features(
+        dest_path, body_part, task['age'], task['gender'])
+    medical_info_data = _worker_medical_info.get_medical_info(prediction)
+    image_features = None
+    if features is not None:
+        image_features = features_row(image_hash(dest_path), _worker_predictor.FEATURE_PIPELINE_VERSION, features)
+
+    return {
+        'patient_id': task['patient_id'],
+        'image_path': image_path,
+        'body_part': body_part,
+        'prediction_result': prediction,
+        'confidence_score': confidence,
+        'medical_info': medical_info_data,
+        'image_features': image_features,
+        'image_hash': image_features['image_hash'] if image_features else None,
+        'perceptual_hash': perceptual,
+        'created_at': task['created_at'],
+    }
+
+
+class BulkImporter:
+    """Import historical X-rays for one clinician.
+
+    Images are discovered from a directory tree (``<patient>/<...>/<file>``)
+    or a CSV manifest, predicted on a process pool and written to the
+    ``predictions`` table in chunks (``COPY`` on Postgres, executemany
+    elsewhere).  Source paths are
+    appended to a checkpoint file after each committed chunk so an interrupted
+    import can be resumed.
+    """
+
+    def __init__(self, db, user, upload_folder, body_parts, default_body_part='chest',
+                 workers=None, chunk_size=500, checkpoint_path=None, log_config=None, out=sys.stdout):
+        self.db = db
+        self.user = user
+        self.upload_folder = upload_folder
+        self.body_parts = set(body_parts)
+        self.default_body_part = default_body_part
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.checkpoint_path = checkpoint_path
+        self.log_config = log_config
+        self.out = out
+
+        self.patients_by_id = {}
+        self.patients_by_name = {}
+        self.completed = set()
+        self.imported = 0
+        self.failed = 0
+        self.skipped = 0
+        # Predicted or failed, whether or not the chunk has been committed yet
+        self.processed = 0
+
+    def load_patients(self):
+        """Cache the clinician's patients for mapping files to patients"""
+        from models.database import Patient
+
+        rows = self.db.session.query(Patient.id, Patient.name, Patient.age, Patient.gender) \
+            .filter(Patient.user_id == self.user.id).all()
+        for patient_id, name, age, gender in rows:
+            self.patients_by_id[patient_id] = (age, gender)
+            self.patients_by_name[name.strip().lower()] = patient_id
+
+    def load_checkpoint(self):
+        """Read the source paths already imported by a previous run"""
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                self.completed = {line.rstrip('\n') for line in f if line.strip()}
+
+    def save_checkpoint(self, sources):
+        if not self.checkpoint_path or not sources:
+            return
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(f"{source}\n" for source in sources))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def resolve_patient(self, reference):
+        """Map a patient id or name from the source to a patient id"""
+        reference = str(reference).strip()
+        if reference.isdigit() and int(reference) in self.patients_by_id:
+            return int(reference)
+        return self.patients_by_name.get(reference.lower())
+
+    def iter_directory(self, root):
+        """Yield (source, patient reference, body part, created_at) for a directory tree"""
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            relative = os.path.relpath(dirpath, root)
+            parts = [] if relative == '.' else relative.split(os.sep)
+            if not parts:
+                continue
+
+            body_part = next((part.lower() for part in parts[1:] if part.lower() in self.body_parts), None)
+            for filename in sorted(filenames):
+                if os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS:
+                    yield os.path.join(dirpath, filename), parts[0], body_part, None
+
+    def iter_manifest(self, manifest_path):
+        """Yield (source, patient reference, body part, created_at) for a CSV manifest.
+
+        Columns: image_path, patient_id or patient_name, and optionally
+        body_part and created_at (ISO date).  Relative image paths are
+        resolved against the manifest's directory.
+        """
+        base_dir = os.path.dirname(os.path.abspath(manifest_path))
+        with open(manifest_path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                source = row.get('image_path', '').strip()
+                if not source:
+                    continue
+                if not os.path.isabs(source):
+                    source = os.path.join(base_dir, source)
+                reference = row.get('patient_id') or row.get('patient_name') or ''
+                body_part = (row.get('body_part') or '').strip().lower() or None
+                created_at = row.get('created_at') or None
+                yield source, reference, body_part, created_at
+
+    def iter_tasks(self, source):
+        """Build prediction tasks, skipping checkpointed and unmappable files"""
+        items = self.iter_manifest(source) if source.lower().endswith('.csv') else self.iter_directory(source)
+        for path, reference, body_part, created_at in items:
+            path = os.path.abspath(path)
+            if path in self.completed:
+                self.skipped += 1
+                continue
+
+            patient_id = self.resolve_patient(reference)
+            if patient_id is None or (body_part and body_part not in self.body_parts):
+                self.failed += 1
+                self.processed += 1
+                self.out.write(f"\n  Skipping {path}: unknown patient '{reference}' or body part '{body_part}'\n")
+                continue
+
+            if created_at:
+                try:
+                    created_at = datetime.fromisoformat(created_at.strip())
+                except ValueError:
+                    self.failed += 1
+                    self.processed += 1
+                    self.out.write(f"\n  Skipping {path}: invalid created_at '{created_at}'\n")
+                    continue
+            else:
+                # Naive UTC, like every other created_at
+                created_at = datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).replace(tzinfo=None)
+
+            age, gender = self.patients_by_id[patient_id]
+            # A stable name per source file keeps re-runs from piling up copies
+            digest = hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]
+            yield {
+                'source': path,
+                'upload_folder': self.upload_folder,
+                'image_path': f"import_{digest}_{secure_filename(os.path.basename(path))}",
+                'patient_id': patient_id,
+                'explicit_body_part': body_part,
+                'body_part': body_part or self.default_body_part,
+                'age': age,
+                'gender': gender,
+                'created_at': created_at,
+            }
+
+    def flush(self, rows, sources):
+        """Insert one chunk in a single round trip and record the checkpoint"""
+        from models.bulk import copy_rows
+        from models.database import Prediction
+        from models.medical_content import medical_content_id, pinnable
+        from models.features import store_features
+        from models.stats import apply_increments, increments_for_rows
+        from utils.medical_info import MedicalInfoService
+
+        if not rows:
+            return
+        features = []
+        for row in rows:
+            medical_info_data = row.pop('medical_info')
+            row['medical_content_id'] = (medical_content_id(self.db.engine, medical_info_data,
+                                                            MedicalInfoService.CONTENT_VERSION)
+                                         if pinnable(medical_info_data) else None)
+            if row.get('image_features'):
+                features.append(row['image_features'])
+            row.pop('image_features', None)
+        connection = self.db.session.connection()
+        store_features(connection, features)
+        copy_rows(connection, Prediction.__table__, rows)
+        # COPY bypasses the ORM events, so the stats are updated here in the same transaction
+        apply_increments(connection, increments_for_rows(connection, rows))
+        self.db.session.commit()
+        self.save_checkpoint(sources)
+        self.imported += len(rows)
+
+    def report_progress(self, started, final=False):
+        elapsed = max(time.time() - started, 1e-6)
+        rate = self.processed / elapsed
+        self.out.write(f"\r  {self.processed} processed, {self.imported} imported, {self.failed} failed, "
+                       f"{self.skipped} skipped "
+                       f"- {rate:.1f} images/s")
+        if final:
+            self.out.write('\n')
+        self.out.flush()
+
+    def run(self, source):
+        """Import every image from a directory or CSV manifest"""
+        os.makedirs(self.upload_folder, exist_ok=True)
+        self.load_patients()
+        self.load_checkpoint()
+
+        started = time.time()
+        last_report = 0
+        rows, sources = [], []
+        tasks = self.iter_tasks(source)
+        max_in_flight = self.workers * 4
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.log_config,)) as executor:
+            pending = {}
+            exhausted = False
+            while pending or not exhausted:
+                # Keep a bounded window of work in flight so huge imports stay in constant memory
+                while not exhausted and len(pending) < max_in_flight:
+                    task = next(tasks, None)
+                    if task is None:
+                        exhausted = True
+                        break
+                    pending[executor.submit(_predict_task, task)] = task['source']
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    source_path = pending.pop(future)
+                    self.processed += 1
+                    try:
+                        rows.append(future.result())
+                        sources.append(source_path)
+                    except Exception as e:
+                        self.failed += 1
+                        self.out.write(f"\n  Failed {source_path}: {e}\n")
+
+                if len(rows) >= self.chunk_size:
+                    self.flush(rows, sources)
+                    rows, sources = [], []
+
+                if time.time() - last_report >= 1:
+                    self.report_progress(started)
+                    last_report = time.time()
+
+        self.flush(rows, sources)
+        self.report_progress(started, final=True)
+        return self.imported
@@ -0,0 +1,242 @@
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from html.parser import HTMLParser
+
+CATALOG_FORMAT = 1
+MISSING_FILE = 'missing.jsonl'
+RUNTIME_STRINGS_FILE = 'runtime_strings.json'
+MANIFEST_FILE = 'manifest.json'
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source',
+                 'track', 'wbr'}
+
+
+class _TranslateTextParser(HTMLParser):
+    """English text of every element marked with data-translate"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.strings = {}
+        self.depth = 0
+        self.current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_ELEMENTS:
+            return
+        self.depth += 1
+        key = dict(attrs).get('data-translate')
+        if key and self.current is None:
+            self.current = (key, self.depth, [])
+
+    def handle_endtag(self, tag):
+        if tag in VOID_ELEMENTS:
+            return
+        if self.current and self.current[1] == self.depth:
+            key, _, parts = self.current
+            text = ' '.join(''.join(parts).split())
+            # Text built by Jinja at render time cannot be translated ahead of time
+            if text and '{{' not in text and '{%' not in text:
+                self.strings.setdefault(key, text)
+            self.current = None
+        self.depth -= 1
+
+    def handle_data(self, data):
+        if self.current:
+            self.current[2].append(data)
+
+
+def ui_strings(templates_dir):
+    """{data-translate key: English text} from every template"""
+    strings = {}
+    for path in sorted(glob.glob(os.path.join(templates_dir, '**', '*.html'), recursive=True)):
+        parser = _TranslateTextParser()
+        with open(path, 'r', encoding='utf-8') as f:
+            parser.feed(f.read())
+        for key, text in parser.strings.items():
+            strings.setdefault(key, text)
+    return strings
+
+
+def medical_strings(medical_info_service):
+    """Every fixed string MedicalInfoService can put on a result page"""
+    strings = []
+    for info in medical_info_service.medical_tips_db.values():
+        strings.append(info.get('description', ''))
+        strings.extend(info.get('tips', []))
+        strings.extend(info.get('precautions', []))
+    fallback = medical_info_service.get_fallback_info('')
+    strings.extend(fallback['medical_tips'])
+    strings.extend(fallback['precautions'])
+    return strings
+
+
+def _digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+
+
+def _write_json(path, value):
+    temporary = f"{path}.tmp-{os.getpid()}"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    os.replace(temporary, path)
+
+
+def _read_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def build_catalogs(translator, directory, strings, languages, timeout=None, out=print):
+    """Translate ``strings`` plus any recorded runtime misses into one catalog per language.
+
+    Each catalog is ``<language>.json``: {"version", "source_version",
+    "messages": {English: translation}}.  Strings the translator could not
+    translate are left out, so they fall back at runtime and are retried by
+    the next build.  Returns the manifest that is also written to
+    ``manifest.json``.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    # Take the current misses aside; workers keep appending to a fresh file meanwhile
+    runtime = set(_read_json(os.path.join(directory, RUNTIME_STRINGS_FILE), []))
+    missing_path = os.path.join(directory, MISSING_FILE)
+    building_path = f"{missing_path}.building"
+    if os.path.exists(missing_path):
+        os.replace(missing_path, building_path)
+    if os.path.exists(building_path):
+        with open(building_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    runtime.add(json.loads(line)['text'])
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+    sources = sorted(set(text for text in list(strings) + list(runtime) if text and text.strip()))
+    source_version = _digest(sources)
+    languages_built = {}
+    for language in languages:
+        if language == 'en':
+            continue
+        started = time.perf_counter()
+        translated = translator.translate_batch(sources, language, timeout=timeout, use_catalog=False)
+        messages = {text: translation for text, translation in zip(sources, translated)
+                    if translation and translation != text}
+        version = _digest(messages)
+        _write_json(os.path.join(directory, f"{language}.json"), {
+            'format': CATALOG_FORMAT,
+            'language': language,
+            'version': version,
+            'source_version': source_version,
+            'messages': messages,
+        })
+        languages_built[language] = {'version': version, 'entries': len(messages),
+                                     'untranslated': len(sources) - len(messages)}
+        out(f"  {language}: {len(messages)}/{len(sources)} strings in {time.perf_counter() - started:.1f}s")
+
+    manifest = {'format': CATALOG_FORMAT, 'source_version': source_version, 'strings': len(sources),
+                'languages': languages_built}
+    _write_json(os.path.join(directory, RUNTIME_STRINGS_FILE), sorted(runtime))
+    _write_json(os.path.join(directory, MANIFEST_FILE), manifest)
+    if os.path.exists(building_path):
+        os.remove(building_path)
+    return manifest
+
+
+class CatalogStore:
+    """Read side of the compiled catalogs: a dict lookup per string, no network.
+
+    Catalogs are loaded on first use and dropped again when a build rewrites
+    ``manifest.json`` (checked at most every ``check_interval`` seconds), so
+    running workers pick up rebuilt catalogs, including languages that had
+    none.  Callers that ask for it (``record_missing``) get strings they
+    looked up but did not find appended to ``missing.jsonl`` (once per
+    process, at most ``max_missing``) so the next build includes them.
+    Nothing is recorded until a catalog directory exists.
+    """
+
+    def __init__(self, directory, max_missing=10000, max_length=1000, check_interval=5.0, clock=time.monotonic):
+        self.directory = directory
+        self.max_missing = max_missing
+        self.max_length = max_length
+        self.check_interval = check_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.catalogs = {}
+        self.versions = {}
+        self.missing = set()
+        self.checked = None
+        self.manifest_mtime = None
+
+    def check_manifest(self):
+        """Drop loaded catalogs once the manifest has been rewritten by a build"""
+        now = self.clock()
+        if self.checked is not None and now - self.checked < self.check_interval:
+            return
+        self.checked = now
+        try:
+            mtime = os.stat(os.path.join(self.directory, MANIFEST_FILE)).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self.manifest_mtime:
+            self.manifest_mtime = mtime
+            self.reload()
+
+    def catalog(self, language):
+        self.check_manifest()
+        catalog = self.catalogs.get(language)
+        if catalog is None:
+            catalog = _read_json(os.path.join(self.directory, f"{language}.json"), {})
+            if catalog.get('format') != CATALOG_FORMAT:
+                catalog = {}
+            self.catalogs[language] = catalog
+        return catalog
+
+    def version(self, language):
+        """Version of the language's catalog, or None when there is none"""
+        return self.catalog(language).get('version')
+
+    def messages(self, language):
+        return self.catalog(language).get('messages', {})
+
+    def lookup(self, text, language):
+        return self.messages(language).get(text)
+
+    def bundle(self, language, texts):
+        """Catalog translations of just ``texts``, for shipping to the browser"""
+        messages = self.messages(language)
+        return {text: messages[text] for text in texts if text in messages}
+
+    def bundle_version(self, texts):
+        """Changes when any catalog is rebuilt or the bundled texts change"""
+        self.check_manifest()
+        key = tuple(texts)
+        version = self.versions.get(key)
+        if version is None:
+            manifest = _read_json(os.path.join(self.directory, MANIFEST_FILE), {})
+            version = self.versions[key] = _digest([manifest.get('languages', {}), sorted(texts)])
+        return version
+
+    def record_missing(self, text, language):
+        if not text or len(text) > self.max_length or not os.path.isdir(self.directory):
+            return
+        with self.lock:
+            if (language, text) in self.missing or len(self.missing) >= self.max_missing:
+                return
+            self.missing.add((language, text))
+        try:
+            with open(os.path.join(self.directory, MISSING_FILE), 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'language': language, 'text': text}, ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"Error recording missing catalog entry: {e}")
+
+    def reload(self):
+        """Forget loaded catalogs so the next lookup reads the rebuilt files"""
+        self.catalogs = {}
+        self.versions = {}
@@ -0,0 +1,353 @@
+import os
+import struct
+import numpy as np
+from PIL import Image
+
+# Transfer syntaxes whose PixelData is stored as a raw, uncompressed array
+IMPLICIT_VR_LITTLE_ENDIAN = '1.2.840.10008.1.2'
+EXPLICIT_VR_LITTLE_ENDIAN = '1.2.840.10008.1.2.1'
+SUPPORTED_TRANSFER_SYNTAXES = (IMPLICIT_VR_LITTLE_ENDIAN, EXPLICIT_VR_LITTLE_ENDIAN)
+
+# Explicit VRs that use a 2 byte reserved field followed by a 4 byte length
+LONG_LENGTH_VRS = {b'OB', b'OD', b'OF', b'OL', b'OV', b'OW', b'SQ', b'UC', b'UN', b'UR', b'UT'}
+
+UNDEFINED_LENGTH = 0xFFFFFFFF
+ITEM_TAG = (0xFFFE, 0xE000)
+ITEM_DELIMITATION_TAG = (0xFFFE, 0xE00D)
+SEQUENCE_DELIMITATION_TAG = (0xFFFE, 0xE0DD)
+PIXEL_DATA_TAG = (0x7FE0, 0x0010)
+
+# Header elements we need, with the VR used when the file is implicit VR
+HEADER_TAGS = {
+    (0x0002, 0x0010): ('TransferSyntaxUID', 'UI'),
+    (0x0008, 0x0060): ('Modality', 'CS'),
+    (0x0018, 0x0015): ('BodyPartExamined', 'CS'),
+    (0x0028, 0x0002): ('SamplesPerPixel', 'US'),
+    (0x0028, 0x0004): ('PhotometricInterpretation', 'CS'),
+    (0x0028, 0x0008): ('NumberOfFrames', 'IS'),
+    (0x0028, 0x0010): ('Rows', 'US'),
+    (0x0028, 0x0011): ('Columns', 'US'),
+    (0x0028, 0x0100): ('BitsAllocated', 'US'),
+    (0x0028, 0x0101): ('BitsStored', 'US'),
+    (0x0028, 0x0103): ('PixelRepresentation', 'US'),
+    (0x0028, 0x1050): ('WindowCenter', 'DS'),
+    (0x0028, 0x1051): ('WindowWidth', 'DS'),
+    (0x0028, 0x1052): ('RescaleIntercept', 'DS'),
+    (0x0028, 0x1053): ('RescaleSlope', 'DS'),
+}
+
+# BodyPartExamined defined terms mapped onto the body parts we have models for
+BODY_PART_ALIASES = {
+    'chest': ['CHEST', 'THORAX', 'LUNG', 'RIB', 'RIBS', 'STERNUM'],
+    'hand': ['HAND', 'FINGER', 'WRIST', 'THUMB'],
+    'leg': ['LEG', 'LOWERLEG', 'UPRLEG', 'FEMUR', 'TIBIA', 'FIBULA', 'KNEE', 'ANKLE', 'FOOT', 'EXTREMITY'],
+    'skull': ['SKULL', 'HEAD', 'BRAIN', 'FACE', 'JAW', 'TMJ'],
+    'spine': ['SPINE', 'CSPINE', 'TSPINE', 'LSPINE', 'SSPINE', 'COCCYX', 'SACRUM', 'NECK'],
+    'pelvis': ['PELVIS', 'HIP', 'ABDOMEN'],
+}
+
+# Rows converted per pass when building the 8-bit plane, keeps memory bounded
+ROWS_PER_CHUNK = 256
+
+
+class DicomError(ValueError):
+    """Raised when a file is not a DICOM file we can read"""
+
+
+def is_dicom(file_path):
+    """Check for the DICM magic after the 128 byte preamble"""
+    try:
+        with open(file_path, 'rb') as f:
+            f.seek(128)
+            return f.read(4) == b'DICM'
+    except OSError:
+        return False
+
+
+def map_body_part(body_part_examined):
+    """Map a BodyPartExamined value to one of our supported body parts"""
+    if not body_part_examined:
+        return None
+
+    value = body_part_examined.upper().replace(' ', '').replace('_', '')
+    for body_part, aliases in BODY_PART_ALIASES.items():
+        if value in aliases:
+            return body_part
+    return None
+
+
+class DicomImage:
+    """Uncompressed DICOM image with a memory-mapped PixelData element"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.header = {}
+        self.pixel_data_offset = None
+        self.pixel_data_length = None
+        self._pixels = None
+        self.parse_header()
+
+    def parse_header(self):
+        """Read header elements up to PixelData without loading pixel values"""
+        try:
+            self._parse_header()
+        except DicomError:
+            raise
+        except (struct.error, ValueError) as e:
+            # Short reads and garbled numbers in a truncated or corrupt file
+            raise DicomError(f"Malformed DICOM header: {e}") from e
+
+        if self.pixel_data_offset is None:
+            raise DicomError("DICOM file has no PixelData element")
+
+        for required in ('Rows', 'Columns', 'BitsAllocated'):
+            if required not in self.header:
+                raise DicomError(f"DICOM header is missing {required}")
+
+    def _parse_header(self):
+        with open(self.file_path, 'rb') as f:
+            f.seek(128)
+            if f.read(4) != b'DICM':
+                raise DicomError(f"Not a DICOM file: {os.path.basename(self.file_path)}")
+
+            # The file meta group is always explicit VR little endian
+            while True:
+                position = f.tell()
+                tag = self._peek_tag(f)
+                f.seek(position)
+                if tag is None or tag[0] != 0x0002:
+                    break
+                self._read_element(f, explicit=True)
+
+            transfer_syntax = self.header.get('TransferSyntaxUID', IMPLICIT_VR_LITTLE_ENDIAN)
+            if transfer_syntax not in SUPPORTED_TRANSFER_SYNTAXES:
+                raise DicomError(f"Unsupported (compressed or big endian) transfer syntax: {transfer_syntax}")
+
+            explicit = transfer_syntax == EXPLICIT_VR_LITTLE_ENDIAN
+            while self.pixel_data_offset is None:
+                if self._read_element(f, explicit) is None:
+                    break
+
+    def _peek_tag(self, f):
+        data = f.read(4)
+        if len(data) < 4:
+            return None
+        return struct.unpack('<HH', data)
+
+    def _read_element(self, f, explicit):
+        """Read one data element, storing it if it is a header tag we need"""
+        tag = self._peek_tag(f)
+        if tag is None:
+            return None
+
+        if tag[0] == 0xFFFE:
+            # Item and delimiter tags never carry a VR
+            vr = None
+            length = struct.unpack('<I', f.read(4))[0]
+        elif explicit:
+            vr = f.read(2)
+            if vr in LONG_LENGTH_VRS:
+                f.read(2)
+                length = struct.unpack('<I', f.read(4))[0]
+            else:
+                length = struct.unpack('<H', f.read(2))[0]
+        else:
+            vr = HEADER_TAGS.get(tag, (None, None))[1]
+            vr = vr.encode('ascii') if vr else None
+            length = struct.unpack('<I', f.read(4))[0]
+
+        if tag == PIXEL_DATA_TAG:
+            if length == UNDEFINED_LENGTH:
+                raise DicomError("Encapsulated (compressed) PixelData is not supported")
+            self.pixel_data_offset = f.tell()
+            self.pixel_data_length = length
+            return tag
+
+        if length == UNDEFINED_LENGTH:
+            self._skip_undefined_length(f, explicit)
+        elif tag in HEADER_TAGS:
+            keyword, default_vr = HEADER_TAGS[tag]
+            vr = vr or default_vr.encode('ascii')
+            self.header[keyword] = self._decode_value(f.read(length), vr)
+        else:
+            f.seek(length, os.SEEK_CUR)
+
+        return tag
+
+    def _skip_undefined_length(self, f, explicit):
+        """Skip a sequence (or item) of undefined length, honouring nesting"""
+        while True:
+            tag = self._peek_tag(f)
+            if tag is None:
+                raise DicomError("Unexpected end of file inside a sequence")
+            length = struct.unpack('<I', f.read(4))[0]
+
+            if tag == SEQUENCE_DELIMITATION_TAG:
+                return
+            if tag == ITEM_TAG:
+                if length == UNDEFINED_LENGTH:
+                    self._skip_item(f, explicit)
+                else:
+                    f.seek(length, os.SEEK_CUR)
+            else:
+                raise DicomError(f"Unexpected tag {tag} inside a sequence")
+
+    def _skip_item(self, f, explicit):
+        """Skip the elements of an undefined length item"""
+        while True:
+            position = f.tell()
+            tag = self._peek_tag(f)
+            if tag is None:
+                raise DicomError("Unexpected end of file inside a sequence item")
+            if tag == ITEM_DELIMITATION_TAG:
+                f.read(4)
+                return
+            f.seek(position)
+            self._read_nested_element(f, explicit)
+
+    def _read_nested_element(self, f, explicit):
+        """Skip an element nested inside a sequence item"""
+        tag = self._peek_tag(f)
+        if explicit:
+            vr = f.read(2)
+            if vr in LONG_LENGTH_VRS:
+                f.read(2)
+                length = struct.unpack('<I', f.read(4))[0]
+            else:
+                length = struct.unpack('<H', f.read(2))[0]
+        else:
+            length = struct.unpack('<I', f.read(4))[0]
+
+        if length == UNDEFINED_LENGTH:
+            self._skip_undefined_length(f, explicit)
+        else:
+            f.seek(length, os.SEEK_CUR)
+        return tag
+
+    def _decode_value(self, raw, vr):
+        if vr == b'US':
+            return struct.unpack('<H', raw[:2])[0]
+        text = raw.decode('ascii', errors='ignore').strip('\x00 ')
+        if vr in (b'DS', b'IS'):
+            # Multi-valued numbers are backslash separated, the first applies
+            text = text.split('\\')[0].strip()
+            if not text:
+                return None
+            return float(text) if vr == b'DS' else int(float(text))
+        return text
+
+    @property
+    def rows(self):
+        return self.header['Rows']
+
+    @property
+    def columns(self):
+        return self.header['Columns']
+
+    @property
+    def body_part_examined(self):
+        return self.header.get('BodyPartExamined')
+
+    @property
+    def body_part(self):
+        """Supported body part derived from BodyPartExamined, if any"""
+        return map_body_part(self.body_part_examined)
+
+    @property
+    def pixels(self):
+        """Memory-mapped pixel array shaped (frames, rows, columns[, samples])"""
+        if self._pixels is None:
+            bits_allocated = self.header['BitsAllocated']
+            signed = self.header.get('PixelRepresentation', 0) == 1
+            if bits_allocated not in (8, 16, 32):
+                raise DicomError(f"Unsupported BitsAllocated: {bits_allocated}")
+
+            dtype = np.dtype(f"<{'i' if signed else 'u'}{bits_allocated // 8}")
+            frames = self.header.get('NumberOfFrames') or 1
+            samples = self.header.get('SamplesPerPixel', 1)
+            shape = (frames, self.rows, self.columns)
+            if samples > 1:
+                shape += (samples,)
+
+            expected = int(np.prod(shape)) * dtype.itemsize
+            if self.pixel_data_length < expected:
+                raise DicomError("PixelData is shorter than the header describes")
+            if self.pixel_data_offset + expected > os.path.getsize(self.file_path):
+                raise DicomError("PixelData is truncated")
+
+            self._pixels = np.memmap(self.file_path, dtype=dtype, mode='r',
+                                     offset=self.pixel_data_offset, shape=shape)
+        return self._pixels
+
+    def _modality_values(self, chunk):
+        """Apply BitsStored masking and the modality rescale to a chunk"""
+        values = np.asarray(chunk)
+        if values.ndim == 3:
+            # Colour data is reduced to luminance for the analysis plane
+            values = values[..., :3] @ np.array([0.299, 0.587, 0.114])
+
+        bits_allocated = self.header['BitsAllocated']
+        bits_stored = self.header.get('BitsStored', bits_allocated)
+        values = values.astype(np.float32)
+        if bits_stored < bits_allocated and self.header.get('SamplesPerPixel', 1) == 1:
+            raw = np.asarray(chunk).astype(np.int64)
+            if self.header.get('PixelRepresentation', 0) == 1:
+                shift = 64 - bits_stored
+                raw = (raw << shift) >> shift
+            else:
+                raw = raw & ((1 << bits_stored) - 1)
+            values = raw.astype(np.float32)
+
+        slope = self.header.get('RescaleSlope')
+        intercept = self.header.get('RescaleIntercept')
+        if slope is not None and slope != 1:
+            values *= slope
+        if intercept:
+            values += intercept
+        return values
+
+    def _value_range(self, frame):
+        """Min and max modality values, computed chunk by chunk"""
+        low, high = np.inf, -np.inf
+        for start in range(0, self.rows, ROWS_PER_CHUNK):
+            values = self._modality_values(frame[start:start + ROWS_PER_CHUNK])
+            low = min(low, float(values.min()))
+            high = max(high, float(values.max()))
+        return low, high
+
+    def to_uint8(self, window_center=None, window_width=None, frame_index=0):
+        """Build the 8-bit analysis plane using rescale and window/level"""
+        frame = self.pixels[frame_index]
+
+        center = window_center if window_center is not None else self.header.get('WindowCenter')
+        width = window_width if window_width is not None else self.header.get('WindowWidth')
+        if center is None or not width:
+            low, high = self._value_range(frame)
+            center = (low + high) / 2.0
+            width = max(high - low, 1.0)
+
+        invert = self.header.get('PhotometricInterpretation', 'MONOCHROME2') == 'MONOCHROME1'
+        output = np.empty((self.rows, self.columns), dtype=np.uint8)
+
+        # Linear VOI LUT function from DICOM PS3.3 C.11.2.1.2
+        for start in range(0, self.rows, ROWS_PER_CHUNK):
+            values = self._modality_values(frame[start:start + ROWS_PER_CHUNK])
+            if width <= 1:
+                scaled = np.where(values > center - 0.5, 255.0, 0.0)
+            else:
+                scaled = ((values - (center - 0.5)) / (width - 1) + 0.5) * 255.0
+            scaled = np.clip(scaled, 0, 255)
+            if invert:
+                scaled = 255 - scaled
+            output[start:start + ROWS_PER_CHUNK] = scaled.astype(np.uint8)
+
+        return output
+
+    def to_pil(self, mode='RGB', **kwargs):
+        """8-bit analysis plane as a PIL image"""
+        return Image.fromarray(self.to_uint8(**kwargs)).convert(mode)
+
+    def save_preview(self, output_path, **kwargs):
+        """Write the analysis plane as a browser-viewable image"""
+        self.to_pil(mode='L', **kwargs).save(output_path)
+        return output_path
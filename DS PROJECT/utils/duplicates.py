@@ -0,0 +1,152 @@
+import threading
+from collections import defaultdict, namedtuple
+from itertools import combinations
+
+import numpy as np
+from PIL import Image
+from sqlalchemy import select
+
+from utils.dicom_reader import DicomImage, is_dicom
+
+HASH_BITS = 64
+
+# A match returned by DuplicateIndex.nearest
+DuplicateMatch = namedtuple('DuplicateMatch', 'prediction_id distance patient_id body_part')
+
+
+def perceptual_hash(path, hash_size=8):
+    """64-bit difference hash (dHash) of an image or DICOM file, as 16 hex digits.
+
+    The image is shrunk to 9x8 grey pixels and each bit records whether a
+    pixel is brighter than its right neighbour, so re-encoding, rescaling and
+    small crops or exposure changes flip only a few bits.
+    """
+    image = DicomImage(path).to_pil() if is_dicom(path) else Image.open(path)
+    image = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = np.asarray(image)
+
+    value = 0
+    for bit in (pixels[:, :-1] > pixels[:, 1:]).ravel():
+        value = (value << 1) | int(bit)
+    return f"{value:0{hash_size * hash_size // 4}x}"
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class PHashIndex:
+    """Multi-index hash table for Hamming-radius queries over 64-bit hashes.
+
+    Each hash is split into ``blocks`` chunks and every chunk is indexed in its
+    own table.  If two hashes differ in at most ``radius`` bits, at least one
+    chunk differs in at most ``radius // blocks`` bits (pigeonhole), so a query
+    only probes the buckets near each of its chunks and checks the few
+    candidates found there.  With 16-bit chunks a bucket holds about
+    n / 65536 hashes, which keeps queries in the millisecond range at
+    millions of images.
+    """
+
+    def __init__(self, blocks=4):
+        self.blocks = blocks
+        self.block_bits = HASH_BITS // blocks
+        self.mask = (1 << self.block_bits) - 1
+        self.tables = [defaultdict(list) for _ in range(blocks)]
+        self.hashes = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def chunks(self, value):
+        return [(value >> (i * self.block_bits)) & self.mask for i in range(self.blocks)]
+
+    def add(self, item_id, value):
+        if item_id in self.hashes:
+            return
+        self.hashes[item_id] = value
+        for table, chunk in zip(self.tables, self.chunks(value)):
+            table[chunk].append(item_id)
+
+    def probes(self, chunk, radius):
+        """Every chunk value within ``radius`` bits of ``chunk``"""
+        yield chunk
+        for flips in range(1, radius + 1):
+            for bits in combinations(range(self.block_bits), flips):
+                probe = chunk
+                for bit in bits:
+                    probe ^= 1 << bit
+                yield probe
+
+    def query(self, value, radius):
+        """[(distance, item_id)] for every hash within ``radius`` bits, nearest first"""
+        seen = set()
+        matches = []
+        for table, chunk in zip(self.tables, self.chunks(value)):
+            for probe in self.probes(chunk, radius // self.blocks):
+                for item_id in table.get(probe, ()):
+                    if item_id in seen:
+                        continue
+                    seen.add(item_id)
+                    distance = hamming(value, self.hashes[item_id])
+                    if distance <= radius:
+                        matches.append((distance, item_id))
+        return sorted(matches)
+
+
+class DuplicateIndex:
+    """In-memory perceptual-hash index over every stored prediction.
+
+    Built from the predictions table on first use and topped up with rows
+    newer than the last one seen before each lookup, so uploads made by other
+    workers or the bulk importer are found too.  Ids are not committed in id
+    order, so each refresh also re-scans the last ``window`` ids below the
+    highest one seen and adds those not indexed yet.  Matches are limited to
+    the clinician's own patients.
+    """
+
+    def __init__(self, blocks=4, window=1000):
+        self.window = window
+        self.index = PHashIndex(blocks)
+        self.owners = {}
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        """Forget everything loaded (after the tables are recreated)"""
+        with self.lock:
+            self.index = PHashIndex(self.index.blocks)
+            self.owners = {}
+            self.last_id = 0
+
+    def refresh(self, connection):
+        """Load predictions added since the last refresh, or committed late below it"""
+        from models.database import Patient, Prediction
+
+        predictions = Prediction.__table__
+        patients = Patient.__table__
+        rows = connection.execute(
+            select(predictions.c.id, predictions.c.perceptual_hash, predictions.c.patient_id,
+                   predictions.c.body_part, patients.c.user_id)
+            .join(patients, patients.c.id == predictions.c.patient_id)
+            .where(predictions.c.id > max(self.last_id - self.window, 0),
+                   predictions.c.perceptual_hash.isnot(None))
+            .order_by(predictions.c.id)
+        ).all()
+
+        with self.lock:
+            for prediction_id, value, patient_id, body_part, user_id in rows:
+                if prediction_id not in self.owners:
+                    self.index.add(prediction_id, int(value, 16))
+                    self.owners[prediction_id] = (user_id, patient_id, body_part)
+            if rows:
+                self.last_id = max(self.last_id, rows[-1][0])
+
+    def nearest(self, connection, value, radius, user_id):
+        """Closest earlier study of this clinician within ``radius`` bits, or None"""
+        self.refresh(connection)
+        with self.lock:
+            for distance, prediction_id in self.index.query(int(value, 16), radius):
+                owner, patient_id, body_part = self.owners[prediction_id]
+                if owner == user_id:
+                    return DuplicateMatch(prediction_id, distance, patient_id, body_part)
+        return None
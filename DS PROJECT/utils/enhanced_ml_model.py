@@ -5,10 +5,16 @@ import cv2
 import random
 import json
 from datetime import datetime
+from utils.dicom_reader import DicomImage, is_dicom
 
 class EnhancedMLPredictor:
+    # Bump when analyze_image_features changes so stored features are recomputed
+    FEATURE_PIPELINE_VERSION = '1'
+
     def __init__(self):
         self.models = {}
+        # PredictionLog sink, attached by the app; without one predictions are not logged
+        self.prediction_log = None
         self.class_labels = {
             'chest': {
                 'Normal': {'probability': 0.3, 'confidence_range': (0.85, 0.95)},
@@ -86,7 +92,7 @@ class EnhancedMLPredictor:
         """Analyze image features to make more realistic predictions"""
         try:
             # Load and analyze image
-            img = Image.open(image_path).convert('RGB')
+            img = self.load_image(image_path)
             img_array = np.array(img)
 
             # Calculate image statistics
@@ -124,6 +130,12 @@ class EnhancedMLPredictor:
                 'filename_hints': []
             }
     
+    def load_image(self, image_path):
+        """Load an image as RGB, windowing DICOM files down to an 8-bit plane"""
+        if is_dicom(image_path):
+            return DicomImage(image_path).to_pil()
+        return Image.open(image_path).convert('RGB')
+
     def calculate_sharpness(self, img_array):
         """Calculate image sharpness using Laplacian variance"""
         try:
@@ -490,10 +502,17 @@ class EnhancedMLPredictor:
     
     def predict(self, image_path, body_part, patient_age=None, patient_gender=None):
         """Main prediction method"""
+        prediction, confidence, features = self.predict_with_features(
+            image_path, body_part, patient_age, patient_gender
+        )
+        return prediction, confidence
+
+    def predict_with_features(self, image_path, body_part, patient_age=None, patient_gender=None):
+        """Predict and also return the image features (None when the fallback was used)"""
         try:
             # Check if model exists for body part
             if body_part not in self.models:
-                return "Unknown", 0.5
+                return "Unknown", 0.5, None
             
             # Make prediction with context
             prediction, confidence, features = self.predict_with_context(
@@ -503,12 +522,13 @@ class EnhancedMLPredictor:
             # Log prediction for analysis
             self.log_prediction(image_path, body_part, prediction, confidence, features)
             
-            return prediction, confidence
+            return prediction, confidence, features
             
         except Exception as e:
             print(f"Error making prediction: {e}")
             # Fallback to simple prediction
-            return self.simple_fallback_prediction(body_part)
+            prediction, confidence = self.simple_fallback_prediction(body_part)
+            return prediction, confidence, None
     
     def simple_fallback_prediction(self, body_part):
         """Simple fallback prediction"""
@@ -530,9 +550,9 @@ class EnhancedMLPredictor:
                 'model_version': self.models[body_part].get('version', '1.0.0')
             }
             
-            # In a real application, you would save this to a database or log file
-            # For demo, we'll just print it
-            print(f"Prediction logged: {prediction} ({confidence:.2f}) for {body_part}")
+            # Buffered and written by a background thread, so this never waits on disk
+            if self.prediction_log is not None:
+                self.prediction_log.log(log_entry)
             
         except Exception as e:
             print(f"Error logging prediction: {e}")
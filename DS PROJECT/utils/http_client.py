@@ -0,0 +1,167 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.resilience import CallMetrics
+
+# Worth another attempt: the server is busy or briefly failing
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class DeadlineExceeded(Exception):
+    """Raised when no attempt of a request succeeded before its deadline"""
+
+
+class RetryableError(Exception):
+    """An attempt that failed in a way another attempt may not"""
+
+
+def normalize_query(query):
+    """Case- and whitespace-insensitive form of a search query"""
+    return ' '.join(str(query).lower().split())
+
+
+class HTTPClient:
+    """Pooled, deadline-bound JSON GETs for external lookups.
+
+    One ``requests.Session`` keeps up to ``pool_size`` keep-alive
+    connections per host, so repeated lookups skip the TCP and TLS
+    handshakes.  At most ``max_concurrency`` requests are on the wire at
+    once; more wait on the pool.
+
+    Every call has ``deadline`` seconds overall.  If the first attempt has
+    not answered within ``hedge_after`` seconds a second, identical one is
+    sent and whichever answers first wins.  Attempts that time out, fail to
+    connect or get a 429/5xx are retried with exponential backoff, up to
+    ``retries`` more attempts (a hedge counts as one), while time remains.
+    Running out of time raises ``DeadlineExceeded``; running out of
+    attempts first re-raises the last attempt's ``RetryableError``.
+
+    Successful responses are cached for ``cache_ttl`` seconds under the URL
+    and parameters, with the ``normalize`` parameters compared by
+    ``normalize_query`` so "Pneumonia " and "pneumonia" share an entry.
+    """
+
+    def __init__(self, pool_size=10, max_concurrency=4, timeout=5.0, deadline=8.0, hedge_after=1.0, retries=2,
+                 backoff=0.1, cache_ttl=3600.0, cache_size=1024, normalize=('q',), clock=time.monotonic):
+        self.timeout = timeout
+        self.deadline = deadline
+        self.hedge_after = hedge_after
+        self.retries = retries
+        self.backoff = backoff
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.normalize = set(normalize)
+        self.clock = clock
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='http')
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.metrics = CallMetrics()
+        self.cache_hits = 0
+        self.hedges = 0
+        self.retried = 0
+
+    def get_json(self, url, params=None, deadline=None):
+        """Parsed JSON body of ``GET url?params``, from the cache when fresh"""
+        params = dict(params or {})
+        key = self.cache_key(url, params)
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached is not None and self.clock() - cached[0] < self.cache_ttl:
+                self.cache.move_to_end(key)
+                self.cache_hits += 1
+                return cached[1]
+
+        data = self.fetch(url, params, self.clock() + (deadline or self.deadline))
+        with self.lock:
+            self.cache[key] = (self.clock(), data)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return data
+
+    def cache_key(self, url, params):
+        return (url, tuple(sorted((name, normalize_query(value) if name in self.normalize else str(value))
+                                  for name, value in params.items())))
+
+    def fetch(self, url, params, deadline):
+        """Hedged and retried attempts until one succeeds, retries run out or ``deadline`` passes"""
+        pending = set()
+        attempts = 0
+        hedged = False
+        last_error = None
+
+        def launch():
+            nonlocal attempts
+            attempts += 1
+            pending.add(self.executor.submit(self.attempt, url, params, deadline))
+
+        launch()
+        while pending:
+            remaining = deadline - self.clock()
+            if remaining <= 0:
+                break
+            can_hedge = not hedged and attempts <= self.retries
+            done, pending = wait(pending, timeout=min(remaining, self.hedge_after) if can_hedge else remaining,
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                if can_hedge:
+                    hedged = True
+                    self.hedges += 1
+                    launch()
+                continue
+
+            for future in done:
+                try:
+                    return future.result()
+                except RetryableError as e:
+                    last_error = e
+
+            if not pending and attempts <= self.retries:
+                pause = self.backoff * 2 ** (attempts - 1)
+                if self.clock() + pause >= deadline:
+                    break
+                time.sleep(pause)
+                self.retried += 1
+                launch()
+
+        if last_error is not None and self.clock() < deadline:
+            # Every attempt failed with time to spare; that is an error, not a timeout
+            self.metrics.increment(urlsplit(url).netloc, 'errors')
+            raise last_error
+        self.metrics.increment(urlsplit(url).netloc, 'timeouts')
+        raise DeadlineExceeded(f"No response from {urlsplit(url).netloc} after {attempts} attempts"
+                               + (f": {last_error}" if last_error else ''))
+
+    def attempt(self, url, params, deadline):
+        """One GET; retryable failures raise RetryableError, others propagate"""
+        remaining = deadline - self.clock()
+        if remaining <= 0:
+            raise RetryableError('deadline passed before the request was sent')
+
+        host = urlsplit(url).netloc
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, timeout=min(self.timeout, remaining))
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.metrics.record(host, time.perf_counter() - started, error=True)
+            raise RetryableError(str(e)) from e
+
+        self.metrics.record(host, time.perf_counter() - started, error=response.status_code >= 400)
+        if response.status_code in RETRY_STATUSES:
+            raise RetryableError(f"HTTP {response.status_code}")
+        response.raise_for_status()
+        return response.json()
+
+    def snapshot(self):
+        return {'hosts': self.metrics.snapshot(), 'cache_hits': self.cache_hits, 'hedges': self.hedges,
+                'retries': self.retried, 'cached': len(self.cache)}
@@ -1,15 +1,27 @@
 import os
-import requests
 import json
 from dotenv import load_dotenv
 
+from utils.http_client import HTTPClient
+
 load_dotenv()
 
 class MedicalInfoService:
-    def __init__(self):
+    # Bump when the local tips database changes so new predictions get new content rows
+    CONTENT_VERSION = 1
+
+    def __init__(self, http_client=None):
         self.google_api_key = os.getenv('GOOGLE_SEARCH_API_KEY')
         self.search_engine_id = os.getenv('GOOGLE_SEARCH_ENGINE_ID')
-        self.cache = {}
+        self.search_url = os.getenv('GOOGLE_SEARCH_URL', 'https://www.googleapis.com/customsearch/v1')
+        # Keep-alive pool shared by every lookup, with hedging, retries and a response cache
+        self.http = http_client or HTTPClient(
+            max_concurrency=int(os.getenv('MEDICAL_SEARCH_MAX_CONCURRENCY', 4)),
+            deadline=float(os.getenv('MEDICAL_SEARCH_DEADLINE', 8)),
+            hedge_after=float(os.getenv('MEDICAL_SEARCH_HEDGE_AFTER', 1)),
+            retries=int(os.getenv('MEDICAL_SEARCH_RETRIES', 2)),
+            cache_ttl=float(os.getenv('MEDICAL_SEARCH_CACHE_TTL', 3600))
+        )
         self.medical_tips_db = self.load_medical_tips_db()
     
     def load_medical_tips_db(self):
@@ -130,7 +142,6 @@ class MedicalInfoService:
         try:
             # Search for medical information
             query = f"{condition} medical information symptoms treatment"
-            url = "https://www.googleapis.com/customsearch/v1"
             params = {
                 'key': self.google_api_key,
                 'cx': self.search_engine_id,
@@ -138,10 +149,8 @@ class MedicalInfoService:
                 'num': 3
             }
             
-            response = requests.get(url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
+            data = self.http.get_json(self.search_url, params)
+            if data:
                 items = data.get('items', [])
                 
                 if items:
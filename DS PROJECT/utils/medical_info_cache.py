@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from models.medical_content import content_version
+from utils.resilience import SingleFlight
+
+# Payload fields shown on the result page and translated per language
+LOCALIZED_FIELDS = ('description', 'medical_tips', 'precautions')
+# source_language values under which entries live in the shared translation store
+LOCALIZED_SOURCE = 'medical_info'
+SEARCH_SOURCE = 'medical_search'
+
+
+class MedicalInfoCache:
+    """Fully localized medical information, served without network calls.
+
+    Payloads are keyed by (condition, language, content version), where the
+    content version is MedicalInfoService.CONTENT_VERSION plus a digest of
+    the English payload, so a changed tips database or a new search result
+    never serves an old translation.  Entries live in a per-process LRU of
+    ``max_entries`` and in the shared translation store, so every worker
+    reuses a payload another worker localized.
+
+    Conditions in the local tips database never go online.  Search results
+    for other conditions are kept for ``ttl`` seconds (``fallback_ttl`` when
+    the search failed and fell back).  A missing search result is served as
+    the fallback text and an expired one as it is, while a background
+    thread searches again.  Likewise a language whose strings are not all
+    in a catalog or the translation cache is served with what is there
+    (English for the rest) while the remainder is translated in the
+    background; only complete payloads are cached.
+    """
+
+    def __init__(self, service, translator, max_entries=None, ttl=None, fallback_ttl=None, max_workers=2,
+                 clock=time.time):
+        self.service = service
+        self.translator = translator
+        self.store = translator.cache
+        self.max_entries = max_entries or int(os.getenv('MEDICAL_INFO_CACHE_SIZE', 1024))
+        self.ttl = ttl or float(os.getenv('MEDICAL_INFO_TTL', 86400))
+        self.fallback_ttl = fallback_ttl or float(os.getenv('MEDICAL_INFO_FALLBACK_TTL', 900))
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='medical-info')
+        # A condition or language missed by many requests at once is refreshed once
+        self.flights = SingleFlight(self.executor)
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    def get(self, condition, language='en'):
+        """Medical information for ``condition`` in ``language``"""
+        info = self.english(condition)
+        return self.localize(info, language)
+
+    def english(self, condition):
+        """English payload: the local tips, or a cached search result refreshed in the background"""
+        if condition in self.service.medical_tips_db:
+            return self.service.get_medical_info(condition)
+
+        entry = self.lookup((condition, 'en', SEARCH_SOURCE), condition, SEARCH_SOURCE)
+        if entry is None:
+            self.misses += 1
+            self.refresh(('search', condition), self.search, condition)
+            return self.service.get_fallback_info(condition)
+
+        ttl = self.fallback_ttl if entry['info'].get('source') == 'fallback' else self.ttl
+        if self.clock() - entry['fetched'] > ttl:
+            self.stale += 1
+            self.refresh(('search', condition), self.search, condition)
+        else:
+            self.hits += 1
+        return entry['info']
+
+    def localize(self, info, language):
+        """``info`` with its page text in ``language``, from cache or whatever is already translated"""
+        if language == 'en' or not info:
+            return info
+
+        condition = info.get('condition', '')
+        version = self.content_version(info)
+        key = (condition, language, version)
+        entry = self.lookup(key, f"{condition}\n{version}", LOCALIZED_SOURCE, language)
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        strings = _strings(info)
+        found = self.translator.lookup_batch(strings, language, record_missing=_fixed_text(info))
+        localized = _apply(info, found, language)
+        if all(text in found for text in strings):
+            self.save(key, f"{condition}\n{version}", LOCALIZED_SOURCE, language, localized)
+        else:
+            self.refresh(key, self.translate, info, language)
+        return localized
+
+    def warm(self, condition, language='en'):
+        """Search and translate one pair now, on this thread.
+
+        Returns (warmed, fetched): whether the pair's complete payload is now
+        cached, and whether that took a search or translation call, so the
+        caller only throttles pairs that reached upstream.
+        """
+        fetched = False
+        if condition in self.service.medical_tips_db:
+            info = self.service.get_medical_info(condition)
+        else:
+            entry = self.lookup((condition, 'en', SEARCH_SOURCE), condition, SEARCH_SOURCE)
+            if entry is None or self.clock() - entry['fetched'] > self.ttl:
+                info = self.search(condition)
+                fetched = True
+            else:
+                info = entry['info']
+        if language == 'en':
+            return True, fetched
+
+        version = self.content_version(info)
+        key = (condition, language, version)
+        if self.lookup(key, f"{condition}\n{version}", LOCALIZED_SOURCE, language) is None:
+            strings = _strings(info)
+            found = self.translator.lookup_batch(strings, language, record_missing=_fixed_text(info))
+            if all(text in found for text in strings):
+                self.save(key, f"{condition}\n{version}", LOCALIZED_SOURCE, language, _apply(info, found, language))
+            else:
+                self.translate(info, language)
+                fetched = True
+        return self.lookup(key, f"{condition}\n{version}", LOCALIZED_SOURCE, language) is not None, fetched
+
+    def content_version(self, info):
+        return content_version(self.service.CONTENT_VERSION, json.dumps(info, sort_keys=True))
+
+    def search(self, condition):
+        """Search online and cache the result; runs on the background pool"""
+        info = self.service.search_medical_info(condition)
+        self.save((condition, 'en', SEARCH_SOURCE), condition, SEARCH_SOURCE, 'en',
+                  {'fetched': self.clock(), 'info': info})
+        return info
+
+    def translate(self, info, language):
+        """Translate the payload's missing strings and cache it once complete; runs on the background pool"""
+        strings = _strings(info)
+        self.translator.translate_batch(strings, language, record_missing=_fixed_text(info))
+        found = self.translator.lookup_batch(strings, language)
+        localized = _apply(info, found, language)
+        if all(text in found for text in strings):
+            version = self.content_version(info)
+            condition = info.get('condition', '')
+            self.save((condition, language, version), f"{condition}\n{version}", LOCALIZED_SOURCE, language,
+                      localized)
+        return localized
+
+    def refresh(self, key, fn, *args):
+        return self.flights.submit(key, fn, *args)
+
+    def drain(self, timeout=None):
+        """Wait for the background refreshes in flight"""
+        with self.flights.lock:
+            futures = list(self.flights.in_flight.values())
+        wait(futures, timeout=timeout)
+
+    def lookup(self, key, text, source, language='en'):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        try:
+            stored = self.store.get(text, source, language)
+            value = json.loads(stored) if stored is not None else None
+        except Exception as e:
+            print(f"Error reading medical info cache: {e}")
+            return None
+        if value is not None:
+            self.remember(key, value)
+        return value
+
+    def save(self, key, text, source, language, value):
+        self.remember(key, value)
+        try:
+            self.store.set(text, source, language, json.dumps(value, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error writing medical info cache: {e}")
+
+    def remember(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def snapshot(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses, 'stale': self.stale,
+                'refreshing': len(self.flights.in_flight)}
+
+
+def _strings(info):
+    strings = []
+    for field in LOCALIZED_FIELDS:
+        value = info.get(field)
+        if isinstance(value, str):
+            strings.append(value)
+        elif isinstance(value, list):
+            strings.extend(item for item in value if isinstance(item, str))
+    return [text for text in strings if text]
+
+
+def _fixed_text(info):
+    """Whether a payload's text is the app's own, and so may be recorded for the catalogs"""
+    return info.get('source') != 'online_search'
+
+
+def _apply(info, translations, language):
+    localized = dict(info)
+    for field in LOCALIZED_FIELDS:
+        value = info.get(field)
+        if isinstance(value, str):
+            localized[field] = translations.get(value, value)
+        elif isinstance(value, list):
+            localized[field] = [translations.get(item, item) if isinstance(item, str) else item for item in value]
+    localized['language'] = language
+    return localized
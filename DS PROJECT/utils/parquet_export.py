@@ -0,0 +1,174 @@
+import json
+import os
+import sys
+import uuid
+from collections import defaultdict
+from datetime import datetime
+
+from sqlalchemy import and_, select
+
+from models.bulk import stream_rows
+from models.database import ImageFeatures, Patient, Prediction
+from models.features import FEATURE_FIELDS
+
+WATERMARK_FILE = '_watermark.json'
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def _partition_value(value):
+    """Make a value safe to use as a directory name"""
+    return str(value).strip().lower().replace('/', '_').replace(os.sep, '_') or 'unknown'
+
+
+class ParquetExporter:
+    """Stream predictions, patient demographics and image features to Parquet.
+
+    Files are laid out Hive style as
+    ``<out_dir>/date=YYYY-MM-DD/body_part=<part>/part-<run>-<n>.parquet`` so
+    DuckDB can read the whole tree with
+    ``read_parquet('<out_dir>/**/*.parquet', hive_partitioning = true)``.
+
+    Rows are read through a server-side cursor and buffered per partition;
+    at most ``chunk_size`` rows are held in memory before the largest
+    partition buffer is written out.  After a successful run the highest
+    exported prediction id is saved in ``_watermark.json`` and the next run
+    only exports predictions inserted since.  The watermark is an id rather
+    than a timestamp because bulk imports insert rows with historical dates.
+
+    Ids are not committed in id order (write-queue batches, bulk import
+    workers), so a row below the watermark can become visible after a run.
+    Each run therefore re-scans the last ``window`` ids below the watermark
+    and exports the ones missing from the ids recorded with it.
+    """
+
+    def __init__(self, engine, out_dir, chunk_size=50000, window=1000, out=sys.stdout):
+        self.pa = _require_pyarrow()
+        self.engine = engine
+        self.out_dir = out_dir
+        self.chunk_size = chunk_size
+        self.window = window
+        self.out = out
+        self.run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        self.parts = defaultdict(int)
+        self.files = []
+        self.schema = self.pa.schema(
+            [
+                ('prediction_id', self.pa.int64()),
+                ('patient_id', self.pa.int64()),
+                ('patient_age', self.pa.int32()),
+                ('patient_gender', self.pa.string()),
+                ('prediction_result', self.pa.string()),
+                ('confidence_score', self.pa.float64()),
+                ('created_at', self.pa.timestamp('us')),
+                ('image_hash', self.pa.string()),
+                ('image_quality', self.pa.string()),
+            ] + [(name, self.pa.float32()) for name in FEATURE_FIELDS]
+        )
+
+    @property
+    def watermark_path(self):
+        return os.path.join(self.out_dir, WATERMARK_FILE)
+
+    def load_watermark(self):
+        """(id of the last exported prediction, ids exported within the window below it), or (None, None)"""
+        if not os.path.exists(self.watermark_path):
+            return None, None
+        with open(self.watermark_path, 'r', encoding='utf-8') as f:
+            watermark = json.load(f)
+        # Watermarks written before the window was kept do not re-scan
+        recent = watermark.get('recent')
+        return watermark['id'], set(recent) if recent is not None else None
+
+    def save_watermark(self, prediction_id, recent):
+        temp_path = f"{self.watermark_path}.tmp"
+        recent = sorted(i for i in recent if i > prediction_id - self.window)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'id': prediction_id, 'recent': recent, 'exported_at': datetime.utcnow().isoformat()}, f)
+        os.replace(temp_path, self.watermark_path)
+
+    def build_query(self, pipeline_version, since_id=None):
+        """Predictions joined with patients and features, in id order"""
+        features = ImageFeatures.__table__
+        statement = select(
+            Prediction.id.label('prediction_id'), Prediction.patient_id,
+            Patient.age.label('patient_age'), Patient.gender.label('patient_gender'),
+            Prediction.body_part, Prediction.prediction_result, Prediction.confidence_score,
+            Prediction.created_at, Prediction.image_hash, features.c.image_quality,
+            *[features.c[name] for name in FEATURE_FIELDS]
+        ).join(Patient, Patient.id == Prediction.patient_id) \
+            .outerjoin(features, and_(features.c.image_hash == Prediction.image_hash,
+                                      features.c.pipeline_version == pipeline_version)) \
+            .where(Prediction.created_at.isnot(None)) \
+            .order_by(Prediction.id)
+
+        if since_id is not None:
+            statement = statement.where(Prediction.id > since_id)
+        return statement
+
+    def write_partition(self, key, rows):
+        """Write one buffered partition as a new Parquet file"""
+        import pyarrow.parquet as pq
+
+        day, body_part = key
+        directory = os.path.join(self.out_dir, f"date={day}", f"body_part={_partition_value(body_part)}")
+        os.makedirs(directory, exist_ok=True)
+        self.parts[key] += 1
+        path = os.path.join(directory, f"part-{self.run_id}-{self.parts[key]:05d}.parquet")
+
+        columns = {name: [row[name] for row in rows] for name in self.schema.names}
+        table = self.pa.Table.from_pydict(columns, schema=self.schema)
+        pq.write_table(table, path, compression='zstd')
+        self.files.append(path)
+
+    def run(self, pipeline_version, full=False):
+        """Export everything newer than the watermark.
+
+        ``full=True`` ignores the watermark and exports every prediction
+        again, so it should be pointed at an empty directory.
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        since_id, recent = (None, None) if full else self.load_watermark()
+        if since_id is not None and recent is not None:
+            start = max(since_id - self.window, 0)
+        else:
+            start, recent = since_id, set()
+        statement = self.build_query(pipeline_version, start)
+
+        buffers = defaultdict(list)
+        buffered = 0
+        exported = 0
+        last_id = None
+        with self.engine.connect() as connection:
+            for row in stream_rows(connection, statement, batch_size=min(self.chunk_size, 5000)):
+                row = row._mapping
+                if row['prediction_id'] in recent:
+                    continue
+                key = (row['created_at'].date().isoformat(), row['body_part'])
+                buffers[key].append(dict(row))
+                buffered += 1
+                exported += 1
+                last_id = row['prediction_id']
+                recent.add(last_id)
+
+                if buffered >= self.chunk_size:
+                    # Keep memory bounded: write the partition holding the most rows
+                    largest = max(buffers, key=lambda k: len(buffers[k]))
+                    buffered -= len(buffers[largest])
+                    self.write_partition(largest, buffers.pop(largest))
+                    self.out.write(f"\r  {exported} predictions exported")
+                    self.out.flush()
+
+        for key, rows in buffers.items():
+            self.write_partition(key, rows)
+        if last_id is not None:
+            self.save_watermark(max(last_id, since_id or 0), recent)
+        self.out.write(f"\r  {exported} predictions exported\n")
+        return exported
@@ -0,0 +1,167 @@
+import atexit
+import gzip
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+POLICIES = ('drop', 'block')
+
+
+def _json_default(value):
+    """Serialize numpy scalars and anything else json does not know"""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class PredictionLog:
+    """Buffered prediction log written by a background thread.
+
+    ``log`` only appends to an in-memory ring buffer, so the request path
+    never waits on disk.  A flusher thread drains the buffer every
+    ``flush_interval`` seconds (or as soon as ``batch_size`` entries are
+    waiting) and appends them as one gzip member to
+    ``<directory>/predictions-<start time>-<pid>-<n>.jsonl.gz``, starting a new file
+    once the current one reaches ``max_bytes``.
+
+    When the buffer is full the ``drop`` policy discards the oldest entry and
+    counts it in ``dropped``; ``block`` waits up to ``block_timeout`` seconds
+    for the flusher to make room before dropping.  Buffered entries are
+    flushed at interpreter exit.
+    """
+
+    def __init__(self, directory, capacity=10000, policy='drop', batch_size=500, flush_interval=1.0,
+                 max_bytes=50 * 1024 * 1024, block_timeout=1.0):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown prediction log policy '{policy}', expected one of {POLICIES}")
+
+        self.directory = directory
+        self.capacity = capacity
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.block_timeout = block_timeout
+
+        self.buffer = deque()
+        self.condition = threading.Condition()
+        self.flushing = threading.Lock()
+        self.current_path = None
+        self.files_started = 0
+        self.written = 0
+        self.dropped = 0
+        self.closed = False
+
+        os.makedirs(directory, exist_ok=True)
+        self.thread = threading.Thread(target=self.run, name='prediction-log', daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def log(self, entry):
+        """Buffer one entry; returns False if it (or an older entry) had to be dropped"""
+        with self.condition:
+            if self.closed:
+                return False
+
+            accepted = True
+            if len(self.buffer) >= self.capacity and self.policy == 'block':
+                self.condition.notify_all()
+                deadline = time.monotonic() + self.block_timeout
+                while len(self.buffer) >= self.capacity and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+            if len(self.buffer) >= self.capacity:
+                self.buffer.popleft()
+                self.dropped += 1
+                accepted = False
+
+            self.buffer.append(entry)
+            if len(self.buffer) >= self.batch_size:
+                self.condition.notify_all()
+            return accepted
+
+    def run(self):
+        while True:
+            with self.condition:
+                # Other notifications (a flush waking blocked producers) must not end the wait early
+                deadline = time.monotonic() + self.flush_interval
+                while not self.closed and len(self.buffer) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                if self.closed and not self.buffer:
+                    return
+            self.flush()
+
+    def flush(self):
+        """Write everything currently buffered"""
+        with self.flushing:
+            with self.condition:
+                entries = list(self.buffer)
+                self.buffer.clear()
+                # Wake producers blocked on a full buffer
+                self.condition.notify_all()
+            if entries:
+                try:
+                    self.write(entries)
+                except Exception as e:
+                    print(f"Error writing prediction log: {e}")
+                    with self.condition:
+                        self.dropped += len(entries)
+
+    def write(self, entries):
+        path = self.log_path()
+        lines = ''.join(json.dumps(entry, default=_json_default) + '\n' for entry in entries)
+        # Each batch is a complete gzip member, so a crash never leaves a torn file
+        with open(path, 'ab') as f:
+            with gzip.GzipFile(fileobj=f, mode='wb') as gz:
+                gz.write(lines.encode('utf-8'))
+        self.written += len(entries)
+
+    def log_path(self):
+        """Current file, rotating once it reaches max_bytes"""
+        if self.current_path is None or (os.path.exists(self.current_path)
+                                         and os.path.getsize(self.current_path) >= self.max_bytes):
+            stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+            self.files_started += 1
+            name = f"predictions-{stamp}-{os.getpid()}-{self.files_started:04d}.jsonl.gz"
+            self.current_path = os.path.join(self.directory, name)
+        return self.current_path
+
+    def close(self, timeout=10):
+        """Flush buffered entries and stop the flusher thread"""
+        with self.condition:
+            if self.closed:
+                return
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
+        self.flush()
+
+
+def prediction_log_from_config(config):
+    """Build a PredictionLog from PREDICTION_LOG_* settings, or None when logging is disabled"""
+    if not config.get('PREDICTION_LOG_DIR'):
+        return None
+    return PredictionLog(
+        config['PREDICTION_LOG_DIR'],
+        capacity=config.get('PREDICTION_LOG_CAPACITY', 10000),
+        policy=config.get('PREDICTION_LOG_POLICY', 'drop'),
+        max_bytes=config.get('PREDICTION_LOG_MAX_BYTES', 50 * 1024 * 1024)
+    )
+
+
+def read_prediction_logs(directory):
+    """Yield every logged entry, oldest file first"""
+    for name in sorted(os.listdir(directory)):
+        if name.startswith('predictions-') and name.endswith('.jsonl.gz'):
+            with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
@@ -0,0 +1,129 @@
+import sys
+from collections import Counter, defaultdict
+
+from sqlalchemy import bindparam, select, update
+
+from models.database import ImageFeatures, Patient, Prediction
+from models.features import FEATURE_FIELDS
+from models.medical_content import medical_content_id, pinnable
+from models.stats import TRACKED_COLUMNS, apply_increments, increments_for_rows, merge_increments
+
+
+def _features(row):
+    """Features dict in the shape intelligent_prediction expects"""
+    features = {name: row[name] for name in FEATURE_FIELDS}
+    features['image_quality'] = row['image_quality']
+    features['filename_hints'] = row['filename_hints'].split(',') if row['filename_hints'] else []
+    return features
+
+
+class Rescorer:
+    """Re-run the prediction rules over history from stored image features.
+
+    Predictions are joined to ``image_features`` on image hash and pipeline
+    version and walked in id order, one short transaction per batch, so no
+    image file is opened.  Rows without stored features (uploaded before the
+    feature store existed) are counted as skipped.
+
+    Only predictions whose condition changes are touched: with ``apply=True``
+    they get the new condition, confidence and medical content, and
+    prediction_stats is adjusted in the same transaction.  Without it the run
+    only reports what would change.
+    """
+
+    def __init__(self, engine, predictor, medical_info_service, batch_size=1000, out=sys.stdout):
+        self.engine = engine
+        self.predictor = predictor
+        self.medical_info_service = medical_info_service
+        self.batch_size = batch_size
+        self.out = out
+
+        self.scanned = 0
+        self.skipped = 0
+        self.changed = 0
+        self.transitions = Counter()
+        self.content_ids = {}
+
+    def build_query(self, pipeline_version, after_id, body_part=None):
+        features = ImageFeatures.__table__
+        predictions = Prediction.__table__
+        patients = Patient.__table__
+        statement = select(
+            predictions.c.id, predictions.c.body_part, predictions.c.image_hash,
+            *[predictions.c[name] for name in TRACKED_COLUMNS if name != 'body_part'],
+            patients.c.age, patients.c.gender, features.c.id.label('features_id'),
+            features.c.image_quality, features.c.filename_hints,
+            *[features.c[name] for name in FEATURE_FIELDS]
+        ).select_from(predictions.join(patients, patients.c.id == predictions.c.patient_id)) \
+            .outerjoin(features, (features.c.image_hash == predictions.c.image_hash)
+                       & (features.c.pipeline_version == pipeline_version)) \
+            .where(predictions.c.id > after_id) \
+            .order_by(predictions.c.id).limit(self.batch_size)
+
+        if body_part:
+            statement = statement.where(predictions.c.body_part == body_part)
+        return statement
+
+    def content_id(self, condition):
+        """Medical content row for a condition, resolved once per run"""
+        if condition not in self.content_ids:
+            medical_info_data = self.medical_info_service.get_medical_info(condition)
+            self.content_ids[condition] = medical_content_id(
+                self.engine, medical_info_data, self.medical_info_service.CONTENT_VERSION
+            ) if pinnable(medical_info_data) else None
+        return self.content_ids[condition]
+
+    def rescore(self, row):
+        """New (condition, confidence) for a row, or None when it has no stored features"""
+        if row['features_id'] is None:
+            return None
+        return self.predictor.intelligent_prediction(_features(row), row['body_part'], row['age'], row['gender'])
+
+    def run(self, pipeline_version, apply=False, body_part=None):
+        """Rescore every prediction, returning the number that changed (or would change)"""
+        table = Prediction.__table__
+        change = update(table).where(table.c.id == bindparam('row_id')).values(
+            prediction_result=bindparam('new_result'), confidence_score=bindparam('new_confidence'),
+            medical_content_id=bindparam('new_content_id'), additional_info=None, medical_tips=None
+        )
+        last_id = 0
+        while True:
+            with self.engine.begin() as connection:
+                rows = connection.execute(self.build_query(pipeline_version, last_id, body_part)).mappings().all()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+
+            changes = []
+            for row in rows:
+                self.scanned += 1
+                result = self.rescore(row)
+                if result is None:
+                    self.skipped += 1
+                    continue
+                new_result, new_confidence = result
+                if new_result == row['prediction_result']:
+                    continue
+                self.changed += 1
+                self.transitions[(row['body_part'], row['prediction_result'], new_result)] += 1
+                changes.append((row, new_result, new_confidence))
+
+            if apply and changes:
+                params = [{'row_id': row['id'], 'new_result': new_result, 'new_confidence': new_confidence,
+                           'new_content_id': self.content_id(new_result)}
+                          for row, new_result, new_confidence in changes]
+                with self.engine.begin() as connection:
+                    connection.execute(change, params)
+                    old_rows = [{name: row[name] for name in TRACKED_COLUMNS} for row, _, _ in changes]
+                    new_rows = [dict(old, prediction_result=new_result, confidence_score=new_confidence)
+                                for old, (_, new_result, new_confidence) in zip(old_rows, changes)]
+                    increments = defaultdict(lambda: [0, 0.0])
+                    merge_increments(increments, increments_for_rows(connection, old_rows, sign=-1))
+                    merge_increments(increments, increments_for_rows(connection, new_rows))
+                    apply_increments(connection, increments)
+
+            self.out.write(f"\r  {self.scanned} predictions rescored, {self.changed} changed")
+            self.out.flush()
+
+        self.out.write('\n')
+        return self.changed
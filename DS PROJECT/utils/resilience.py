@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit breaker is open"""
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one.
+
+    ``submit(key, fn)`` runs ``fn`` on the executor and returns its future.
+    While that call is in flight, every other ``submit`` for the same key
+    gets the same future instead of starting a second call.  Callers wait
+    on the future with their own deadline, so a slow upstream call never
+    holds a request thread longer than the caller allows.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.coalesced = 0
+
+    def submit(self, key, fn, *args):
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = self.executor.submit(fn, *args)
+            self.in_flight[key] = future
+        future.add_done_callback(lambda done: self.forget(key, done))
+        return future
+
+    def forget(self, key, future):
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+
+class CircuitBreaker:
+    """Stop calling an upstream after repeated failures.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow`` refuses every call for ``reset_timeout`` seconds.  Then one
+    trial call is let through (half open): success closes the circuit,
+    failure opens it again.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+    def allow(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self.trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            self.trial_in_flight = False
+
+    def snapshot(self):
+        with self.lock:
+            return {'state': self.state, 'consecutive_failures': self.failures}
+
+
+class CallMetrics:
+    """Call counts, errors and latency percentiles per key (e.g. per language)"""
+
+    def __init__(self, window=500):
+        self.window = window
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def entry(self, key):
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = {'calls': 0, 'errors': 0, 'timeouts': 0, 'rejected': 0,
+                                       'latencies': deque(maxlen=self.window)}
+        return stats
+
+    def record(self, key, seconds, error=False):
+        with self.lock:
+            stats = self.entry(key)
+            stats['calls'] += 1
+            stats['latencies'].append(seconds)
+            if error:
+                stats['errors'] += 1
+
+    def increment(self, key, counter):
+        with self.lock:
+            self.entry(key)[counter] += 1
+
+    def snapshot(self):
+        """Counters plus p50/p95/max latency in milliseconds over the last ``window`` calls"""
+        with self.lock:
+            result = {}
+            for key, stats in self.stats.items():
+                latencies = sorted(stats['latencies'])
+                summary = {name: stats[name] for name in ('calls', 'errors', 'timeouts', 'rejected')}
+                if latencies:
+                    summary.update({
+                        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 1),
+                        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                        'max_ms': round(latencies[-1] * 1000, 1),
+                    })
+                result[key] = summary
+            return result
@@ -0,0 +1,239 @@
+import threading
+
+import numpy as np
+from sqlalchemy import and_, select
+
+from models.features import FEATURE_FIELDS
+
+# Features that are not already in 0..1 are divided by their full-scale value
+FEATURE_SCALES = {'brightness': 255.0, 'contrast': 128.0}
+
+# Rows per chunk when assigning vectors to IVF lists, to bound memory
+ASSIGN_CHUNK = 65536
+
+
+def feature_vector(features):
+    """Normalized float32 vector for a features dict (or image_features row)"""
+    return np.array([float(features[name]) / FEATURE_SCALES.get(name, 1.0) for name in FEATURE_FIELDS],
+                    dtype=np.float32)
+
+
+def _squared_distances(vectors, norms, query):
+    """Squared Euclidean distances from every row to ``query`` via one matrix product"""
+    return norms - 2.0 * (vectors @ query) + float(query @ query)
+
+
+class SimilarCaseIndex:
+    """Nearest-neighbour index over per-prediction feature vectors.
+
+    Vectors live in one contiguous float32 matrix that doubles in size as it
+    fills.  Searches are exact (a single matrix product over the candidate
+    rows) until ``ivf_threshold`` vectors have been added; the index then
+    clusters the matrix with k-means into about sqrt(n) inverted lists and
+    only scans the ``nprobe`` lists closest to the query.  New vectors are
+    appended to their nearest list; call ``train`` again to rebalance.  With
+    ``mode='exact'`` the index never switches to inverted lists.
+
+    Every vector carries an owner (the clinician) and a group (the body part)
+    so searches never mix tenants or compare a hand with a chest.
+    """
+
+    def __init__(self, dim=len(FEATURE_FIELDS), mode='auto', ivf_threshold=50000, nprobe=8, capacity=1024):
+        if mode not in ('auto', 'exact'):
+            raise ValueError(f"Unknown similar case index mode '{mode}'")
+        self.dim = dim
+        self.mode = mode
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.norms = np.empty(capacity, dtype=np.float32)
+        self.ids = np.empty(capacity, dtype=np.int64)
+        self.owners = np.empty(capacity, dtype=np.int64)
+        self.groups = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+        self.positions = {}
+        self.group_codes = {}
+
+        self.centroids = None
+        self.lists = None
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, item_id):
+        return item_id in self.positions
+
+    def group_code(self, group):
+        return self.group_codes.setdefault(group, len(self.group_codes))
+
+    def grow(self):
+        capacity = max(1, len(self.vectors)) * 2
+        for name in ('vectors', 'norms', 'ids', 'owners', 'groups'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, item_id, vector, owner, group):
+        """Add one vector; ids already present are ignored"""
+        with self.lock:
+            if item_id in self.positions:
+                return
+            if self.size == len(self.vectors):
+                self.grow()
+            row = self.size
+            self.vectors[row] = vector
+            self.norms[row] = float(vector @ vector)
+            self.ids[row] = item_id
+            self.owners[row] = owner
+            self.groups[row] = self.group_code(group)
+            self.positions[item_id] = row
+            self.size += 1
+
+            if self.centroids is not None:
+                self.lists[int(np.argmin(_squared_distances(self.centroids, self.centroid_norms, vector)))].append(row)
+            elif self.mode == 'auto' and self.size >= self.ivf_threshold:
+                self.train()
+
+    def vector(self, item_id):
+        with self.lock:
+            row = self.positions.get(item_id)
+            return None if row is None else self.vectors[row].copy()
+
+    def train(self, n_lists=None, iterations=8, seed=0):
+        """Cluster the current vectors into inverted lists with k-means"""
+        with self.lock:
+            data = self.vectors[:self.size]
+            n_lists = n_lists or max(1, int(np.sqrt(self.size)))
+            rng = np.random.default_rng(seed)
+            centroids = data[rng.choice(self.size, size=min(n_lists, self.size), replace=False)].copy()
+
+            for _ in range(iterations):
+                assignment = self.assign(data, centroids)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assignment, data)
+                counts = np.bincount(assignment, minlength=len(centroids))
+                filled = counts > 0
+                centroids[filled] = sums[filled] / counts[filled, None]
+
+            assignment = self.assign(data, centroids)
+            self.centroids = centroids
+            self.centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+            self.lists = [[] for _ in range(len(centroids))]
+            for row, cluster in enumerate(assignment):
+                self.lists[cluster].append(row)
+
+    @staticmethod
+    def assign(data, centroids):
+        """Nearest centroid for every row, computed in chunks"""
+        centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+        assignment = np.empty(len(data), dtype=np.int64)
+        for start in range(0, len(data), ASSIGN_CHUNK):
+            chunk = data[start:start + ASSIGN_CHUNK]
+            distances = centroid_norms[None, :] - 2.0 * (chunk @ centroids.T)
+            assignment[start:start + ASSIGN_CHUNK] = np.argmin(distances, axis=1)
+        return assignment
+
+    def candidate_rows(self, query):
+        if self.centroids is None:
+            return np.arange(self.size)
+        nearest = np.argsort(_squared_distances(self.centroids, self.centroid_norms, query))[:self.nprobe]
+        return np.fromiter((row for cluster in nearest for row in self.lists[cluster]), dtype=np.int64)
+
+    def matching_rows(self, rows, owner=None, group=None, exclude=None):
+        """The rows passing the owner, group and exclude filters"""
+        mask = np.ones(len(rows), dtype=bool)
+        if owner is not None:
+            mask &= self.owners[rows] == owner
+        if group is not None:
+            if group not in self.group_codes:
+                return rows[:0]
+            mask &= self.groups[rows] == self.group_codes[group]
+        if exclude is not None:
+            mask &= self.ids[rows] != exclude
+        return rows[mask]
+
+    def search(self, query, k=5, owner=None, group=None, exclude=None):
+        """[(item_id, distance)] of the k nearest vectors, nearest first.
+
+        The filters are applied before choosing how to scan: a tenant or body
+        part with fewer than ``ivf_threshold`` rows is scanned exactly, since
+        probing a few lists of the whole index would leave it few neighbours.
+        """
+        with self.lock:
+            if not self.size:
+                return []
+            rows = self.matching_rows(np.arange(self.size), owner, group, exclude)
+            if self.centroids is not None and len(rows) >= self.ivf_threshold:
+                probed = self.matching_rows(self.candidate_rows(query), owner, group, exclude)
+                if len(probed) >= k:
+                    rows = probed
+            if not len(rows):
+                return []
+
+            distances = _squared_distances(self.vectors[rows], self.norms[rows], query)
+            k = min(k, len(rows))
+            top = np.argpartition(distances, k - 1)[:k]
+            top = top[np.argsort(distances[top], kind='stable')]
+            return [(int(self.ids[rows[i]]), float(np.sqrt(max(distances[i], 0.0)))) for i in top]
+
+
+class SimilarCases:
+    """SimilarCaseIndex kept in step with the predictions table.
+
+    The index is filled from predictions joined to their stored features on
+    first use; each lookup first loads predictions newer than the last one
+    seen, so rows written by other workers show up as well.  Ids are not
+    committed in id order, so the last ``window`` ids below the highest one
+    seen are re-scanned too and the ones not indexed yet are added.
+    """
+
+    def __init__(self, pipeline_version, window=1000, **options):
+        self.pipeline_version = pipeline_version
+        self.window = window
+        self.options = options
+        self.index = SimilarCaseIndex(**options)
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        """Forget everything loaded (after the tables are recreated)"""
+        with self.lock:
+            self.index = SimilarCaseIndex(**self.options)
+            self.last_id = 0
+
+    def add(self, prediction_id, features, user_id, body_part):
+        self.index.add(prediction_id, feature_vector(features), user_id, body_part)
+
+    def refresh(self, connection):
+        """Load predictions (with stored features) added since the last refresh, or committed late below it"""
+        from models.database import ImageFeatures, Patient, Prediction
+
+        predictions = Prediction.__table__
+        patients = Patient.__table__
+        features = ImageFeatures.__table__
+        with self.lock:
+            rows = connection.execute(
+                select(predictions.c.id, predictions.c.body_part, patients.c.user_id,
+                       *[features.c[name] for name in FEATURE_FIELDS])
+                .select_from(predictions.join(patients, patients.c.id == predictions.c.patient_id))
+                .join(features, and_(features.c.image_hash == predictions.c.image_hash,
+                                     features.c.pipeline_version == self.pipeline_version))
+                .where(predictions.c.id > max(self.last_id - self.window, 0))
+                .order_by(predictions.c.id)
+            ).mappings().all()
+            for row in rows:
+                if row['id'] not in self.index:
+                    self.add(row['id'], row, row['user_id'], row['body_part'])
+            if rows:
+                self.last_id = max(self.last_id, rows[-1]['id'])
+
+    def similar(self, connection, prediction_id, user_id, body_part, k=5):
+        """[(prediction_id, distance)] of the clinician's k most similar other cases"""
+        self.refresh(connection)
+        vector = self.index.vector(prediction_id)
+        if vector is None:
+            return []
+        return self.index.search(vector, k=k, owner=user_id, group=body_part, exclude=prediction_id)
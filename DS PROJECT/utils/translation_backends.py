@@ -0,0 +1,55 @@
+import os
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class GoogletransBackend:
+    """Unofficial Google Translate client from the googletrans package"""
+
+    def __init__(self, timeout=10.0):
+        from googletrans import Translator
+
+        self.translator = Translator(timeout=timeout)
+
+    def translate(self, text, target_language, source_language='auto'):
+        return self.translator.translate(text, dest=target_language, src=source_language).text
+
+    def detect(self, text):
+        return self.translator.detect(text).lang
+
+
+class LibreTranslateBackend:
+    """Any server speaking the LibreTranslate HTTP API (``POST /translate``, ``POST /detect``)"""
+
+    def __init__(self, url, api_key=None, timeout=10.0, pool_size=10):
+        self.url = url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def post(self, path, payload):
+        if self.api_key:
+            payload['api_key'] = self.api_key
+        response = self.session.post(f"{self.url}{path}", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def translate(self, text, target_language, source_language='auto'):
+        return self.post('/translate', {'q': text, 'source': source_language, 'target': target_language,
+                                        'format': 'text'})['translatedText']
+
+    def detect(self, text):
+        return self.post('/detect', {'q': text})[0]['language']
+
+
+def backend_from_env(timeout=10.0, pool_size=10):
+    """LibreTranslate when TRANSLATION_API_URL is set, googletrans otherwise"""
+    url = os.getenv('TRANSLATION_API_URL')
+    if url:
+        return LibreTranslateBackend(url, api_key=os.getenv('TRANSLATION_API_KEY'), timeout=timeout,
+                                     pool_size=pool_size)
+    return GoogletransBackend(timeout=timeout)
@@ -0,0 +1,205 @@
+import re
+import threading
+import zlib
+from difflib import SequenceMatcher
+
+import numpy as np
+
+# Stand-in for any variable slot when templates are compared word by word
+SLOT = '\x00slot'
+TOKEN = re.compile(r"\{\d+\}|\w+(?:['’-]\w+)*|[^\w\s]")
+PLACEHOLDER = re.compile(r"\{(\d+)\}")
+# Above 2^32 so that (a * h + b) mod P permutes 32-bit shingle hashes
+PRIME = 4294967311
+
+
+class TranslationMemory:
+    """Reuse translations of templated strings instead of translating each one.
+
+    Known terms (condition names) in a string are replaced by ``{0}``,
+    ``{1}``... placeholders.  The template is translated once per language
+    and every string that only differs in those terms is filled in from the
+    translated term table, so "Medical condition detected: Pneumonia" and
+    "...: Fracture" share one upstream translation.
+
+    Templates are also indexed with MinHash/LSH over word shingles.  A
+    string whose template has no exact match can reuse the nearest template
+    with Jaccard similarity of at least ``threshold``, but only when the two
+    differ purely in slots: each placeholder of the stored template lines up
+    with a slot of the new string or with a run of at most ``max_slot_words``
+    words that is a known term in other letter case, and every other word is
+    identical.  Runs that are not known terms are misses, and nothing seen at
+    runtime ever becomes a term: in medical text a "small edit" such as
+    "not present" for a condition name changes the meaning.
+    """
+
+    def __init__(self, store, terms=(), threshold=0.5, num_perm=64, bands=32, max_slot_words=4,
+                 max_templates=10000):
+        self.store = store
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_slot_words = max_slot_words
+        self.max_templates = max_templates
+        self.lock = threading.Lock()
+        self.terms = set()
+        self.folded_terms = set()
+        self.pattern = None
+        self.indexes = {}
+        self.template_hits = 0
+        self.fuzzy_hits = 0
+
+        generator = np.random.default_rng(20240601)
+        self.a = generator.integers(1, 2 ** 31, size=num_perm, dtype=np.uint64)
+        self.b = generator.integers(0, 2 ** 31, size=num_perm, dtype=np.uint64)
+        self.add_terms(terms)
+
+    def add_terms(self, terms):
+        """Treat these strings as variable slots from now on"""
+        terms = {term.strip() for term in terms if term and term.strip() and '{' not in term}
+        with self.lock:
+            if terms <= self.terms:
+                return
+            self.terms |= terms
+            self.folded_terms = {term.casefold() for term in self.terms}
+            alternatives = '|'.join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True))
+            self.pattern = re.compile(rf"(?<!\w)(?:{alternatives})(?!\w)")
+
+    def template(self, text):
+        """(template, values): known terms in ``text`` replaced by {0}, {1}..."""
+        pattern = self.pattern
+        if pattern is None or '{' in text:
+            return text, []
+        values = []
+
+        def slot(match):
+            values.append(match.group(0))
+            return f"{{{len(values) - 1}}}"
+
+        template = pattern.sub(slot, text)
+        # A string that is nothing but a term is translated as it is
+        if not PLACEHOLDER.sub('', template).strip(' \t\n:;,.-'):
+            return text, []
+        return template, values
+
+    def match(self, text, target_language):
+        """(translated template, values) for ``text`` from an exact or fuzzy template match, or None"""
+        template, values = self.template(text)
+        if values:
+            translated = self.store.get(template, 'template', target_language)
+            if translated is not None:
+                self.template_hits += 1
+                return translated, values
+        return self.fuzzy_match(template, values, target_language)
+
+    def fuzzy_match(self, template, values, target_language):
+        tokens = _tokens(template)
+        shingles = _shingles(tokens)
+        if not shingles:
+            return None
+        index = self.index(target_language)
+        candidates = set()
+        signature = self.signature(shingles)
+        for band, key in enumerate(self.band_keys(signature)):
+            candidates |= index['buckets'][band].get(key, set())
+
+        ranked = []
+        for candidate in candidates:
+            candidate_tokens, candidate_shingles, translated = index['templates'][candidate]
+            similarity = len(shingles & candidate_shingles) / len(shingles | candidate_shingles)
+            if similarity >= self.threshold:
+                ranked.append((similarity, candidate, candidate_tokens, translated))
+
+        for similarity, candidate, candidate_tokens, translated in sorted(ranked, reverse=True):
+            candidate_values = self.align(template, tokens, values, candidate_tokens)
+            if candidate_values is not None:
+                self.fuzzy_hits += 1
+                return translated, candidate_values
+        return None
+
+    def align(self, template, tokens, values, candidate_tokens):
+        """Values for the candidate's slots if ``tokens`` differ from it only in slots, else None"""
+        query = [SLOT if PLACEHOLDER.fullmatch(token) else token.lower() for token, _, _ in tokens]
+        stored = [SLOT if PLACEHOLDER.fullmatch(token) else token.lower() for token, _, _ in candidate_tokens]
+        candidate_values = {}
+        matcher = SequenceMatcher(None, stored, query, autojunk=False)
+        for operation, i1, i2, j1, j2 in matcher.get_opcodes():
+            if operation == 'equal':
+                for i, j in zip(range(i1, i2), range(j1, j2)):
+                    if stored[i] == SLOT:
+                        candidate_values[_slot_number(candidate_tokens[i][0])] = \
+                            values[_slot_number(tokens[j][0])]
+                continue
+            span = tokens[j1:j2]
+            if (operation != 'replace' or i2 - i1 != 1 or stored[i1] != SLOT
+                    or not 1 <= j2 - j1 <= self.max_slot_words
+                    or not all(token[0][0].isalnum() for token in span)
+                    or any(query[j] == SLOT for j in range(j1, j2))):
+                return None
+            value = template[span[0][1]:span[-1][2]]
+            if value.casefold() not in self.folded_terms:
+                return None
+            candidate_values[_slot_number(candidate_tokens[i1][0])] = value
+
+        if sorted(candidate_values) != list(range(len(candidate_values))):
+            return None
+        return [candidate_values[i] for i in range(len(candidate_values))]
+
+    def remember(self, template, target_language, translated):
+        """Store a translated template if its placeholders survived translation"""
+        expected = sorted(PLACEHOLDER.findall(template))
+        if sorted(PLACEHOLDER.findall(translated)) != expected:
+            return False
+        self.store.set(template, 'template', target_language, translated)
+        index = self.indexes.get(target_language)
+        if index is not None:
+            self.add_to_index(index, template, translated)
+        return True
+
+    def fill(self, translated_template, term_translations):
+        return PLACEHOLDER.sub(lambda match: term_translations[int(match.group(1))], translated_template)
+
+    def index(self, target_language):
+        """LSH buckets over this language's stored templates, loaded from the store on first use"""
+        index = self.indexes.get(target_language)
+        if index is None:
+            with self.lock:
+                index = self.indexes.get(target_language)
+                if index is None:
+                    index = {'templates': {}, 'buckets': [{} for _ in range(self.bands)]}
+                    for template, translated in self.store.entries('template', target_language,
+                                                                   limit=self.max_templates):
+                        self.add_to_index(index, template, translated)
+                    self.indexes[target_language] = index
+        return index
+
+    def add_to_index(self, index, template, translated):
+        if template in index['templates'] or len(index['templates']) >= self.max_templates:
+            return
+        tokens = _tokens(template)
+        shingles = _shingles(tokens)
+        if not shingles:
+            return
+        index['templates'][template] = (tokens, shingles, translated)
+        for band, key in enumerate(self.band_keys(self.signature(shingles))):
+            index['buckets'][band].setdefault(key, set()).add(template)
+
+    def signature(self, shingles):
+        hashes = np.array([zlib.crc32(shingle.encode('utf-8')) for shingle in shingles], dtype=np.uint64)
+        return ((self.a[:, None] * hashes[None, :] + self.b[:, None]) % PRIME).min(axis=1)
+
+    def band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+
+def _tokens(text):
+    return [(match.group(0), match.start(), match.end()) for match in TOKEN.finditer(text)]
+
+
+def _shingles(tokens):
+    words = ['{}' if PLACEHOLDER.fullmatch(token) else token.lower() for token, _, _ in tokens]
+    return set(words) | {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+def _slot_number(token):
+    return int(token[1:-1])
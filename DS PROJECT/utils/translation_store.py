@@ -0,0 +1,195 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+# Every open store, so a forked child can keep the parent's connections alive.
+# Closing an inherited SQLite connection in a child releases the parent's
+# locks and can checkpoint or truncate the WAL under other processes.
+_stores = weakref.WeakSet()
+_inherited_connections = []
+
+
+def _pin_inherited_connections():
+    for store in list(_stores):
+        _inherited_connections.extend(store.connections.values())
+        store.connections.clear()
+        # Another thread may have held it at the fork; that thread does not exist here
+        store.lock = threading.Lock()
+
+
+def _close_connections(connections):
+    # sqlite3 connections sit in a reference cycle with their statement cache,
+    # so without this they stay open until the cyclic GC runs, possibly in a
+    # forked child where closing them does the damage described above
+    for connection in connections.values():
+        connection.close()
+    connections.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_pin_inherited_connections)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    source_language TEXT NOT NULL,
+    target_language TEXT NOT NULL,
+    text TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (text, source_language, target_language)
+);
+CREATE INDEX IF NOT EXISTS ix_translations_last_used ON translations (last_used);
+CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class TranslationStore:
+    """Translation cache in an SQLite file shared by every worker process.
+
+    Each ``set`` is its own small transaction, so nothing is rewritten in
+    bulk and concurrent workers never overwrite each other's entries.
+    Lookups are point queries, so nothing is loaded at startup.
+
+    The store holds at most ``max_entries`` translations.  A hit refreshes
+    the entry's ``last_used`` time at most once per ``touch_interval``
+    seconds, and once the cap is exceeded the least recently used entries
+    are evicted.  An existing ``translation_cache.json`` is imported once.
+    """
+
+    def __init__(self, path, max_entries=100000, touch_interval=60.0, legacy_json=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.connections = {}
+        self.lock = threading.Lock()
+        self.inserts = 0
+        _stores.add(self)
+        weakref.finalize(self, _close_connections, self.connections)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+        if legacy_json:
+            self.import_json(legacy_json)
+
+    def connection(self):
+        """One connection per thread, in WAL mode so readers never wait on a writer"""
+        # Registers threads not started by the threading module, so pruning sees them as alive;
+        # done on every call since such a thread may inherit an exited thread's ident and connection
+        threading.current_thread()
+        connection = self.connections.get(threading.get_ident())
+        if connection is None:
+            # Used only by its own thread, but may be closed from whichever thread frees the store
+            connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self.lock:
+                self.prune_connections()
+                self.connections[threading.get_ident()] = connection
+        return connection
+
+    def prune_connections(self):
+        """Close the connections of threads that have exited, so thread churn does not leak handles.
+
+        Called with ``self.lock`` held.
+        """
+        alive = {thread.ident for thread in threading.enumerate()}
+        for ident, connection in list(self.connections.items()):
+            if ident not in alive:
+                del self.connections[ident]
+                connection.close()
+
+    def get(self, text, source_language, target_language):
+        """Cached translation, or None"""
+        row = self.connection().execute(
+            "SELECT translation, last_used FROM translations "
+            "WHERE text = ? AND source_language = ? AND target_language = ?",
+            (text, source_language, target_language)
+        ).fetchone()
+        if row is None:
+            return None
+
+        translation, last_used = row
+        now = time.time()
+        if now - last_used > self.touch_interval:
+            try:
+                with self.connection() as connection:
+                    connection.execute(
+                        "UPDATE translations SET last_used = ? "
+                        "WHERE text = ? AND source_language = ? AND target_language = ?",
+                        (now, text, source_language, target_language)
+                    )
+            except sqlite3.OperationalError:
+                # Recency is best effort; never fail a lookup over it
+                pass
+        return translation
+
+    def set(self, text, source_language, target_language, translation):
+        with self.connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO translations "
+                "(source_language, target_language, text, translation, last_used) VALUES (?, ?, ?, ?, ?)",
+                (source_language, target_language, text, translation, time.time())
+            )
+        self.inserts += 1
+        # Checking the size on every insert would be a full count; every 100 is plenty
+        if self.inserts % 100 == 0:
+            self.evict()
+
+    def entries(self, source_language, target_language, limit=10000):
+        """(text, translation) pairs for one language pair, most recently used first"""
+        return self.connection().execute(
+            "SELECT text, translation FROM translations WHERE source_language = ? AND target_language = ? "
+            "ORDER BY last_used DESC LIMIT ?", (source_language, target_language, limit)
+        ).fetchall()
+
+    def evict(self):
+        """Drop least recently used entries beyond max_entries, returning how many went"""
+        with self.connection() as connection:
+            count = connection.execute("SELECT count(*) FROM translations").fetchone()[0]
+            excess = count - self.max_entries
+            if excess <= 0:
+                return 0
+            connection.execute(
+                "DELETE FROM translations WHERE rowid IN "
+                "(SELECT rowid FROM translations ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            return excess
+
+    def __len__(self):
+        return self.connection().execute("SELECT count(*) FROM translations").fetchone()[0]
+
+    def import_json(self, json_path):
+        """Import a legacy ``{"<text>_<source>_<target>": translation}`` file once"""
+        if not os.path.exists(json_path):
+            return 0
+        marker = f"imported:{os.path.abspath(json_path)}"
+        connection = self.connection()
+        if connection.execute("SELECT 1 FROM store_meta WHERE key = ?", (marker,)).fetchone():
+            return 0
+
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error reading legacy translation cache: {e}")
+            return 0
+
+        rows = []
+        now = time.time()
+        for key, translation in entries.items():
+            parts = key.rsplit('_', 2)
+            if len(parts) == 3 and isinstance(translation, str):
+                rows.append((parts[1], parts[2], parts[0], translation, now))
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO translations "
+                "(source_language, target_language, text, translation, last_used) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            connection.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES (?, ?)",
+                               (marker, str(len(rows))))
+        return len(rows)
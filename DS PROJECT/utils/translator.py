@@ -1,11 +1,34 @@
 import os
-from googletrans import Translator
-import json
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+from utils.catalogs import CatalogStore
+from utils.resilience import CallMetrics, CircuitBreaker, CircuitOpenError, SingleFlight
+from utils.translation_backends import backend_from_env
+from utils.translation_memory import TranslationMemory
+from utils.translation_store import TranslationStore
 
 class TranslationService:
-    def __init__(self):
-        self.translator = Translator()
+    # Joins strings packed into one upstream call; translators leave the glyph alone
+    BATCH_DELIMITER = '\n⁂\n'
+    # Upstream services reject requests much over 5000 characters
+    MAX_BATCH_CHARS = 4500
+
+    def __init__(self, cache_path=None, max_cache_entries=None, backend=None, max_concurrency=None,
+                 call_timeout=None, batch_timeout=None, breaker_failures=None, breaker_reset=None,
+                 catalog_dir=None, memory_threshold=None):
+        self.call_timeout = call_timeout or float(os.getenv('TRANSLATION_CALL_TIMEOUT', 10))
+        self.batch_timeout = batch_timeout or float(os.getenv('TRANSLATION_BATCH_TIMEOUT', 15))
+        max_concurrency = max_concurrency or int(os.getenv('TRANSLATION_MAX_CONCURRENCY', 4))
+        self.backend = backend or backend_from_env(timeout=self.call_timeout, pool_size=max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='translate')
+        # Concurrent misses for one string share a call; repeated failures stop calls for a while
+        self.flights = SingleFlight(self.executor)
+        self.breaker = CircuitBreaker(
+            failure_threshold=breaker_failures or int(os.getenv('TRANSLATION_BREAKER_FAILURES', 5)),
+            reset_timeout=breaker_reset or float(os.getenv('TRANSLATION_BREAKER_RESET', 30))
+        )
+        self.metrics = CallMetrics()
         self.supported_languages = {
             'en': 'English',
             'hi': 'Hindi',
@@ -26,72 +49,289 @@ class TranslationService:
             'ko': 'Korean',
             'ar': 'Arabic'
         }
-        self.cache = {}
+        # Legacy cache file, imported into the store the first time it is opened
         self.cache_file = 'translation_cache.json'
-        self.load_cache()
+        self.cache = TranslationStore(
+            cache_path or os.getenv('TRANSLATION_CACHE_DB', 'translation_cache.db'),
+            max_entries=max_cache_entries or int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', 100000)),
+            legacy_json=self.cache_file
+        )
+        # Static text compiled ahead of time by `mediscan.py build-catalogs`
+        self.catalogs = CatalogStore(catalog_dir or os.getenv('TRANSLATION_CATALOG_DIR', 'catalogs'))
+        # Strings that differ only in condition names share one translated template
+        self.memory = TranslationMemory(
+            self.cache, threshold=memory_threshold or float(os.getenv('TRANSLATION_MEMORY_THRESHOLD', 0.5))
+        )
     
-    def load_cache(self):
-        """Load translation cache from file"""
-        try:
-            if os.path.exists(self.cache_file):
-                import builtins
-                with builtins.open(self.cache_file, 'r', encoding='utf-8') as f:
-                    self.cache = json.load(f)
-        except Exception as e:
-            print(f"Error loading translation cache: {e}")
-            self.cache = {}
-    
-    def save_cache(self):
-        """Save translation cache to file"""
-        try:
-            import builtins
-            with builtins.open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"Error saving translation cache: {e}")
-    
-    def translate_text(self, text, target_language='en', source_language='auto'):
+    def translate_text(self, text, target_language='en', source_language='auto', record_missing=False):
         """Translate text to target language"""
         if not text or target_language == 'en':
             return text
         
-        # Create cache key
-        cache_key = f"{text}_{source_language}_{target_language}"
-        
+        translated_text = self.catalog_lookup(text, target_language, source_language, record_missing)
+        if translated_text is not None:
+            return translated_text
+
         # Check cache first
-        if cache_key in self.cache:
-            return self.cache[cache_key]
+        cached = self.cache.get(text, source_language, target_language)
+        if cached is not None:
+            return cached
         
+        # However many requests miss on this string at once, only one goes upstream
+        future = self.flights.submit((text, source_language, target_language), self.fetch,
+                                     text, target_language, source_language)
         try:
-            # Translate using Google Translate
-            result = self.translator.translate(text, dest=target_language, src=source_language)
-            translated_text = result.text
-            
-            # Cache the result
-            self.cache[cache_key] = translated_text
-            
-            # Save cache periodically
-            if len(self.cache) % 10 == 0:
-                self.save_cache()
-            
-            return translated_text
-            
+            return future.result(timeout=self.call_timeout)
+        except FutureTimeout:
+            self.metrics.increment(target_language, 'timeouts')
+            print(f"Translation deadline exceeded for {target_language}")
+            return text
         except Exception as e:
             print(f"Translation error: {e}")
             return text  # Return original text if translation fails
+
+    def catalog_lookup(self, text, target_language, source_language, record_missing=False):
+        """Prebuilt catalog translation of English text.
+
+        Misses are recorded for the next build only when ``record_missing``
+        is set, by callers whose text is fixed app content; free text from
+        users or online searches must never end up in the build files.
+        """
+        if source_language not in ('auto', 'en'):
+            return None
+        translated_text = self.catalogs.lookup(text, target_language)
+        if translated_text is None and record_missing:
+            self.catalogs.record_missing(text, target_language)
+        return translated_text
+
+    def fetch(self, text, target_language, source_language):
+        """Translate upstream and cache the result, even if the caller stopped waiting"""
+        translated_text = self.recall(text, target_language, source_language)
+        if translated_text is None:
+            translated_text = self.call_backend(text, target_language, source_language)
+        self.cache.set(text, source_language, target_language, translated_text)
+        return translated_text
+
+    def recall(self, text, target_language, source_language):
+        """Translation built from a stored or newly translated template and its terms, or None"""
+        matched = self.memory.match(text, target_language)
+        if matched:
+            translated_template, values = matched
+        else:
+            template, values = self.memory.template(text)
+            if not values:
+                return None
+            translated_template = self.call_backend(template, target_language, source_language)
+            if not self.memory.remember(template, target_language, translated_template):
+                return None
+
+        terms = []
+        for value in values:
+            term = self.cache.get(value, source_language, target_language)
+            if term is None:
+                term = self.call_backend(value, target_language, source_language)
+                self.cache.set(value, source_language, target_language, term)
+            terms.append(term)
+        return self.memory.fill(translated_template, terms)
+
+    def call_backend(self, text, target_language, source_language):
+        """One upstream call, refused while the circuit is open and timed per language"""
+        if not self.breaker.allow():
+            self.metrics.increment(target_language, 'rejected')
+            raise CircuitOpenError(f"Translation circuit open, not translating to {target_language}")
+
+        started = time.perf_counter()
+        try:
+            translated_text = self.backend.translate(text, target_language, source_language)
+        except Exception:
+            self.metrics.record(target_language, time.perf_counter() - started, error=True)
+            self.breaker.record_failure()
+            raise
+
+        # A reply that arrives after the deadline is still cached, but counts against the upstream
+        elapsed = time.perf_counter() - started
+        slow = elapsed > self.call_timeout
+        self.metrics.record(target_language, elapsed, error=slow)
+        if slow:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return translated_text
+
+    def get_metrics(self):
+        """Per-language call counts and latency, circuit state and coalesced calls"""
+        return {
+            'languages': self.metrics.snapshot(),
+            'circuit': self.breaker.snapshot(),
+            'coalesced': self.flights.coalesced,
+            'memory': {'template_hits': self.memory.template_hits, 'fuzzy_hits': self.memory.fuzzy_hits},
+        }
     
+    def translate_batch(self, texts, target_language='en', source_language='auto', timeout=None, use_catalog=True,
+                        record_missing=False):
+        """Translate many strings at once, returning the translations in order.
+
+        Duplicates are translated once, and catalog and cache hits never leave
+        the process (building the catalogs passes ``use_catalog=False``).
+        Misses that fit a translated template are filled in from the
+        translation memory.  The rest are packed into as few upstream calls as fit
+        MAX_BATCH_CHARS, which run concurrently on a bounded pool.  Anything
+        not translated within ``timeout`` seconds (or that fails) comes back
+        untranslated, like translate_text.
+        """
+        texts = list(texts)
+        if target_language == 'en':
+            return texts
+
+        translations = {}
+        misses = []
+        for text in dict.fromkeys(text for text in texts if text):
+            translated_text = (self.catalog_lookup(text, target_language, source_language, record_missing)
+                               if use_catalog else None)
+            if translated_text is not None:
+                translations[text] = translated_text
+                continue
+            cached = self.cache.get(text, source_language, target_language)
+            if cached is not None:
+                translations[text] = cached
+            else:
+                misses.append(text)
+
+        if misses:
+            deadline = time.monotonic() + (timeout or self.batch_timeout)
+            translations.update(self.translate_misses(misses, target_language, source_language, deadline))
+
+        return [translations.get(text, text) if text else text for text in texts]
+
+    def lookup_batch(self, texts, target_language='en', source_language='auto', record_missing=False):
+        """{text: translation} for the strings already in a catalog or the cache; never calls upstream"""
+        if target_language == 'en':
+            return {text: text for text in texts}
+        found = {}
+        for text in dict.fromkeys(text for text in texts if text):
+            translated_text = self.catalog_lookup(text, target_language, source_language, record_missing)
+            if translated_text is None:
+                translated_text = self.cache.get(text, source_language, target_language)
+            if translated_text is not None:
+                found[text] = translated_text
+        return found
+
+    def translate_misses(self, texts, target_language, source_language, deadline):
+        """Translate cache misses, through the translation memory where a template applies"""
+        plans = {}
+        requests = []
+        for text in texts:
+            matched = self.memory.match(text, target_language)
+            if matched:
+                translated_template, values = matched
+                plans[text] = (None, translated_template, values)
+            else:
+                template, values = self.memory.template(text)
+                if not values:
+                    requests.append(text)
+                    continue
+                plans[text] = (template, None, values)
+                requests.append(template)
+            requests.extend(value for value in values
+                            if self.cache.get(value, source_language, target_language) is None)
+
+        upstream = self.translate_upstream(list(dict.fromkeys(requests)), target_language, source_language,
+                                           deadline)
+        results = {text: upstream[text] for text in texts if text not in plans and text in upstream}
+        retry = []
+        for text, (template, translated_template, values) in plans.items():
+            if translated_template is None:
+                translated_template = upstream.get(template)
+                if translated_template is None:
+                    continue
+                if not self.memory.remember(template, target_language, translated_template):
+                    # The translator mangled the placeholders; translate the string as it is
+                    retry.append(text)
+                    continue
+            terms = [upstream.get(value) or self.cache.get(value, source_language, target_language)
+                     for value in values]
+            if None in terms:
+                continue
+            results[text] = self.memory.fill(translated_template, terms)
+            self.cache.set(text, source_language, target_language, results[text])
+
+        if retry:
+            results.update(self.translate_upstream(retry, target_language, source_language, deadline))
+        return results
+
+    def translate_upstream(self, texts, target_language, source_language, deadline):
+        """Packed, concurrent upstream translation of ``texts`` until ``deadline``, cached as it lands"""
+        if not texts:
+            return {}
+        futures = [self.executor.submit(self.translate_packed, chunk, target_language, source_language)
+                   for chunk in self.pack(texts)]
+        done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+        if not_done:
+            self.metrics.increment(target_language, 'timeouts')
+            print(f"Translation deadline exceeded for {len(not_done)} of {len(futures)} batches")
+
+        results = {}
+        for future in done:
+            try:
+                translated = future.result()
+            except Exception as e:
+                print(f"Translation error: {e}")
+                continue
+            for text, translated_text in translated.items():
+                self.cache.set(text, source_language, target_language, translated_text)
+                results[text] = translated_text
+        return results
+
+    def pack(self, texts):
+        """Group strings into chunks whose delimiter-joined length fits MAX_BATCH_CHARS"""
+        delimiter = self.BATCH_DELIMITER
+        chunks, current, size = [], [], 0
+        for text in texts:
+            if delimiter.strip() in text or len(text) + len(delimiter) > self.MAX_BATCH_CHARS:
+                # Cannot be packed safely: send on its own
+                chunks.append([text])
+                continue
+            if current and size + len(text) + len(delimiter) > self.MAX_BATCH_CHARS:
+                chunks.append(current)
+                current, size = [], 0
+            current.append(text)
+            size += len(text) + len(delimiter)
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def translate_packed(self, chunk, target_language, source_language):
+        """Translate one chunk in a single call, returning {text: translation}"""
+        if len(chunk) == 1:
+            return {chunk[0]: self.call_backend(chunk[0], target_language, source_language)}
+
+        translated = self.call_backend(self.BATCH_DELIMITER.join(chunk), target_language, source_language)
+        parts = [part.strip() for part in translated.split(self.BATCH_DELIMITER.strip())]
+        if len(parts) != len(chunk) or not all(parts):
+            # The translator merged or dropped a delimiter, so the split cannot be trusted
+            return {text: self.call_backend(text, target_language, source_language) for text in chunk}
+        return dict(zip(chunk, parts))
+
     def translate_dict(self, data_dict, target_language='en'):
         """Translate dictionary values"""
         if target_language == 'en':
             return data_dict
         
+        strings = []
+        for value in data_dict.values():
+            if isinstance(value, str):
+                strings.append(value)
+            elif isinstance(value, list):
+                strings.extend(item for item in value if isinstance(item, str))
+        translations = dict(zip(strings, self.translate_batch(strings, target_language)))
+        
         translated_dict = {}
         for key, value in data_dict.items():
             if isinstance(value, str):
-                translated_dict[key] = self.translate_text(value, target_language)
+                translated_dict[key] = translations[value]
             elif isinstance(value, list):
                 translated_dict[key] = [
-                    self.translate_text(item, target_language) if isinstance(item, str) else item
+                    translations[item] if isinstance(item, str) else item
                     for item in value
                 ]
             else:
@@ -106,8 +346,7 @@ class TranslationService:
     def detect_language(self, text):
         """Detect language of text"""
         try:
-            result = self.translator.detect(text)
-            return result.lang
+            return self.backend.detect(text)
         except Exception as e:
             print(f"Language detection error: {e}")
             return 'en'
@@ -117,11 +356,11 @@ class TranslationService:
         if target_language == 'en':
             return terms
         
+        self.memory.add_terms(terms)
+        # Add medical context for better translation
+        context_texts = [f"Medical condition: {term}" for term in terms]
         translated_terms = []
-        for term in terms:
-            # Add medical context for better translation
-            context_text = f"Medical condition: {term}"
-            translated = self.translate_text(context_text, target_language)
+        for translated in self.translate_batch(context_texts, target_language):
             # Extract the translated term (remove "Medical condition: " prefix)
             if translated.startswith("Medical condition: "):
                 translated = translated[19:]  # Remove prefix
@@ -135,7 +374,3 @@ class TranslationService:
     def get_language_name(self, language_code):
         """Get language name from code"""
         return self.supported_languages.get(language_code, language_code)
-    
-    def __del__(self):
-        """Save cache when object is destroyed"""
-        self.save_cache()
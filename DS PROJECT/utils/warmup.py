@@ -0,0 +1,82 @@
+import threading
+import time
+
+
+class Warmup:
+    """Fill the medical info and translation caches before traffic arrives.
+
+    A background thread works through every (condition, language) pair,
+    English first so searches are done before their text is translated, at
+    most ``rate`` upstream-bound pairs per second so a cold start does not
+    flood the search and translation services.  Pairs already cached (by
+    this or another worker, or in the catalogs) cost a store lookup and are
+    not throttled, so a warm restart is ready almost at once.
+
+    ``ready`` turns true once every pair has been tried, whether or not it
+    could be translated, so an unreachable upstream delays readiness by at
+    most one attempt per pair.  ``start`` is safe to call often: it starts
+    the thread if it is not running (threads do not survive a fork) and
+    resumes after the last finished pair.
+    """
+
+    def __init__(self, medical_info_cache, conditions, languages, rate=2.0):
+        self.cache = medical_info_cache
+        languages = sorted(dict.fromkeys(languages), key=lambda language: language != 'en')
+        conditions = list(dict.fromkeys(conditions))
+        self.pairs = [(condition, language) for language in languages for condition in conditions]
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+        self.done = 0
+        self.warmed = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        if self.ready() or (self.thread is not None and self.thread.is_alive()):
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.stopping.clear()
+                if self.started_at is None:
+                    self.started_at = time.monotonic()
+                self.thread = threading.Thread(target=self.run, name='mediscan-warmup', daemon=True)
+                self.thread.start()
+
+    def run(self):
+        interval = 1.0 / self.rate if self.rate else 0.0
+        while self.done < len(self.pairs) and not self.stopping.is_set():
+            condition, language = self.pairs[self.done]
+            started = time.monotonic()
+            try:
+                warmed, fetched = self.cache.warm(condition, language)
+            except Exception as e:
+                print(f"Error warming {condition} ({language}): {e}")
+                warmed, fetched = False, True
+            if warmed:
+                self.warmed += 1
+            else:
+                self.failed += 1
+            self.done += 1
+            if fetched:
+                self.stopping.wait(max(0.0, interval - (time.monotonic() - started)))
+        if self.done >= len(self.pairs) and self.finished_at is None:
+            self.finished_at = time.monotonic()
+
+    def ready(self):
+        return self.done >= len(self.pairs)
+
+    def stop(self, timeout=10):
+        """Stop after the pair in progress; ``start`` resumes from there"""
+        self.stopping.set()
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout)
+
+    def snapshot(self):
+        snapshot = {'ready': self.ready(), 'pairs': len(self.pairs), 'done': self.done, 'warmed': self.warmed,
+                    'failed': self.failed}
+        if self.started_at is not None:
+            snapshot['seconds'] = round((self.finished_at or time.monotonic()) - self.started_at, 1)
+        return snapshot